@@ -0,0 +1,86 @@
+"""
+Anti-Flood and Raid Detection for ID Finder Pro Bot
+Sliding-window rate tracking over group message and join traffic.
+"""
+
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SlidingWindowCounter:
+    """
+    Tracks the last `limit` event timestamps per key.
+    Each update is O(1) and each key holds at most `limit` timestamps;
+    the number of keys is capped with LRU eviction.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 50000):
+        self.limit = max(1, limit)
+        self.window = window
+        self.max_keys = max_keys
+        self._events: "OrderedDict[object, deque]" = OrderedDict()
+
+    def hit(self, key, count: int = 1, now: Optional[float] = None) -> bool:
+        """Record events for a key. Returns True if the limit was reached within the window."""
+        if now is None:
+            now = time.monotonic()
+
+        events = self._events.get(key)
+        if events is None:
+            events = deque(maxlen=self.limit)
+            self._events[key] = events
+            if len(self._events) > self.max_keys:
+                self._events.popitem(last=False)
+        else:
+            self._events.move_to_end(key)
+
+        for _ in range(min(count, self.limit)):
+            events.append(now)
+
+        # The deque holds the last `limit` events, so the limit is hit
+        # when the oldest of them is still inside the window
+        return len(events) == self.limit and now - events[0] <= self.window
+
+    def reset(self, key):
+        """Forget the events of a key"""
+        self._events.pop(key, None)
+
+class FloodDetector:
+    """Detects per-user message floods and per-group join raids"""
+
+    def __init__(self, max_messages: int, window: float, max_joins: int, join_window: float, raid_mode_seconds: float):
+        self.messages = SlidingWindowCounter(max_messages, window)
+        self.joins = SlidingWindowCounter(max_joins, join_window, max_keys=10000)
+        self.raid_mode_seconds = raid_mode_seconds
+        self._raid_until: Dict[int, float] = {}
+
+    def record_message(self, chat_id: int, user_id: int, now: Optional[float] = None) -> bool:
+        """Record a message. Returns True when the user is flooding."""
+        key: Tuple[int, int] = (chat_id, user_id)
+        if self.messages.hit(key, now=now):
+            self.messages.reset(key)  # Trigger once per burst
+            return True
+        return False
+
+    def record_joins(self, chat_id: int, count: int = 1, now: Optional[float] = None) -> bool:
+        """Record new members. Returns True when this update starts a raid."""
+        if now is None:
+            now = time.monotonic()
+        if self.joins.hit(chat_id, count, now=now) and not self.in_raid(chat_id, now):
+            self._raid_until[chat_id] = now + self.raid_mode_seconds
+            logger.warning(f"Join raid detected in {chat_id}")
+            return True
+        return False
+
+    def in_raid(self, chat_id: int, now: Optional[float] = None) -> bool:
+        """Whether new joiners in a group are currently treated as raiders"""
+        until = self._raid_until.get(chat_id)
+        if until is None:
+            return False
+        if (now if now is not None else time.monotonic()) >= until:
+            del self._raid_until[chat_id]
+            return False
+        return True
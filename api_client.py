@@ -0,0 +1,84 @@
+"""
+Bot API Request Layer for ID Finder Pro Bot
+HTTPX request class that records per-method call counts, errors and latency,
+and retries transient network failures with jittered backoff.
+
+Interactive traffic and broadcasts use separate request instances, and so
+separate connection pools: a broadcast saturating its own pool never makes
+command replies wait for a free connection.
+"""
+
+import asyncio
+import random
+import time
+from typing import Tuple
+import logging
+
+import httpx
+from telegram import Bot
+from telegram.error import NetworkError
+from telegram.request import HTTPXRequest
+
+from metrics import api_calls, api_errors, api_latency, api_retries
+
+logger = logging.getLogger(__name__)
+
+# Failures where the request never reached Telegram, so any method may be repeated
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Gateway errors in front of the Bot API
+RETRY_STATUS_CODES = (502, 503, 504)
+
+def is_read_only(api_method: str) -> bool:
+    """getChat, getChatMember, ... can be repeated without side effects"""
+    return api_method.startswith('get') and api_method != 'getUpdates'
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest that feeds the API metrics and retries transient failures"""
+
+    def __init__(self, *args, max_retries: int = 2, retry_base_delay: float = 0.5,
+                 retry_max_delay: float = 5.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: spreads retries so concurrent callers don't retry in lockstep"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def do_request(self, url: str, method: str, request_data=None, **kwargs) -> Tuple[int, bytes]:
+        api_method = url.rsplit('/', 1)[-1]
+        attempt = 0
+        while True:
+            api_calls.inc(method=api_method)
+            start = time.perf_counter()
+            try:
+                code, payload = await super().do_request(url, method, request_data, **kwargs)
+            except NetworkError as e:  # TimedOut is a subclass
+                api_errors.inc(method=api_method, error=type(e).__name__)
+                retryable = isinstance(e.__cause__, UNSENT_ERRORS) or is_read_only(api_method)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+            else:
+                if code >= 400:
+                    api_errors.inc(method=api_method, error=str(code))
+                retryable = code in RETRY_STATUS_CODES and is_read_only(api_method)
+                if not retryable or attempt >= self.max_retries:
+                    return code, payload
+            finally:
+                api_latency.observe(time.perf_counter() - start, method=api_method)
+
+            delay = self._backoff(attempt)
+            attempt += 1
+            api_retries.inc(method=api_method)
+            logger.warning(f"Retrying {api_method} in {delay:.2f}s (attempt {attempt}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+def build_broadcast_bot(token: str, pool_size: int, max_retries: int = 2,
+                        base_url: str = 'https://api.telegram.org/bot') -> Bot:
+    """A Bot with its own connection pool for bulk sends"""
+    return Bot(token, base_url=base_url, request=InstrumentedRequest(
+        connection_pool_size=pool_size,
+        pool_timeout=30.0,  # Broadcast sends may queue for their pool, they are not latency sensitive
+        max_retries=max_retries
+    ))
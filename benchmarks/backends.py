@@ -0,0 +1,131 @@
+"""
+Storage Backends for ID Finder Pro Bot Benchmarks
+Each backend exposes the same operations so results can be compared side by side.
+
+``json`` drives the real UserDatabase, GroupsDatabase and GroupDatabase classes.
+``sqlite`` is a stdlib reference implementation of the same operations, used
+as a yardstick for what an indexed store with row-level writes would cost.
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Optional
+
+from user_db import UserDatabase
+from groups_db import GroupsDatabase
+from group_db import GroupDatabase
+
+class JsonBackend:
+    """The bot's own JSON stores"""
+    name = 'json'
+
+    def __init__(self, paths: Dict[str, str]):
+        self.paths = paths
+        self.user_db: Optional[UserDatabase] = None
+        self.groups_db: Optional[GroupsDatabase] = None
+        self.group_db: Optional[GroupDatabase] = None
+
+    def load(self):
+        self.user_db = UserDatabase(self.paths['users'])
+        self.user_db.load()
+        self.groups_db = GroupsDatabase(self.paths['groups'])
+        self.groups_db.load()
+        data_dir = os.path.join(os.path.dirname(self.paths['group_data']), 'group_data')
+        self.group_db = GroupDatabase(self.paths['group_data'], data_dir)
+
+    def add_user(self, user_id: int, username: str, first_name: str):
+        self.user_db.add_user(user_id, username, first_name, None)
+
+    def get_user(self, user_id: int):
+        return self.user_db.get_user(user_id)
+
+    def increment_interaction(self, group_id: int):
+        self.groups_db.increment_interaction(group_id)
+
+    def add_warning(self, group_id: int, user_id: int):
+        return self.group_db.add_warning(group_id, user_id, 'benchmark', 1)
+
+    def close(self):
+        pass
+
+class SqliteBackend:
+    """Reference: the same data in SQLite with one row per record"""
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY, username TEXT, first_name TEXT, last_name TEXT,
+            joined_date TEXT, last_seen TEXT, interaction_count INTEGER);
+        CREATE TABLE IF NOT EXISTS groups (
+            id INTEGER PRIMARY KEY, title TEXT, type TEXT, username TEXT, invite_link TEXT,
+            added_date TEXT, last_interaction TEXT, interaction_count INTEGER, is_active INTEGER);
+        CREATE TABLE IF NOT EXISTS warnings (
+            group_id INTEGER, user_id INTEGER, reason TEXT, date TEXT, admin_id INTEGER);
+        CREATE INDEX IF NOT EXISTS warnings_by_user ON warnings (group_id, user_id);
+    """
+
+    def __init__(self, paths: Dict[str, str]):
+        self.paths = paths
+        self.db_file = os.path.join(os.path.dirname(paths['users']), 'bench.sqlite3')
+        self.conn: Optional[sqlite3.Connection] = None
+        if not os.path.exists(self.db_file):
+            self._import()
+
+    def _import(self):
+        """One-off conversion of the synthetic JSON stores (not timed)"""
+        conn = sqlite3.connect(self.db_file)
+        conn.executescript(self.SCHEMA)
+        with open(self.paths['users'], encoding='utf-8') as f:
+            conn.executemany(
+                "INSERT INTO users VALUES (:user_id, :username, :first_name, :last_name, "
+                ":joined_date, :last_seen, :interaction_count)", json.load(f).values())
+        with open(self.paths['groups'], encoding='utf-8') as f:
+            conn.executemany(
+                "INSERT INTO groups VALUES (:id, :title, :type, :username, :invite_link, "
+                ":added_date, :last_interaction, :interaction_count, :is_active)", json.load(f).values())
+        with open(self.paths['group_data'], encoding='utf-8') as f:
+            conn.executemany(
+                "INSERT INTO warnings VALUES (?, ?, ?, ?, ?)",
+                ((int(g), int(u), w['reason'], w['date'], w['admin_id'])
+                 for g, data in json.load(f).items()
+                 for u, warns in data['warnings'].items() for w in warns))
+        conn.commit()
+        conn.close()
+
+    def load(self):
+        self.conn = sqlite3.connect(self.db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    def add_user(self, user_id: int, username: str, first_name: str):
+        now = datetime.now().isoformat()
+        self.conn.execute(
+            "INSERT INTO users VALUES (?, ?, ?, NULL, ?, ?, 1) ON CONFLICT(user_id) DO UPDATE SET "
+            "username=excluded.username, first_name=excluded.first_name, last_name=NULL, "
+            "last_seen=excluded.last_seen, interaction_count=interaction_count + 1",
+            (user_id, username, first_name, now, now))
+        self.conn.commit()
+
+    def get_user(self, user_id: int):
+        return self.conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+
+    def increment_interaction(self, group_id: int):
+        self.conn.execute(
+            "UPDATE groups SET interaction_count = interaction_count + 1, last_interaction = ? WHERE id = ?",
+            (datetime.now().isoformat(), group_id))
+        self.conn.commit()
+
+    def add_warning(self, group_id: int, user_id: int):
+        self.conn.execute("INSERT INTO warnings VALUES (?, ?, 'benchmark', ?, 1)",
+                          (group_id, user_id, datetime.now().isoformat()))
+        self.conn.commit()
+        return self.conn.execute("SELECT COUNT(*) FROM warnings WHERE group_id = ? AND user_id = ?",
+                                 (group_id, user_id)).fetchone()[0]
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+BACKENDS = {backend.name: backend for backend in (JsonBackend, SqliteBackend)}
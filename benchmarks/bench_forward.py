@@ -0,0 +1,136 @@
+"""
+Forward Path Micro-benchmark for ID Finder Pro Bot
+Measures the per-message CPU cost of turning a forwarded message into a reply:
+origin extraction (extract_entity_info) for every forward origin type, and
+rendering (format_entity_response, the batched summary line). The
+`baseline.*` cases run the f-string formatter the templates replaced, so the
+template cost is measured against it on the same machine.
+
+Usage:
+    python benchmarks/bench_forward.py                   # default iteration count
+    python benchmarks/bench_forward.py --number 200000 --output forward.json
+
+Each case is timed `--repeat` times over `--number` calls; the best run is
+reported as nanoseconds per call. The result is a JSON document on stdout (or
+--output), comparable across commits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from telegram import Chat, Message, MessageOriginChannel, MessageOriginChat, MessageOriginHiddenUser, \
+    MessageOriginUser, User  # noqa: E402
+
+from forward_batch import summarize  # noqa: E402
+from utils import extract_entity_info, format_entity_response  # noqa: E402
+
+DATE = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+ORIGINS = {
+    'user': MessageOriginUser(DATE, User(7, 'Ann', False, last_name='Lee', username='ann')),
+    'bot': MessageOriginUser(DATE, User(8, 'Helper', True, username='helperbot')),
+    'channel': MessageOriginChannel(DATE, Chat(-1001, Chat.CHANNEL, title='News', username='news'), 42),
+    'chat': MessageOriginChat(DATE, Chat(-1002, Chat.SUPERGROUP, title='Team', username='team')),
+    'hidden_user': MessageOriginHiddenUser(DATE, 'Ghost'),
+}
+
+def baseline_format_entity_response(info: Dict) -> str:
+    """The f-string formatter that predates templates.py (no HTML escaping), kept as the reference"""
+    lines = [
+        f"✅ <b>Entity Detected:</b> {info['type']}",
+        f"🔗 <b>Name/Title:</b> {info['name']}",
+    ]
+    if info['id'] != 'Hidden':
+        lines.append(f"🆔 <b>ID:</b> <code>{info['id']}</code>")
+    if info.get('username'):
+        lines.append(f"📎 <b>Username:</b> @{info['username']}")
+    if info.get('verified') is not None:
+        lines.append(f"✅ <b>Verified:</b> {'Yes' if info['verified'] else 'No'}")
+    if info.get('story_id') is not None:
+        lines.append(f"📱 <b>Story ID:</b> <code>{info['story_id']}</code>")
+    if info.get('forward_date'):
+        lines.append(f"📅 <b>Forward Date:</b> {info['forward_date']}")
+    if 'Story' in info.get('type', ''):
+        lines.append(f"\n💡 <b>Note:</b> This information was extracted from a forwarded story.")
+    return '\n'.join(lines)
+
+def forwarded_message(origin) -> Message:
+    return Message(1, DATE, Chat(1, Chat.PRIVATE), forward_origin=origin)
+
+def run_sync(coro):
+    """Drive a coroutine that never suspends, without an event loop in the measurement"""
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    raise RuntimeError("coroutine suspended")
+
+def best_ns_per_call(func: Callable[[], object], number: int, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+def cases() -> List[tuple]:
+    result = []
+    for kind, origin in ORIGINS.items():
+        message = forwarded_message(origin)
+        info = run_sync(extract_entity_info(message))
+        result.append((f"extract.{kind}", lambda m=message: run_sync(extract_entity_info(m))))
+        result.append((f"format.{kind}", lambda i=info: format_entity_response(i)))
+        result.append((f"baseline.{kind}", lambda d=info.to_dict(): baseline_format_entity_response(d)))
+        # A lone forward: extraction plus the detailed reply
+        result.append((f"reply.{kind}",
+                       lambda m=message: format_entity_response(run_sync(extract_entity_info(m)))))
+        # What a batched forward costs: extraction plus its share of the summary
+        result.append((f"batched.{kind}",
+                       lambda m=message: summarize([run_sync(extract_entity_info(m))])))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the forwarded-message path")
+    parser.add_argument('--number', type=int, default=50000, help="Calls per timing run (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=5, help="Timing runs per case (default: %(default)s)")
+    parser.add_argument('--only', help="Only run cases whose name starts with this prefix")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    results: List[Dict] = []
+    for name, func in cases():
+        if args.only and not name.startswith(args.only):
+            continue
+        func()  # Warm up
+        results.append({'case': name, 'ns_per_call': round(best_ns_per_call(func, args.number, args.repeat), 1)})
+        print(f"{name:<22} {results[-1]['ns_per_call']:>10.1f} ns", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'number': args.number,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
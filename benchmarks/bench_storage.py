@@ -0,0 +1,196 @@
+"""
+Storage Benchmark for ID Finder Pro Bot
+Measures per-operation latency, throughput and memory of the storage layer on
+synthetic stores shaped like users.json, groups.json and group_data.json.
+
+Usage:
+    python benchmarks/bench_storage.py                       # 10k and 100k users
+    python benchmarks/bench_storage.py --full                # adds 1M users (slow, ~1 GB disk)
+    python benchmarks/bench_storage.py --sizes 5000 --backends json --output bench.json
+
+Every (backend, size) case runs in a fresh subprocess on its own copy of the
+data so RSS numbers are not polluted by earlier cases. The result is a JSON
+document on stdout (or --output) for tracking regressions over time.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import write_stores, user_ids, group_ids  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000]
+FULL_SIZE = 1_000_000
+
+def _proc_status_mb(field: str):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def peak_rss_mb() -> float:
+    peak = _proc_status_mb('VmHWM:')
+    if peak is not None:
+        return peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)"""
+    current = _proc_status_mb('VmRSS:')
+    return current if current is not None else peak_rss_mb()
+
+def summarize(op: str, samples: List[float]) -> Dict:
+    samples_ms = sorted(s * 1000 for s in samples)
+    total = sum(samples)
+
+    def pct(p):
+        return samples_ms[min(len(samples_ms) - 1, int(p / 100 * len(samples_ms)))]
+
+    return {
+        'op': op,
+        'ops': len(samples),
+        'mean_ms': round(statistics.fmean(samples_ms), 4),
+        'p50_ms': round(pct(50), 4),
+        'p95_ms': round(pct(95), 4),
+        'p99_ms': round(pct(99), 4),
+        'max_ms': round(samples_ms[-1], 4),
+        'ops_per_sec': round(len(samples) / total, 2) if total else None,
+    }
+
+def measure(func: Callable[[int], object], ops: int, max_seconds: float) -> List[float]:
+    """Run func(i) up to `ops` times or until the time budget is used"""
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    for i in range(ops):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return samples
+
+def run_case(backend_name: str, size: int, data_dir: str, ops: int, max_seconds: float) -> Dict:
+    """Benchmark one backend on one data set (runs inside the child process)"""
+    from backends import BACKENDS
+
+    paths = {name: os.path.join(data_dir, f"{name}.json") for name in ('users', 'groups', 'group_data')}
+    backend = BACKENDS[backend_name](paths)
+    rng = random.Random(42)
+    users = user_ids(size)
+    groups = group_ids(max(10, size // 20), 2)
+    new_ids = iter(range(9_000_000_000, 9_000_000_000 + ops))
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    backend.load()
+    load_seconds = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    operations = [
+        ('get_user', lambda i: backend.get_user(rng.choice(users))),
+        ('add_user_existing', lambda i: backend.add_user(rng.choice(users), 'bench', 'Bench')),
+        ('add_user_new', lambda i: backend.add_user(next(new_ids), 'bench', 'Bench')),
+        ('increment_interaction', lambda i: backend.increment_interaction(rng.choice(groups))),
+        ('add_warning', lambda i: backend.add_warning(rng.choice(groups), rng.choice(users[:1000]))),
+    ]
+    results = [{'op': 'load', 'ops': 1, 'mean_ms': round(load_seconds * 1000, 4)}]
+    for name, func in operations:
+        results.append(summarize(name, measure(func, ops, max_seconds)))
+    backend.close()
+
+    return {
+        'backend': backend_name,
+        'users': size,
+        'groups': len(groups),
+        'rss_mb_before_load': round(rss_before, 1),
+        'rss_mb_loaded': round(rss_loaded, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'operations': results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's storage layer")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated user counts (default: %(default)s)")
+    parser.add_argument('--full', action='store_true', help=f"Also run {FULL_SIZE:,} users")
+    parser.add_argument('--backends', default='json,sqlite', help="Comma-separated backends (default: %(default)s)")
+    parser.add_argument('--ops', type=int, default=200, help="Iterations per operation (default: %(default)s)")
+    parser.add_argument('--max-seconds', type=float, default=10.0,
+                        help="Time budget per operation; slow operations stop early (default: %(default)s)")
+    parser.add_argument('--workdir', help="Where synthetic data is generated (default: a temp dir)")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    parser.add_argument('--case', nargs=3, metavar=('BACKEND', 'SIZE', 'DATA_DIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        backend, size, data_dir = args.case
+        print(json.dumps(run_case(backend, int(size), data_dir, args.ops, args.max_seconds)))
+        return
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    if args.full and FULL_SIZE not in sizes:
+        sizes.append(FULL_SIZE)
+    backends = [b.strip() for b in args.backends.split(',') if b.strip()]
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='idfinder-bench-')
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'ops': args.ops,
+            'max_seconds': args.max_seconds,
+        },
+        'results': [],
+    }
+    try:
+        for size in sizes:
+            source = os.path.join(workdir, str(size), 'source')
+            if not os.path.exists(os.path.join(source, 'users.json')):
+                print(f"Generating {size:,} users...", file=sys.stderr)
+                write_stores(source, size)
+            for backend in backends:
+                case_dir = os.path.join(workdir, str(size), backend)
+                shutil.rmtree(case_dir, ignore_errors=True)
+                shutil.copytree(source, case_dir)
+                print(f"Running {backend} with {size:,} users...", file=sys.stderr)
+                proc = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--case', backend, str(size), case_dir,
+                     '--ops', str(args.ops), '--max-seconds', str(args.max_seconds)],
+                    capture_output=True, text=True, check=True
+                )
+                report['results'].append(json.loads(proc.stdout.strip().splitlines()[-1]))
+                shutil.rmtree(case_dir, ignore_errors=True)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
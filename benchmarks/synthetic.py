@@ -0,0 +1,108 @@
+"""
+Synthetic Data for ID Finder Pro Bot Benchmarks
+Generates users.json, groups.json and group_data.json with the same schema as production.
+"""
+
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+FIRST_NAMES = ['Alex', 'Sam', 'Maria', 'Ivan', 'Aisha', 'Chen', 'Surya', 'Lena', 'Omar', 'Yuki']
+LAST_NAMES = [None, 'Smith', 'Kumar', 'Petrov', 'Garcia', 'Kim', 'Ali', 'Rossi']
+GROUP_TYPES = ['supergroup', 'supergroup', 'supergroup', 'group', 'channel']
+
+BASE_DATE = datetime(2025, 7, 1)
+
+def _date(rng: random.Random, days: int = 365) -> str:
+    return (BASE_DATE + timedelta(seconds=rng.randrange(days * 86400))).isoformat()
+
+def user_ids(size: int, seed: int = 1) -> List[int]:
+    rng = random.Random(seed)
+    return rng.sample(range(100_000_000, 8_000_000_000), size)
+
+def group_ids(size: int, seed: int = 2) -> List[int]:
+    rng = random.Random(seed)
+    return [-1_000_000_000_000 - n for n in rng.sample(range(10 ** 10), size)]
+
+def make_users(size: int, seed: int = 1) -> Dict[str, Dict]:
+    """users.json records as written by UserDatabase.add_user"""
+    rng = random.Random(seed)
+    users = {}
+    for uid in user_ids(size, seed):
+        joined = _date(rng)
+        users[str(uid)] = {
+            'user_id': uid,
+            'username': f"user{uid}" if rng.random() < 0.7 else None,
+            'first_name': rng.choice(FIRST_NAMES),
+            'last_name': rng.choice(LAST_NAMES),
+            'joined_date': joined,
+            'last_seen': max(joined, _date(rng)),
+            'interaction_count': rng.randint(1, 500)
+        }
+    return users
+
+def make_groups(size: int, seed: int = 2) -> Dict[str, Dict]:
+    """groups.json records as written by GroupsDatabase.add_group"""
+    rng = random.Random(seed)
+    groups = {}
+    for gid in group_ids(size, seed):
+        added = _date(rng)
+        groups[str(gid)] = {
+            'id': gid,
+            'title': f"Group {-gid % 100000}",
+            'type': rng.choice(GROUP_TYPES),
+            'username': None,
+            'invite_link': None,
+            'added_date': added,
+            'last_interaction': max(added, _date(rng)),
+            'interaction_count': rng.randint(1, 5000),
+            'is_active': rng.random() < 0.9
+        }
+    return groups
+
+def make_group_data(groups: Dict[str, Dict], members: List[int], seed: int = 3) -> Dict[str, Dict]:
+    """Legacy group_data.json with a few warnings per group"""
+    rng = random.Random(seed)
+    data = {}
+    for group_key in groups:
+        warnings = {}
+        for uid in rng.sample(members, min(len(members), rng.randint(0, 5))):
+            warnings[str(uid)] = sorted(
+                ({'reason': 'spam', 'date': _date(rng), 'admin_id': members[0]}
+                 for _ in range(rng.randint(1, 3))),
+                key=lambda w: w['date']
+            )
+        data[group_key] = {
+            'warnings': warnings,
+            'mutes': {},
+            'settings': {
+                'max_warnings': 3,
+                'auto_action': 'mute',
+                'warn_expiry_hours': None,
+                'auto_mute_duration': '24h'
+            }
+        }
+    return data
+
+def write_stores(directory: str, users: int, groups: int = None, seed: int = 1) -> Dict[str, str]:
+    """Write all three stores into `directory` and return their paths"""
+    if groups is None:
+        groups = max(10, users // 20)
+    os.makedirs(directory, exist_ok=True)
+
+    user_data = make_users(users, seed)
+    group_data = make_groups(groups, seed + 1)
+    members = [record['user_id'] for _, record in zip(range(1000), user_data.values())]
+
+    paths = {
+        'users': os.path.join(directory, 'users.json'),
+        'groups': os.path.join(directory, 'groups.json'),
+        'group_data': os.path.join(directory, 'group_data.json'),
+    }
+    for key, payload in (('users', user_data), ('groups', group_data),
+                         ('group_data', make_group_data(group_data, members, seed + 2))):
+        with open(paths[key], 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+    return paths
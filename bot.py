@@ -1,37 +1,53 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent, KeyboardButton, ReplyKeyboardMarkup, LabeledPrice, KeyboardButtonRequestChat, KeyboardButtonRequestUsers, ReplyKeyboardRemove, BotCommand, ChatMember, ChatMemberAdministrator, ChatMemberOwner
-from telegram.ext import (Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler, InlineQueryHandler, ConversationHandler, PreCheckoutQueryHandler, ChatMemberHandler)
-from config import BOT_TOKEN, ADMIN_IDS, TON_WALLET
+from telegram.ext import (Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler, InlineQueryHandler, ConversationHandler, PreCheckoutQueryHandler, ChatMemberHandler, TypeHandler)
+from config import (BOT_TOKEN, ADMIN_IDS, TON_WALLET, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, PORT, MAX_CONCURRENT_UPDATES,
+    CATCHUP_ENABLED, CATCHUP_MAX_UPDATES, CATCHUP_STALE_SECONDS, LOG_LEVEL, LOG_SAMPLE_RATE,
+    API_POOL_SIZE, API_POOL_TIMEOUT, BROADCAST_POOL_SIZE, API_MAX_RETRIES, BOT_API_URL,
+    RECORD_UPDATES_DIR, RECORD_MAX_MB, RECORD_MAX_FILES, RECORD_SALT, FORWARD_BATCH_WINDOW, FORWARD_BATCH_MAX_WAIT)
 from utils import extract_entity_info, format_entity_response, resolve_username_or_link, get_user_chats
 from user_db import user_db
 from groups_db import groups_db
+from web_server import WebServer, webhook_route
+from update_processor import KeyedUpdateProcessor
+from catchup import catch_up
+from log_utils import configure_logging, set_log_level, get_log_level, set_sample_rate, log_event
+from api_client import InstrumentedRequest, build_broadcast_bot
+from update_recorder import UpdateRecorder
+from bot_identity import bot_identity
+from entity_cache import entity_cache, entity_from_shared_user, entity_from_shared_chat
+from forward_batch import ForwardBatcher
+from templates import (escape, full_name, SHARED_USER, SHARED_USERS_HEADER, SHARED_USERS_LINE, SHARED_USERS_LINE_LIMITED,
+    USERNAME_SUFFIX, SHARED_CHAT, SHARED_CHAT_ADD, MEMBER_INFO)
+from exports import ExportSpec, parse_export_args, run_export, format_label, EXPORT_KINDS
+from bulk_lookup import parse_identifiers, decode_upload, build_csv, MAX_ITEMS as BULK_MAX_ITEMS, MAX_FILE_BYTES as BULK_MAX_FILE_BYTES
+import metrics
+import asyncio
+import secrets
+import signal
 import uuid
 from datetime import datetime
+from functools import lru_cache
 
 # Import group commands
 from group_commands import (
     group_id_command, group_ids_command, whois_command, mentionid_command,
-    group_help_command, help_group_command, help_admin_command, warn_command, warnings_command, resetwarn_command,
+    group_help_command, help_group_command, help_admin_command, warn_command, warnings_command, resetwarn_command, warnconfig_command,
     mute_command, unmute_command, kick_command, ban_command, unban_command,
-    pin_command, groupinfo_command, listadmins_command
+    massban_command, masskick_command, massmute_command, antiflood_message_handler, antiflood_join_handler,
+    pin_command, groupinfo_command, listadmins_command, schedule_mute_expiry, group_db
 )
 
-# Suppress all logging output to terminal for clean operation
-logging.basicConfig(
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.CRITICAL  # Only show critical crashes, nothing else
-)
+# Only critical crashes reach the terminal unless LOG_LEVEL says otherwise;
+# the level can be raised at runtime with /loglevel
+configure_logging(LOG_LEVEL, LOG_SAMPLE_RATE)
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.CRITICAL)
 
-# Also silence noisy third-party loggers
-logging.getLogger('httpx').setLevel(logging.CRITICAL)
-logging.getLogger('httpcore').setLevel(logging.CRITICAL)
-logging.getLogger('telegram').setLevel(logging.CRITICAL)
-logging.getLogger('telegram.ext').setLevel(logging.CRITICAL)
+# Forward batches, one per chat, flushed by the job queue
+forward_batcher = ForwardBatcher(FORWARD_BATCH_WINDOW, FORWARD_BATCH_MAX_WAIT)
 
 # Conversation states
-SELECTING_ENTITY, SELECTING_CHAT, SELECTING_DONATION_METHOD, SELECTING_STARS_AMOUNT, SELECTING_TON_AMOUNT, WAITING_FOR_USERNAME, WAITING_FOR_MEMBER_USERNAME, NOTIFY_TEXT, NOTIFY_BUTTONS, NOTIFY_CONFIRM = range(10)
+SELECTING_ENTITY, SELECTING_CHAT, SELECTING_DONATION_METHOD, SELECTING_STARS_AMOUNT, SELECTING_TON_AMOUNT, WAITING_FOR_USERNAME, WAITING_FOR_MEMBER_USERNAME, NOTIFY_TEXT, NOTIFY_BUTTONS, NOTIFY_CONFIRM, WAITING_FOR_BULK = range(11)
 
 # Main keyboard with entity buttons and donate button - for private chats only
 MAIN_KEYBOARD = ReplyKeyboardMarkup([
@@ -40,14 +56,20 @@ MAIN_KEYBOARD = ReplyKeyboardMarkup([
             text="👤 User",
             request_users=KeyboardButtonRequestUsers(
                 request_id=1,
-                user_is_bot=False
+                user_is_bot=False,
+                max_quantity=10,
+                request_name=True,
+                request_username=True
             )
         ),
         KeyboardButton(
             text="🤖 Bot",
             request_users=KeyboardButtonRequestUsers(
                 request_id=2,
-                user_is_bot=True
+                user_is_bot=True,
+                max_quantity=10,
+                request_name=True,
+                request_username=True
             )
         )
     ],
@@ -56,14 +78,18 @@ MAIN_KEYBOARD = ReplyKeyboardMarkup([
             text="👥 Group",
             request_chat=KeyboardButtonRequestChat(
                 request_id=3,
-                chat_is_channel=False
+                chat_is_channel=False,
+                request_title=True,
+                request_username=True
             )
         ),
         KeyboardButton(
             text="📢 Channel",
             request_chat=KeyboardButtonRequestChat(
                 request_id=4,
-                chat_is_channel=True
+                chat_is_channel=True,
+                request_title=True,
+                request_username=True
             )
         )
     ],
@@ -89,7 +115,9 @@ ADMIN_KEYBOARD = ReplyKeyboardMarkup([
                 chat_is_forum=None,
                 chat_has_username=None,
                 chat_is_created=True,
-                user_administrator_rights={"can_delete_messages": True}
+                user_administrator_rights={"can_delete_messages": True},
+                request_title=True,
+                request_username=True
             )
         ),
         KeyboardButton(
@@ -100,30 +128,37 @@ ADMIN_KEYBOARD = ReplyKeyboardMarkup([
                 chat_is_forum=None,
                 chat_has_username=None,
                 chat_is_created=True,
-                user_administrator_rights={"can_post_messages": True}
+                user_administrator_rights={"can_post_messages": True},
+                request_title=True,
+                request_username=True
             )
         )
     ],
     [KeyboardButton(text="🔙 Back to Main")]
 ], resize_keyboard=True)
 
-# Add to Group keyboard - for /add command (direct invite link)
-ADD_KEYBOARD = InlineKeyboardMarkup([
-    [
-        InlineKeyboardButton(
-            text="➕ Add Bot to Group",
-            url="https://t.me/idfinderpro_bot?startgroup&admin=delete_messages+restrict_members",
-            style="success"
-        )
-    ],
-    [
-        InlineKeyboardButton(
-            text="🔙 Back to Main",
-            callback_data="main_menu",
-            style="danger"
-        )
-    ]
-])
+# Add to Group keyboard - for /add command (direct invite link to this bot)
+def get_add_keyboard() -> InlineKeyboardMarkup:
+    return _build_add_keyboard(bot_identity.add_to_group_link())
+
+@lru_cache(maxsize=2)
+def _build_add_keyboard(invite_link: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton(
+                text="➕ Add Bot to Group",
+                url=invite_link,
+                style="success"
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="🔙 Back to Main",
+                callback_data="main_menu",
+                style="danger"
+            )
+        ]
+    ])
 
 # Donation menu inline keyboard
 DONATION_KEYBOARD = InlineKeyboardMarkup([
@@ -302,6 +337,7 @@ async def handle_help_callback(update: Update, context: ContextTypes.DEFAULT_TYP
                 "• /id - Get your own Telegram ID\n"
                 "• /find [user_id] - Find user info by ID\n"
                 "• /username [@username] - Get ID by username\n"
+                "• /bulk - Get IDs of many usernames/links as CSV\n"
                 "• /admin - Show groups/channels you admin\n"
                 "• /add - Add bot to your groups\n"
                 "• /donate - Support the developer\n"
@@ -343,7 +379,7 @@ async def handle_help_callback(update: Update, context: ContextTypes.DEFAULT_TYP
 
                 "<b>Special Features:</b>\n"
                 "• Story ID extraction support\n"
-                "• Inline mode (@IDFinderPro_Bot)\n"
+                f"• Inline mode (@{bot_identity.username})\n"
                 "• Group management tools\n"
                 "• Admin notification system\n"
                 "• User database tracking\n"
@@ -404,7 +440,7 @@ async def handle_help_callback(update: Update, context: ContextTypes.DEFAULT_TYP
                 "ℹ️ <b>About ID Finder Pro Bot</b>\n\n"
                 "<b>Bot Information:</b>\n"
                 "• Name: ID Finder Pro Bot\n"
-                "• Username: @IDFinderPro_Bot\n"
+                f"• Username: @{bot_identity.username}\n"
                 "• Version: 2.0 Pro\n"
                 "• Developer: @tataa_sumo\n\n"
 
@@ -432,6 +468,7 @@ async def handle_help_callback(update: Update, context: ContextTypes.DEFAULT_TYP
                 "• /id - Get your ID\n"
                 "• /find [id] - Find user by ID\n"
                 "• /username [@user] - Get ID by username\n"
+                "• /bulk - Bulk lookup as CSV\n"
                 "• /admin - Show admin groups\n"
                 "• /add - Add bot to groups\n"
                 "• /info - Bot information\n"
@@ -520,10 +557,14 @@ async def admin_com_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "<b>📢 Communication:</b>\n"
         "• <code>/notify</code> - Send notification to users\n\n"
 
+        "<b>🔧 Diagnostics:</b>\n"
+        "• <code>/loglevel [level] [sample rate]</code> - Show or change logging\n\n"
+
         "<b>📄 Data Export:</b>\n"
         "• Use <code>/stats</code> → Export buttons for CSV downloads\n"
         "• Users CSV - Complete user database\n"
-        "• Groups CSV - Complete groups database\n\n"
+        "• Groups CSV - Complete groups database\n"
+        "• <code>/export users|groups [csv|jsonl|parquet] [fields=...] [since=...] [active=DAYS]</code> - Custom exports\n\n"
 
         "<b>🔐 Admin Access:</b>\n"
         f"• Total Admins: {len(ADMIN_IDS)}\n"
@@ -579,10 +620,7 @@ async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Format the response
         response_text = f"✅ <b>User Found</b>\n\n"
         response_text += f"🆔 <b>ID:</b> <code>{user_info.id}</code>\n"
-        response_text += f"👤 <b>Name:</b> {user_info.first_name}"
-
-        if user_info.last_name:
-            response_text += f" {user_info.last_name}"
+        response_text += f"👤 <b>Name:</b> {escape(full_name(user_info.first_name, user_info.last_name) or user_info.title or '')}"
 
         if user_info.username:
             response_text += f"\n📎 <b>Username:</b> @{user_info.username}"
@@ -650,7 +688,7 @@ async def username_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 await update.message.reply_text(text, parse_mode='HTML', reply_markup=MAIN_KEYBOARD)
             else:
                 await update.message.reply_text(
-                    f"❌ Could not find information for username @{username}.\n\n"
+                    f"❌ Could not find information for username @{escape(username)}.\n\n"
                     f"<b>Possible reasons:</b>\n"
                     f"• Username doesn't exist\n"
                     f"• User/channel/group is private\n"
@@ -718,7 +756,7 @@ async def handle_username_input(update: Update, context: ContextTypes.DEFAULT_TY
             await update.message.reply_text(text, parse_mode='HTML', reply_markup=MAIN_KEYBOARD)
         else:
             await update.message.reply_text(
-                f"❌ Could not find information for username @{username}.\n\n"
+                f"❌ Could not find information for username @{escape(username)}.\n\n"
                 f"<b>Possible reasons:</b>\n"
                 f"• Username doesn't exist\n"
                 f"• User/channel/group is private\n"
@@ -739,6 +777,80 @@ async def handle_username_input(update: Update, context: ContextTypes.DEFAULT_TY
         )
     return SELECTING_ENTITY
 
+async def bulk_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle the /bulk command to resolve many usernames, links or IDs at once"""
+    # Everything after the command, including further lines
+    parts = (update.message.text or '').split(maxsplit=1)
+    if len(parts) > 1:
+        return await run_bulk_lookup(update, context, parts[1])
+
+    await update.message.reply_text(
+        "📋 <b>Bulk ID Lookup</b>\n\n"
+        f"Send up to {BULK_MAX_ITEMS} usernames, t.me links or IDs, separated by spaces, commas "
+        "or new lines, or upload them as a .txt file.\n\n"
+        "You'll get one CSV file with the ID, type and name of each entity.",
+        parse_mode='HTML',
+        reply_markup=MAIN_KEYBOARD
+    )
+    return WAITING_FOR_BULK
+
+async def handle_bulk_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle the pasted list or uploaded file after /bulk"""
+    if not update.message:
+        return SELECTING_ENTITY
+
+    document = update.message.document
+    if document:
+        if document.file_size and document.file_size > BULK_MAX_FILE_BYTES:
+            await update.message.reply_text(
+                f"❌ File too large, the limit is {BULK_MAX_FILE_BYTES // 1024} KB.",
+                reply_markup=MAIN_KEYBOARD
+            )
+            return WAITING_FOR_BULK
+        data = await (await document.get_file()).download_as_bytearray()
+        text = decode_upload(bytes(data))
+    else:
+        text = update.message.text or ''
+        if text == "🔙 Back to Main":
+            await update.message.reply_text("Returning to main menu.", reply_markup=MAIN_KEYBOARD)
+            return SELECTING_ENTITY
+
+    return await run_bulk_lookup(update, context, text)
+
+async def run_bulk_lookup(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
+    """Deduplicate, resolve through the entity cache (bounded concurrency) and reply with a CSV"""
+    identifiers, invalid, skipped = parse_identifiers(text)
+    if not identifiers:
+        await update.message.reply_text(
+            "❌ No usernames, links or IDs found. Send them separated by spaces, commas or new lines.",
+            reply_markup=MAIN_KEYBOARD
+        )
+        return WAITING_FOR_BULK
+
+    log_event(logger, logging.INFO, 'bulk_lookup', user_id=update.effective_user.id,
+              count=len(identifiers), invalid=len(invalid), skipped=skipped)
+    await update.message.reply_text(f"⏳ Resolving {len(identifiers)} entities...")
+
+    results = await entity_cache.resolve_many(context.bot, [identifier for _, identifier in identifiers])
+    found = sum(1 for info in results.values() if info)
+
+    filename = f"ids_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    caption = (
+        f"📄 <b>Bulk Lookup</b>\n\n"
+        f"• Found: {found:,} of {len(identifiers):,}\n"
+        f"• Invalid: {len(invalid):,}"
+    )
+    if skipped:
+        caption += f"\n• Skipped (over {BULK_MAX_ITEMS}): {skipped:,}"
+    await update.message.reply_document(
+        document=build_csv(identifiers, results, invalid),
+        filename=filename,
+        caption=caption,
+        parse_mode='HTML',
+        reply_markup=MAIN_KEYBOARD
+    )
+    return SELECTING_ENTITY
+
 async def get_user_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Add null checks
     if not update.effective_user:
@@ -758,14 +870,7 @@ async def get_user_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Different behavior for private chats vs groups
     if chat_type == 'private':
         # Private chat - use conversation handler format
-        text = (
-            f"✅ <b>Entity:</b> User\n"
-            f"🔗 <b>Name:</b> {user.first_name}\n"
-            f"🆔 <b>ID:</b> <code>{user.id}</code>"
-        )
-
-        if user.username:
-            text += f"\n📎 <b>Username:</b> @{user.username}"
+        text = SHARED_USER.render(type='User', name=user.first_name, id=user.id, username=user.username)
 
         # Use appropriate keyboard based on chat type
         await update.message.reply_text(text, parse_mode='HTML', reply_markup=get_appropriate_keyboard(chat_type))
@@ -774,71 +879,101 @@ async def get_user_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Group chat - use group format (delegate to group command)
         await group_id_command(update, context)
 
+async def format_shared_users(bot, shared, is_bot: bool) -> str:
+    """One reply for a multi-select share; details missing from the payload are resolved concurrently"""
+    users = {}
+    for user_id, shared_user in shared:
+        user = entity_from_shared_user(shared_user, is_bot) if shared_user else None
+        if user:
+            entity_cache.put(user)
+            users[user_id] = user
+
+    missing = [user_id for user_id, _ in shared if user_id not in users]
+    if missing:
+        users.update(await entity_cache.resolve_many(bot, missing))
+
+    lines = [SHARED_USERS_HEADER.render(count=len(shared), kind='Bots' if is_bot else 'Users')]
+    for n, (user_id, _) in enumerate(shared, 1):
+        user = users.get(user_id)
+        if user is None:
+            lines.append(SHARED_USERS_LINE_LIMITED.render(n=n, id=user_id))
+            continue
+        lines.append(SHARED_USERS_LINE.render(
+            n=n,
+            name=full_name(user['first_name'], user['last_name']) or "Unknown",
+            id=user_id,
+            username=USERNAME_SUFFIX.render(username=user['username']) if user['username'] else ''
+        ))
+    return "\n".join(lines)
+
 async def handle_user_shared(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    logger.info("=== handle_user_shared ENTRY ===")
     try:
         # Add null check for message
         if not update.message:
             logger.error("handle_user_shared called with None message")
             return SELECTING_ENTITY
 
-        # Debug: Log message attributes
-        logger.info(f"Message attributes: {[attr for attr in dir(update.message) if 'shared' in attr.lower()]}")
-
-        # Extract the shared user information with compatibility handling
-        user_id = None
+        # Extract the shared users with compatibility handling, as (user_id, SharedUser or None)
+        shared = []
+        request_id = 0
 
         # Try different attribute names for compatibility
         if hasattr(update.message, 'users_shared') and update.message.users_shared:
             users_shared = update.message.users_shared
-            logger.info(f"Found users_shared. Attributes: {dir(users_shared)}")
+            request_id = getattr(users_shared, 'request_id', 0)
 
             # Try different attribute names
-            if hasattr(users_shared, 'user_ids') and users_shared.user_ids and len(users_shared.user_ids) > 0:
-                user_id = users_shared.user_ids[0]
-                logger.info(f"Got user_id from user_ids: {user_id}")
-            elif hasattr(users_shared, 'users') and users_shared.users and len(users_shared.users) > 0:
-                user_obj = users_shared.users[0]
-                user_id = user_obj.user_id if hasattr(user_obj, 'user_id') else user_obj
-                logger.info(f"Got user_id from users: {user_id}")
+            if hasattr(users_shared, 'user_ids') and users_shared.user_ids:
+                shared = [(uid, None) for uid in users_shared.user_ids]
+            elif hasattr(users_shared, 'users') and users_shared.users:
+                shared = [(user_obj.user_id, user_obj) if hasattr(user_obj, 'user_id') else (user_obj, None)
+                          for user_obj in users_shared.users]
             elif hasattr(users_shared, 'user_id'):
-                user_id = users_shared.user_id
-                logger.info(f"Got user_id directly: {user_id}")
+                shared = [(users_shared.user_id, None)]
 
         elif hasattr(update.message, 'user_shared') and update.message.user_shared:
             # Single user shared (older API)
             user_shared = update.message.user_shared
-            logger.info(f"Found user_shared. Attributes: {dir(user_shared)}")
 
             if hasattr(user_shared, 'user_id'):
-                user_id = user_shared.user_id
-                logger.info(f"Got user_id from user_shared.user_id: {user_id}")
-            elif hasattr(user_shared, 'user_ids') and user_shared.user_ids and len(user_shared.user_ids) > 0:
-                user_id = user_shared.user_ids[0]
-                logger.info(f"Got user_id from user_shared.user_ids: {user_id}")
+                shared = [(user_shared.user_id, None)]
+            elif hasattr(user_shared, 'user_ids') and user_shared.user_ids:
+                shared = [(uid, None) for uid in user_shared.user_ids]
 
-        if not user_id:
+        if not shared:
             logger.error("Could not extract user ID from shared user data")
-            logger.error(f"Available message attributes: {[attr for attr in dir(update.message) if not attr.startswith('_')]}")
             chat_type = update.effective_chat.type
             await update.message.reply_text("Error: No user was shared.", reply_markup=get_appropriate_keyboard(chat_type))
             return SELECTING_ENTITY
 
-        logger.info(f"Successfully extracted user ID: {user_id}")
+        log_event(logger, logging.DEBUG, 'user_shared', user_ids=[uid for uid, _ in shared])
+        is_bot = request_id == 2  # The "🤖 Bot" button only lets bots be picked
+
+        if len(shared) > 1:
+            # Multi-select share: one consolidated reply for all of them
+            text = await format_shared_users(context.bot, shared, is_bot)
+            chat_type = update.effective_chat.type
+            await update.message.reply_text(text, parse_mode='HTML', reply_markup=get_appropriate_keyboard(chat_type))
+            return SELECTING_ENTITY
+
+        user_id, shared_user = shared[0]
         
         try:
-            # Get user information
-            user = await context.bot.get_chat(user_id)
+            # The buttons request name and username, so the share usually describes the user
+            # itself; otherwise use the entity cache, which calls get_chat only on a miss
+            user = entity_from_shared_user(shared_user, is_bot) if shared_user else None
+            if user:
+                entity_cache.put(user)
+            else:
+                user = await entity_cache.resolve(context.bot, user_id)
             
             # Format the response
-            text = (
-                f"✅ <b>Entity:</b> {'Bot' if getattr(user, 'is_bot', False) else 'User'}\n"
-                f"🔗 <b>Name:</b> {getattr(user, 'first_name', '') or ''} {getattr(user, 'last_name', '') or ''}\n"
-                f"🆔 <b>ID:</b> <code>{user.id}</code>"
+            text = SHARED_USER.render(
+                type='Bot' if user['is_bot'] or is_bot else 'User',
+                name=full_name(user['first_name'], user['last_name']),
+                id=user['id'],
+                username=user['username']
             )
-            
-            if hasattr(user, 'username') and user.username:
-                text += f"\n📎 <b>Username:</b> @{user.username}"
 
             # Use appropriate keyboard based on chat type
             chat_type = update.effective_chat.type
@@ -868,11 +1003,9 @@ async def handle_user_shared(update: Update, context: ContextTypes.DEFAULT_TYPE)
             chat_type = update.effective_chat.type if update.effective_chat else 'private'
             await update.message.reply_text(f"❌ Error: Could not retrieve user information.", reply_markup=get_appropriate_keyboard(chat_type))
 
-    logger.info("=== handle_user_shared EXIT ===")
     return SELECTING_ENTITY
 
 async def handle_chat_shared(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    logger.info("=== handle_chat_shared ENTRY ===")
     try:
         # Add null check for message
         if not update.message:
@@ -895,51 +1028,54 @@ async def handle_chat_shared(update: Update, context: ContextTypes.DEFAULT_TYPE)
         is_add_request = request_id in [7, 8]
         
         try:
-            # Get chat information
-            chat = await context.bot.get_chat(chat_id)
+            # The buttons request title and username, so the share usually describes the chat
+            # itself; otherwise use the entity cache, which calls get_chat only on a miss
+            # The share carries no chat type: prefer the one get_chat reported earlier, else infer
+            # it from the button (channel buttons only share channels) and the supergroup ID prefix
+            cached = entity_cache.get(chat_id)
+            if cached and cached['type']:
+                shared_type = cached['type']
+            elif request_id in [4, 6]:
+                shared_type = "channel"
+            else:
+                shared_type = "supergroup" if str(chat_id).startswith("-100") else "group"
+            chat = entity_from_shared_chat(chat_shared, shared_type)
+            if chat:
+                entity_cache.put(chat)
+            else:
+                chat = await entity_cache.resolve(context.bot, chat_id)
             
             # Determine the entity type
-            if hasattr(chat, 'type'):
-                if chat.type == "channel":
-                    entity_type = "Channel"
-                elif chat.type in ["group", "supergroup"]:
-                    entity_type = "Group"
-                else:
-                    entity_type = "Chat"
+            if chat['type'] == "channel":
+                entity_type = "Channel"
+            elif chat['type'] in ["group", "supergroup"]:
+                entity_type = "Group"
             else:
                 entity_type = "Chat"
             
             # Format the response
-            text = (
-                f"✅ <b>Entity:</b> {entity_type}\n"
-                f"🔗 <b>Name/Title:</b> {getattr(chat, 'title', 'Unknown')}\n"
-                f"🆔 <b>ID:</b> <code>{chat.id}</code>"
+            text = SHARED_CHAT.render(
+                type=entity_type,
+                title=chat['title'] or 'Unknown',
+                id=chat['id'],
+                username=chat['username']
             )
             
-            if hasattr(chat, 'username') and chat.username:
-                text += f"\n📎 <b>Username:</b> @{chat.username}"
-            
             # Add special notes based on request type
             if is_admin_request:
                 text += f"\n\n<b>Note:</b> You are an administrator in this {entity_type.lower()}."
                 keyboard = ADMIN_KEYBOARD
             elif is_add_request:
                 # For /add command, directly provide the invite link
-                bot_username = (await context.bot.get_me()).username
-
                 # Create appropriate invite link based on entity type
                 if entity_type.lower() == "channel":
-                    invite_link = f"https://t.me/{bot_username}?startchannel&admin=post_messages+edit_messages+delete_messages"
+                    invite_link = bot_identity.add_to_channel_link()
                 else:
-                    invite_link = f"https://t.me/{bot_username}?startgroup&admin=delete_messages+restrict_members"
+                    invite_link = bot_identity.add_to_group_link()
 
                 # Send success message with direct invite link
-                chat_name = getattr(chat, 'title', 'Unknown')
                 await update.message.reply_text(
-                    f"✅ <b>Ready to Add Bot!</b>\n\n"
-                    f"📋 <b>Selected {entity_type}:</b> {chat_name}\n"
-                    f"🆔 <b>ID:</b> <code>{chat_id}</code>\n\n"
-                    f"🚀 <b>Click the button below to add the bot:</b>",
+                    SHARED_CHAT_ADD.render(type=entity_type, title=chat['title'] or 'Unknown', id=chat_id),
                     parse_mode='HTML',
                     reply_markup=InlineKeyboardMarkup([
                         [InlineKeyboardButton(f"➕ Add Bot to {entity_type}", url=invite_link)]
@@ -971,20 +1107,15 @@ async def handle_chat_shared(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 keyboard = ADMIN_KEYBOARD
             elif is_add_request:
                 # For /add command, directly provide the invite link
-                bot_username = (await context.bot.get_me()).username
-
                 # Create appropriate invite link based on entity type
                 if entity_type.lower() == "channel":
-                    invite_link = f"https://t.me/{bot_username}?startchannel&admin=post_messages+edit_messages+delete_messages"
+                    invite_link = bot_identity.add_to_channel_link()
                 else:
-                    invite_link = f"https://t.me/{bot_username}?startgroup&admin=delete_messages+restrict_members"
+                    invite_link = bot_identity.add_to_group_link()
 
                 # Send success message with direct invite link
                 await update.message.reply_text(
-                    f"✅ <b>Ready to Add Bot!</b>\n\n"
-                    f"📋 <b>Selected {entity_type}:</b> {text.split('Name/Title:</b> ')[1].split('<')[0] if 'Name/Title:</b>' in text else 'Unknown'}\n"
-                    f"🆔 <b>ID:</b> <code>{chat_id}</code>\n\n"
-                    f"🚀 <b>Click the button below to add the bot:</b>",
+                    SHARED_CHAT_ADD.render(type=entity_type, title='Unknown', id=chat_id),
                     parse_mode='HTML',
                     reply_markup=InlineKeyboardMarkup([
                         [InlineKeyboardButton(f"➕ Add Bot to {entity_type}", url=invite_link)]
@@ -1007,7 +1138,6 @@ async def handle_chat_shared(update: Update, context: ContextTypes.DEFAULT_TYPE)
             chat_type = update.effective_chat.type if update.effective_chat else 'private'
             await update.message.reply_text(f"❌ Error: Could not retrieve chat information.", reply_markup=get_appropriate_keyboard(chat_type))
 
-    logger.info("=== handle_chat_shared EXIT ===")
     return SELECTING_ENTITY
 
 async def menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1258,18 +1388,14 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     user_id = str(user.id)
 
-    logger.info(f"handle_message called by user {user_id}")
-    logger.info(f"Message type: text={bool(message.text)}, photo={bool(message.photo)}, forward={bool(hasattr(message, 'forward_origin') and message.forward_origin)}")
-    logger.info(f"User data notification: {context.user_data.get('notification', {})}")
+    log_event(logger, logging.DEBUG, 'handle_message', user_id=user_id, forward=bool(message.forward_origin))
 
     # Track interaction
     track_interaction(update)
 
     # Check if admin has notification in progress and handle forwarded messages during notification
     if user_id in ADMIN_IDS and context.user_data.get('notification', {}).get('in_progress'):
-        logger.info(f"Admin {user_id} has notification in progress")
         if message and hasattr(message, 'forward_origin') and message.forward_origin:
-            logger.info("Forwarded message detected during notification - showing error")
             await message.reply_text(
                 "⚠️ <b>Notification Creation in Progress</b>\n\n"
                 "You are currently creating a notification. Forwarded message processing is disabled.\n\n"
@@ -1292,12 +1418,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Handle forwarded messages
     if message and hasattr(message, 'forward_origin') and message.forward_origin:
         try:
-            logger.info(f"Processing forwarded message. Origin type: {message.forward_origin.type}")
-            logger.info(f"Forward origin details: {message.forward_origin}")
-
             info = await extract_entity_info(message)
-            if info:
-                logger.info(f"Successfully extracted info: {info}")
+            if FORWARD_BATCH_WINDOW > 0 and context.job_queue:
+                # Bulk forwards and albums get one consolidated reply once they stop arriving
+                await forward_batcher.add(context, chat.id, message, info, get_appropriate_keyboard(chat.type))
+            elif info:
+                log_event(logger, logging.DEBUG, 'forward.resolved', type=info['type'], id=info['id'])
                 text = format_entity_response(info)
                 # Use appropriate keyboard based on chat type
                 await message.reply_text(text, parse_mode='HTML', reply_markup=get_appropriate_keyboard(chat.type))
@@ -1436,7 +1562,7 @@ async def handle_analytics_callback(update: Update, context: ContextTypes.DEFAUL
 
             # Get fresh statistics
             total_users = user_db.get_total_users()
-            total_groups = len(groups_db.get_all_groups())
+            total_groups = groups_db.get_total_groups()
             current_time = datetime.now().strftime('%H:%M:%S')
 
             analytics_keyboard = InlineKeyboardMarkup([
@@ -1485,7 +1611,7 @@ async def show_analytics_overview(query, context):
     # Get statistics
     total_users = user_db.get_total_users()
     group_stats = groups_db.get_group_stats()
-    bot_info = await context.bot.get_me()
+    bot_info = bot_identity.user
 
     from datetime import datetime
     current_time = datetime.now()
@@ -1493,7 +1619,7 @@ async def show_analytics_overview(query, context):
     overview_text = (
         f"📊 <b>Bot Overview Analytics</b>\n\n"
         f"🤖 <b>Bot Information:</b>\n"
-        f"• Name: {bot_info.first_name}\n"
+        f"• Name: {escape(bot_info.first_name)}\n"
         f"• Username: @{bot_info.username}\n"
         f"• ID: <code>{bot_info.id}</code>\n"
         f"• Can Join Groups: {'✅' if bot_info.can_join_groups else '❌'}\n\n"
@@ -1604,7 +1730,7 @@ async def show_analytics_groups(query, context):
     for i, (group_id, group_info) in enumerate(recent_groups[:3], 1):
         title = group_info.get('title', 'Unknown')[:20]
         interactions = group_info.get('interaction_count', 0)
-        groups_text += f"{i}. {title}... ({interactions:,} interactions)\n"
+        groups_text += f"{i}. {escape(title)}... ({interactions:,} interactions)\n"
 
     back_keyboard = InlineKeyboardMarkup([
         [InlineKeyboardButton("🔙 Back to Dashboard", callback_data="analytics_refresh", style="primary")]
@@ -1657,51 +1783,20 @@ async def show_analytics_interactions(query, context):
 async def export_users_csv(query, context):
     """Export users data to CSV"""
     try:
-        import csv
-        import io
-        from datetime import datetime
-
-        # Get all users
-        all_users = user_db.get_all_users()
-
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Write header
-        writer.writerow(['User ID', 'Username', 'First Name', 'Last Name', 'Join Date', 'Last Seen'])
-
-        # Write user data
-        for user_id, user_data in all_users.items():
-            writer.writerow([
-                user_id,
-                user_data.get('username', ''),
-                user_data.get('first_name', ''),
-                user_data.get('last_name', ''),
-                user_data.get('join_date', ''),
-                user_data.get('last_seen', '')
-            ])
-
-        csv_content = output.getvalue()
-        output.close()
-
-        # Create file
-        filename = f"users_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        export_file, filename, total = await run_export(ExportSpec('users'), user_db.users)
 
         # Send file
-        csv_file = io.BytesIO(csv_content.encode('utf-8'))
-        csv_file.name = filename
-
-        await context.bot.send_document(
-            chat_id=query.message.chat_id,
-            document=csv_file,
-            filename=filename,
-            caption=f"📄 <b>Users Export</b>\n\n"
-                   f"• Total Users: {len(all_users):,}\n"
-                   f"• Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                   f"• Format: CSV",
-            parse_mode='HTML'
-        )
+        with export_file:
+            await context.bot.send_document(
+                chat_id=query.message.chat_id,
+                document=export_file,
+                filename=filename,
+                caption=f"📄 <b>Users Export</b>\n\n"
+                       f"• Total Users: {total:,}\n"
+                       f"• Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                       f"• Format: {format_label(filename)}",
+                parse_mode='HTML'
+            )
 
         await query.answer("✅ Users CSV export sent!")
 
@@ -1712,58 +1807,22 @@ async def export_users_csv(query, context):
 async def export_groups_csv(query, context):
     """Export groups data to CSV"""
     try:
-        import csv
-        import io
-        from datetime import datetime
-
-        # Get all groups
-        all_groups = groups_db.get_all_groups()
-
-        # Create CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Write header
-        writer.writerow(['Group ID', 'Group Name', 'Type', 'Username', 'Privacy', 'Added Date', 'Last Interaction', 'Interaction Count', 'Status'])
-
-        # Write group data
-        for group_id, group_data in all_groups.items():
-            privacy = "Public" if group_data.get('username') else "Private"
-            status = "Active" if group_data.get('is_active', True) else "Inactive"
-
-            writer.writerow([
-                group_id,
-                group_data.get('title', ''),
-                group_data.get('type', ''),
-                group_data.get('username', ''),
-                privacy,
-                group_data.get('added_date', ''),
-                group_data.get('last_interaction', ''),
-                group_data.get('interaction_count', 0),
-                status
-            ])
-
-        csv_content = output.getvalue()
-        output.close()
-
-        # Create file
-        filename = f"groups_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        export_file, filename, _ = await run_export(ExportSpec('groups'), groups_db.groups)
+        group_stats = groups_db.get_group_stats()
 
         # Send file
-        csv_file = io.BytesIO(csv_content.encode('utf-8'))
-        csv_file.name = filename
-
-        await context.bot.send_document(
-            chat_id=query.message.chat_id,
-            document=csv_file,
-            filename=filename,
-            caption=f"📊 <b>Groups Export</b>\n\n"
-                   f"• Total Groups: {len(all_groups):,}\n"
-                   f"• Active Groups: {len([g for g in all_groups.values() if g.get('is_active', True)]):,}\n"
-                   f"• Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                   f"• Format: CSV",
-            parse_mode='HTML'
-        )
+        with export_file:
+            await context.bot.send_document(
+                chat_id=query.message.chat_id,
+                document=export_file,
+                filename=filename,
+                caption=f"📊 <b>Groups Export</b>\n\n"
+                       f"• Total Groups: {group_stats['tracked_groups']:,}\n"
+                       f"• Active Groups: {group_stats['total_groups']:,}\n"
+                       f"• Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                       f"• Format: {format_label(filename)}",
+                parse_mode='HTML'
+            )
 
         await query.answer("✅ Groups CSV export sent!")
 
@@ -1842,7 +1901,7 @@ async def groups_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 privacy = "🔓 Public" if username else "🔒 Private"
 
                 groups_text += (
-                    f"{i}. {type_emoji} <b>{title}</b>\n"
+                    f"{i}. {type_emoji} <b>{escape(title)}</b>\n"
                     f"   🆔 ID: <code>{group_id}</code>\n"
                     f"   {privacy}"
                 )
@@ -1957,7 +2016,7 @@ async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
         username = user.get('username', '')
         username_text = f"@{username}" if username else "No username"
         joined_date = user.get('joined_date', '')[:10] if user.get('joined_date') else 'Unknown'
-        stats_text += f"• {name} ({username_text}) - {joined_date}\n"
+        stats_text += f"• {escape(name)} ({username_text}) - {joined_date}\n"
 
     await update.message.reply_text(stats_text, parse_mode='HTML', reply_markup=MAIN_KEYBOARD)
     return SELECTING_ENTITY
@@ -2000,7 +2059,7 @@ async def users_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             else:
                 formatted_date = 'Unknown'
 
-            users_text += f"{i}. <b>{full_name}</b>\n"
+            users_text += f"{i}. <b>{escape(full_name)}</b>\n"
             users_text += f"   ID: <code>{user_id_text}</code>\n"
             users_text += f"   Username: {username_text}\n"
             users_text += f"   Joined: {formatted_date}\n\n"
@@ -2305,6 +2364,9 @@ async def send_notification(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_ids = user_db.get_all_user_ids()
     total_users = len(user_ids)
 
+    # Bulk sends use their own connection pool so interactive replies stay fast
+    broadcast_bot = context.bot_data.get('broadcast_bot', context.bot)
+
     sent_count = 0
     failed_count = 0
     dead_users = []  # Track blocked/deleted/deactivated accounts for cleanup
@@ -2336,7 +2398,7 @@ async def send_notification(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     caption_entities = file_info.get('caption_entities', [])
 
                     if file_info['type'] == 'photo':
-                        await context.bot.send_photo(
+                        await broadcast_bot.send_photo(
                             uid,
                             file_info['file_id'],
                             caption=caption,
@@ -2344,7 +2406,7 @@ async def send_notification(update: Update, context: ContextTypes.DEFAULT_TYPE):
                             reply_markup=keyboard
                         )
                     elif file_info['type'] == 'video':
-                        await context.bot.send_video(
+                        await broadcast_bot.send_video(
                             uid,
                             file_info['file_id'],
                             caption=caption,
@@ -2352,7 +2414,7 @@ async def send_notification(update: Update, context: ContextTypes.DEFAULT_TYPE):
                             reply_markup=keyboard
                         )
                     elif file_info['type'] == 'document':
-                        await context.bot.send_document(
+                        await broadcast_bot.send_document(
                             uid,
                             file_info['file_id'],
                             caption=caption,
@@ -2360,7 +2422,7 @@ async def send_notification(update: Update, context: ContextTypes.DEFAULT_TYPE):
                             reply_markup=keyboard
                         )
             else:
-                await context.bot.send_message(
+                await broadcast_bot.send_message(
                     uid,
                     text,
                     entities=entities,
@@ -2535,7 +2597,7 @@ async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "📚 <b>After adding:</b> Use /help_group in your group for user commands help.\n\n"
         "No need to send the group back to the bot - it's that simple! 🎉",
         parse_mode='HTML',
-        reply_markup=ADD_KEYBOARD
+        reply_markup=get_add_keyboard()
     )
     return SELECTING_ENTITY
 
@@ -2556,7 +2618,7 @@ async def ids_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     text = (
         f"✅ <b>Group Information</b>\n\n"
-        f"🔗 <b>Title:</b> {chat_title}\n"
+        f"🔗 <b>Title:</b> {escape(chat_title)}\n"
         f"🆔 <b>ID:</b> <code>{chat_id}</code>"
     )
     
@@ -2636,6 +2698,25 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         pass  # Silently ignore all errors in error handler
 
+async def load_databases(bot):
+    """Load the JSON stores in worker threads, then report the tracked groups"""
+    await asyncio.gather(user_db.wait_loaded(), groups_db.wait_loaded())
+    logger.info("User and group databases loaded")
+
+    await detect_existing_groups(bot)
+
+def databases_ready() -> bool:
+    return user_db.loaded and groups_db.loaded
+
+async def wait_for_databases(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Holds updates that arrive during the startup load until the stores are ready.
+    Awaits the load instead of touching the stores, whose lazy load would block
+    the event loop on the load lock.
+    """
+    if not databases_ready():
+        await asyncio.gather(user_db.wait_loaded(), groups_db.wait_loaded())
+
 async def detect_existing_groups(bot):
     """Detect and track groups where the bot is already added"""
     try:
@@ -2654,19 +2735,20 @@ async def detect_existing_groups(bot):
         # - Implement a periodic check mechanism
         # - Use the groups database to track known groups
 
-        existing_groups = groups_db.get_all_groups()
-        logger.info(f"Currently tracking {len(existing_groups)} groups in database")
+        group_stats = groups_db.get_group_stats()
+        total_groups = group_stats['tracked_groups']
+        logger.info(f"Currently tracking {total_groups} groups in database")
 
         # Send a summary to the first admin if available
-        if ADMIN_IDS and len(ADMIN_IDS) > 0 and existing_groups:
+        if ADMIN_IDS and len(ADMIN_IDS) > 0 and total_groups:
             try:
                 first_admin_id = int(ADMIN_IDS[0]) if ADMIN_IDS[0] and ADMIN_IDS[0].strip() else None
                 if first_admin_id:
                     summary_text = (
                         f"🤖 <b>Bot Startup Summary</b>\n\n"
                         f"📊 <b>Groups Tracking:</b>\n"
-                        f"• Total Groups: {len(existing_groups):,}\n"
-                        f"• Active Groups: {len([g for g in existing_groups.values() if g.get('is_active', True)]):,}\n\n"
+                        f"• Total Groups: {total_groups:,}\n"
+                        f"• Active Groups: {group_stats['total_groups']:,}\n\n"
                         f"💡 <b>Note:</b> The bot will automatically track new groups when:\n"
                         f"• Added to new groups\n"
                         f"• Commands are used in groups\n"
@@ -2687,6 +2769,71 @@ async def detect_existing_groups(bot):
     except Exception as e:
         logger.error(f"Error detecting existing groups: {e}")
 
+async def loglevel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show or switch the log level at runtime (admin only)"""
+    if str(update.effective_user.id) not in ADMIN_IDS:
+        await update.message.reply_text("❌ This command is only available to bot administrators.")
+        return
+
+    if context.args:
+        level = set_log_level(context.args[0])
+        if level is None:
+            await update.message.reply_text(
+                "❌ Unknown level. Use DEBUG, INFO, WARNING, ERROR or CRITICAL.\n"
+                "Usage: /loglevel [level] [sample rate 0-1]"
+            )
+            return
+        if len(context.args) > 1:
+            try:
+                set_sample_rate(float(context.args[1]))
+            except ValueError:
+                await update.message.reply_text("❌ Sample rate must be a number between 0 and 1.")
+                return
+        logger.warning(f"Log level switched to {level} by admin {update.effective_user.id}")
+
+    await update.message.reply_text(
+        f"🔧 Log level: <code>{get_log_level()}</code>",
+        parse_mode='HTML'
+    )
+
+EXPORT_USAGE = (
+    "Usage: <code>/export users|groups [csv|jsonl|parquet] [fields=a,b] [since=YYYY-MM-DD] "
+    "[until=YYYY-MM-DD] [active=DAYS] [min=N] [inactive]</code>\n\n"
+    f"<b>User fields:</b> {', '.join(EXPORT_KINDS['users'][0])}\n"
+    f"<b>Group fields:</b> {', '.join(EXPORT_KINDS['groups'][0])}\n\n"
+    "<i>since/until filter by join date, active by last activity, inactive includes groups the bot left.</i>"
+)
+
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Export users or groups with a chosen format, fields and filters (admin only)"""
+    if str(update.effective_user.id) not in ADMIN_IDS:
+        await update.message.reply_text("❌ This command is only available to bot administrators.")
+        return
+
+    try:
+        spec = parse_export_args(context.args)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {escape(str(e))}\n\n{EXPORT_USAGE}", parse_mode='HTML')
+        return
+
+    records = user_db.users if spec.kind == 'users' else groups_db.groups
+    try:
+        export_file, filename, total = await run_export(spec, records)
+        with export_file:
+            await update.message.reply_document(
+                document=export_file,
+                filename=filename,
+                caption=f"📄 <b>{spec.kind.capitalize()} Export</b>\n\n"
+                       f"• Rows: {total:,}\n"
+                       f"• Fields: {', '.join(field.name for field in spec.fields)}\n"
+                       f"• Filters: {escape(spec.describe())}\n"
+                       f"• Format: {format_label(filename)}",
+                parse_mode='HTML'
+            )
+    except Exception as e:
+        logger.error(f"Error exporting {spec.kind}: {e}")
+        await update.message.reply_text("❌ Error exporting data")
+
 async def mem_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Command for admins to get member info in groups"""
     # Check if command is used in a group
@@ -2762,25 +2909,18 @@ async def mem_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Format the response
             status = member_info.status
             
-            text = (
-                f"✅ <b>Member Information</b>\n\n"
-                f"👤 <b>Name:</b> {user.first_name}"
-            )
-            
-            if user.last_name:
-                text += f" {user.last_name}"
-                
-            text += f"\n🆔 <b>User ID:</b> <code>{user.id}</code>"
-            
-            if user.username:
-                text += f"\n📎 <b>Username:</b> @{user.username}"
-                
-            text += f"\n📊 <b>Status:</b> {status.capitalize()}"
-            
+            status_text = status.capitalize()
             if status == "administrator":
-                text += " (Admin)"
+                status_text += " (Admin)"
             elif status == "creator":
-                text += " (Owner)"
+                status_text += " (Owner)"
+
+            text = MEMBER_INFO.render(
+                name=full_name(user.first_name, user.last_name),
+                id=user.id,
+                username=user.username,
+                status=status_text
+            )
                 
             # Send the response
             await update.message.reply_text(text, parse_mode='HTML')
@@ -2801,37 +2941,26 @@ async def mem_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     return SELECTING_ENTITY
 
-def start_health_check_server():
-    """Start a lightweight HTTP server for Koyeb health checks"""
-    import os
-    from http.server import HTTPServer, BaseHTTPRequestHandler
-
-    class HealthCheckHandler(BaseHTTPRequestHandler):
-        def do_GET(self):
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'OK')
-
-        def log_message(self, format, *args):
-            pass  # Suppress health check logs
-
-    port = int(os.environ.get('PORT', 8000))
-    server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
-
-    import threading
-    thread = threading.Thread(target=server.serve_forever, daemon=True)
-    thread.start()
-    print(f"✅ Health check server running on port {port}")
-
-def main():
-    # Start health check server for Koyeb
-    start_health_check_server()
-
-    # Clean startup message
-    print("🤖 ID Finder Pro Bot is starting...")
-    
-    application = Application.builder().token(BOT_TOKEN).build()
+# Async HTTP server for health checks and webhook updates
+web_server = WebServer(port=PORT)
+
+def build_application() -> Application:
+    """Create the application and register all handlers"""
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .base_url(BOT_API_URL)
+        .request(InstrumentedRequest(
+            connection_pool_size=API_POOL_SIZE,
+            pool_timeout=API_POOL_TIMEOUT,
+            max_retries=API_MAX_RETRIES
+        ))
+        .get_updates_request(InstrumentedRequest(connection_pool_size=1, max_retries=0))
+        .concurrent_updates(KeyedUpdateProcessor(MAX_CONCURRENT_UPDATES))
+        .build()
+    )
+    # Notifications to all users go through a separate bot with its own connection pool
+    application.bot_data['broadcast_bot'] = build_broadcast_bot(BOT_TOKEN, BROADCAST_POOL_SIZE, API_MAX_RETRIES, BOT_API_URL)
     
     # Define separate command sets for private chats and groups
     private_commands = [
@@ -2839,6 +2968,7 @@ def main():
         BotCommand("id", "Get your own ID"),
         BotCommand("find", "Find user info by ID"),
         BotCommand("username", "Get ID by username"),
+        BotCommand("bulk", "Get IDs of many usernames/links as CSV"),
         BotCommand("admin", "Show groups/channels you admin"),
         BotCommand("add", "Add bot to your groups"),
         BotCommand("help", "Show interactive help system"),
@@ -2866,6 +2996,7 @@ def main():
             CommandHandler('stats', stats_command),
             CommandHandler('admin', admin_command),
             CommandHandler('username', username_command),
+            CommandHandler('bulk', bulk_command),
             CommandHandler('donate', donate_command),
             CommandHandler('add', add_command),
             CommandHandler('mem', mem_command),
@@ -2914,6 +3045,10 @@ def main():
             WAITING_FOR_MEMBER_USERNAME: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, handle_username_input),
             ],
+            WAITING_FOR_BULK: [
+                MessageHandler(filters.Document.ALL, handle_bulk_input),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_bulk_input),
+            ],
             NOTIFY_TEXT: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, handle_notify_text),
                 MessageHandler(filters.PHOTO | filters.VIDEO | filters.Document.ALL, handle_notify_text),
@@ -2936,6 +3071,7 @@ def main():
             CommandHandler('stats', stats_command),
             CommandHandler('admin', admin_command),
             CommandHandler('username', username_command),
+            CommandHandler('bulk', bulk_command),
             CommandHandler('donate', donate_command),
             CommandHandler('add', add_command),
             CommandHandler('mem', mem_command),
@@ -2954,6 +3090,8 @@ def main():
     application.add_handler(CommandHandler('stats', stats))
     application.add_handler(CommandHandler('users', users_command))
     application.add_handler(CommandHandler('broadcast', broadcast))
+    application.add_handler(CommandHandler('loglevel', loglevel_command))
+    application.add_handler(CommandHandler('export', export_command))
     application.add_handler(InlineQueryHandler(inline_query_handler))
 
     # Add group command handlers
@@ -2967,21 +3105,61 @@ def main():
     application.add_handler(CommandHandler('warn', warn_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('warnings', warnings_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('resetwarn', resetwarn_command, filters=filters.ChatType.GROUPS))
+    application.add_handler(CommandHandler('warnconfig', warnconfig_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('mute', mute_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('unmute', unmute_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('kick', kick_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('ban', ban_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('unban', unban_command, filters=filters.ChatType.GROUPS))
+    application.add_handler(CommandHandler('massban', massban_command, filters=filters.ChatType.GROUPS))
+    application.add_handler(CommandHandler('masskick', masskick_command, filters=filters.ChatType.GROUPS))
+    application.add_handler(CommandHandler('massmute', massmute_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('pin', pin_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('groupinfo', groupinfo_command, filters=filters.ChatType.GROUPS))
     application.add_handler(CommandHandler('listadmins', listadmins_command, filters=filters.ChatType.GROUPS))
     
+    # Updates arriving during the startup load wait for it before any handler reads the stores
+    application.add_handler(TypeHandler(Update, wait_for_databases), group=-50)
+
+    # Anti-flood runs ahead of the regular handlers without blocking them
+    application.add_handler(MessageHandler(filters.ChatType.GROUPS & filters.StatusUpdate.NEW_CHAT_MEMBERS, antiflood_join_handler, block=False), group=-1)
+    application.add_handler(MessageHandler(filters.ChatType.GROUPS & ~filters.StatusUpdate.ALL, antiflood_message_handler, block=False), group=-1)
+
     # Add payment handlers
     application.add_handler(PreCheckoutQueryHandler(handle_pre_checkout_query))
     application.add_handler(MessageHandler(filters.SUCCESSFUL_PAYMENT, handle_successful_payment))
+
+    # Opt-in: record anonymized updates for offline replay (loadtest/replay.py)
+    recorder = None
+    if RECORD_UPDATES_DIR:
+        recorder = UpdateRecorder(
+            RECORD_UPDATES_DIR,
+            max_bytes=int(RECORD_MAX_MB * 1024 * 1024),
+            max_files=RECORD_MAX_FILES,
+            salt=RECORD_SALT.encode('utf-8') or None
+        )
+        application.add_handler(TypeHandler(Update, recorder.handle_update), group=-100)
     
     # Set commands using the post_init method
     async def post_init(app: Application) -> None:
+        # Health checks (and webhook updates) share one async HTTP server,
+        # started first so the platform sees the process as alive right away
+        web_server.ready_check = databases_ready
+        await web_server.start()
+
+        # Moderation data (legacy migration, mute index) loads here rather than at import
+        group_db.load()
+
+        # Stores load in the background; updates arriving early await the load (wait_for_databases).
+        # The application is not running yet, so this is a plain asyncio task.
+        app.bot_data['load_databases_task'] = asyncio.create_task(load_databases(app.bot))
+
+        await app.bot_data['broadcast_bot'].initialize()
+
+        # initialize() already fetched getMe; reuse it instead of calling get_me() per request
+        bot_identity.set(app.bot.bot)
+        bot_identity.schedule_refresh(app.job_queue)
+
         # Set commands for private chats
         await app.bot.set_my_commands(
             private_commands,
@@ -2996,11 +3174,22 @@ def main():
 
         print("✅ Bot commands set successfully!")
 
-        # Detect and track existing groups
-        await detect_existing_groups(app.bot)
+        # Process what arrived while offline, payments and membership changes first
+        if CATCHUP_ENABLED:
+            await catch_up(app, CATCHUP_MAX_UPDATES, CATCHUP_STALE_SECONDS)
+
+        # Expire mutes that lapsed while offline and schedule the next expiry
+        schedule_mute_expiry(app.job_queue)
+
+    async def post_shutdown(app: Application) -> None:
+        if recorder:
+            recorder.close()
+        await app.bot_data['broadcast_bot'].shutdown()
+        await web_server.stop()
 
-    # Set the post_init function
+    # Set the lifecycle hooks
     application.post_init = post_init
+    application.post_shutdown = post_shutdown
 
     # Add global error handler
     application.add_error_handler(error_handler)
@@ -3008,11 +3197,68 @@ def main():
     # Add chat member handler to track group additions/removals
     application.add_handler(ChatMemberHandler(handle_my_chat_member, ChatMemberHandler.MY_CHAT_MEMBER))
 
+    # Handler latency, API calls and store sizes are exported on /metrics
+    metrics.instrument_handlers(application)
+    metrics.store_size.set_function(lambda: user_db.get_total_users() if user_db.loaded else 0, store='users')
+    metrics.store_size.set_function(lambda: groups_db.get_total_groups() if groups_db.loaded else 0, store='groups')
+    metrics.store_size.set_function(lambda: len(group_db.data), store='group_data_cached')
+    metrics.store_size.set_function(group_db.active_mute_count, store='active_mutes')
+    web_server.add_route('GET', '/metrics', metrics.metrics_route)
+
+    return application
+
+async def run_webhook(application: Application):
+    """Receive updates pushed by Telegram on the web server instead of polling"""
+    secret_token = WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    web_server.add_route('POST', WEBHOOK_PATH, webhook_route(application, secret_token))
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass  # Not supported on Windows, Ctrl+C still raises KeyboardInterrupt
+
+    await application.initialize()
+    try:
+        if application.post_init:
+            await application.post_init(application)
+
+        await application.bot.set_webhook(
+            url=WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=not CATCHUP_ENABLED
+        )
+        await application.start()
+
+        print("🚀 Bot is running in webhook mode! Press Ctrl+C to stop.")
+        await stop_event.wait()
+    finally:
+        if application.running:
+            await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+def main():
+    # Clean startup message
+    print("🤖 ID Finder Pro Bot is starting...")
+
+    application = build_application()
+
+    if WEBHOOK_URL:
+        asyncio.run(run_webhook(application))
+        return
+
     # Print ready message
     print("🚀 Bot is running! Press Ctrl+C to stop.")
-    
+
     # Start the bot
-    application.run_polling(drop_pending_updates=True)
+    application.run_polling(drop_pending_updates=not CATCHUP_ENABLED)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Bot Identity for ID Finder Pro Bot
+The bot's own user (username, ID, capabilities), cached for the process.
+
+Application.initialize() already calls getMe once, so the identity is seeded
+from that result without another round trip and refreshed by a rare
+background job; handlers never call get_me() themselves.
+"""
+
+import time
+from typing import Optional
+import logging
+
+from telegram import User
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes
+
+logger = logging.getLogger(__name__)
+
+REFRESH_JOB = 'bot_identity_refresh'
+REFRESH_INTERVAL = 6 * 3600  # The username only changes through BotFather
+
+# Admin rights requested by the "add bot" deep links
+GROUP_ADMIN_RIGHTS = 'delete_messages+restrict_members'
+CHANNEL_ADMIN_RIGHTS = 'post_messages+edit_messages+delete_messages'
+
+class BotIdentity:
+    """Last known getMe result"""
+
+    def __init__(self):
+        self._user: Optional[User] = None
+        self.updated_at = 0.0
+
+    def set(self, user: User):
+        if self._user is not None and user.username != self._user.username:
+            logger.info(f"Bot username changed from @{self._user.username} to @{user.username}")
+        self._user = user
+        self.updated_at = time.time()
+
+    @property
+    def user(self) -> User:
+        if self._user is None:
+            raise RuntimeError("Bot identity is not known yet, call set() from post_init")
+        return self._user
+
+    @property
+    def username(self) -> str:
+        return self.user.username
+
+    @property
+    def id(self) -> int:
+        return self.user.id
+
+    def add_to_group_link(self) -> str:
+        return f"https://t.me/{self.username}?startgroup&admin={GROUP_ADMIN_RIGHTS}"
+
+    def add_to_channel_link(self) -> str:
+        return f"https://t.me/{self.username}?startchannel&admin={CHANNEL_ADMIN_RIGHTS}"
+
+    async def refresh(self, bot):
+        """Fetch getMe again, keeping the previous identity if the call fails"""
+        try:
+            self.set(await bot.get_me())
+        except TelegramError as e:
+            logger.warning(f"Error refreshing bot identity, keeping @{self.username}: {e}")
+
+    async def refresh_job(self, context: ContextTypes.DEFAULT_TYPE):
+        await self.refresh(context.bot)
+
+    def schedule_refresh(self, job_queue):
+        if job_queue is None:
+            return
+        job_queue.run_repeating(self.refresh_job, interval=REFRESH_INTERVAL, first=REFRESH_INTERVAL,
+                                name=REFRESH_JOB)
+
+# Global identity instance
+bot_identity = BotIdentity()
@@ -0,0 +1,100 @@
+"""
+Bulk ID Lookup for ID Finder Pro Bot
+Parses pasted lists or uploaded text files of usernames, t.me links and IDs,
+resolves them through the entity cache and renders the results as CSV.
+"""
+
+import csv
+import io
+import re
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ITEMS = 500  # Identifiers resolved per request, the rest are reported as skipped
+MAX_FILE_BYTES = 1024 * 1024
+
+USERNAME_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9_]{3,31}$')
+LINK_RE = re.compile(r'^(?:https?://)?(?:www\.)?(?:t\.me|telegram\.me|telegram\.dog)/(.+)$', re.IGNORECASE)
+ID_RE = re.compile(r'^-?\d{1,16}$')
+SEPARATORS_RE = re.compile(r'[\s,;]+')
+
+CSV_HEADER = ['Input', 'ID', 'Type', 'Name', 'Username', 'Status']
+
+Identifier = Union[int, str]  # Chat ID or '@username'
+
+def normalize_identifier(token: str) -> Optional[Identifier]:
+    """'@name', 'name', t.me links and numeric IDs -> ID or '@name'; None if unusable"""
+    token = token.strip().strip('<>()[]"\'')
+    if ID_RE.match(token):
+        return int(token)
+
+    match = LINK_RE.match(token)
+    if match:
+        parts = match.group(1).split('?')[0].strip('/').split('/')
+        if parts[0] == 'c' and len(parts) > 1 and parts[1].isdigit():
+            # Private supergroup/channel message link: t.me/c/<internal id>/<message>
+            return int(f"-100{parts[1]}")
+        if parts[0].lower() == 'joinchat':
+            return None  # Invite links carry no resolvable identifier
+        if parts[0] == 's' and len(parts) > 1:
+            parts = parts[1:]
+        token = parts[0]  # +hash invite links fail the username check below
+
+    if token.startswith('@'):
+        token = token[1:]
+    if USERNAME_RE.match(token):
+        return f"@{token}"
+    return None
+
+def parse_identifiers(text: str, max_items: int = MAX_ITEMS) -> Tuple[List[Tuple[str, Identifier]], List[str], int]:
+    """
+    Split pasted text into unique identifiers, keeping the first spelling of each.
+    Returns ([(input, identifier)], invalid inputs, number skipped over max_items).
+    """
+    identifiers: List[Tuple[str, Identifier]] = []
+    invalid: List[str] = []
+    seen = set()
+    skipped = 0
+    for token in SEPARATORS_RE.split(text):
+        if not token:
+            continue
+        identifier = normalize_identifier(token)
+        if identifier is None:
+            invalid.append(token)
+            continue
+        dedup_key = identifier.lower() if isinstance(identifier, str) else identifier
+        if dedup_key in seen:
+            continue
+        seen.add(dedup_key)
+        if len(identifiers) >= max_items:
+            skipped += 1
+            continue
+        identifiers.append((token, identifier))
+    return identifiers, invalid, skipped
+
+def decode_upload(data: bytes) -> str:
+    """Text of an uploaded list; tolerant of BOMs and stray bytes"""
+    return data.decode('utf-8-sig', errors='replace')
+
+def build_csv(identifiers: List[Tuple[str, Identifier]], results: Dict[Identifier, Optional[Dict]],
+              invalid: List[str]) -> bytes:
+    """One row per input, in input order, then the inputs that could not be parsed"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+
+    for original, identifier in identifiers:
+        info = results.get(identifier)
+        if info is None:
+            writer.writerow([original, '', '', '', '', 'not found'])
+            continue
+        name = info.get('title') or f"{info.get('first_name') or ''} {info.get('last_name') or ''}".strip()
+        writer.writerow([original, info['id'], info.get('type') or '', name,
+                         f"@{info['username']}" if info.get('username') else '', 'ok'])
+
+    for original in invalid:
+        writer.writerow([original, '', '', '', '', 'invalid'])
+
+    return output.getvalue().encode('utf-8')
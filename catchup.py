@@ -0,0 +1,89 @@
+"""
+Startup Catch-Up for ID Finder Pro Bot
+Drains updates that arrived while the bot was offline through a prioritized, bounded queue.
+"""
+
+import heapq
+import time
+from typing import List, Optional, Tuple
+import logging
+
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+# Lower value = processed earlier
+PRIORITY_CRITICAL = 0  # Payments and membership changes that keep the databases correct
+PRIORITY_NORMAL = 1
+DROP = None
+
+FETCH_LIMIT = 100  # getUpdates maximum per call
+
+def classify_update(update: Update, stale_before: float) -> Optional[int]:
+    """Catch-up priority for an update, or DROP if it is not worth processing"""
+    if update.my_chat_member or update.chat_member or update.pre_checkout_query:
+        return PRIORITY_CRITICAL
+
+    # Inline queries expire within seconds, anything left in the backlog is stale
+    if update.inline_query or update.chosen_inline_result:
+        return DROP
+
+    message = update.message
+    if message:
+        if message.successful_payment or message.refunded_payment:
+            return PRIORITY_CRITICAL
+        if message.forward_origin and message.date.timestamp() < stale_before:
+            return DROP
+
+    return PRIORITY_NORMAL
+
+async def catch_up(application: Application, max_updates: int = 1000, stale_after: float = 600) -> int:
+    """
+    Fetch pending updates and queue them on the application by priority.
+    At most `max_updates` are taken; the rest stay on Telegram's side and are
+    delivered by polling/webhook as usual. Returns the number of updates queued.
+    """
+    bot = application.bot
+    stale_before = time.time() - stale_after
+    queue: List[Tuple[int, int, Update]] = []
+    dropped = 0
+    offset = 0
+
+    try:
+        # getUpdates is refused while a webhook is set; pending updates are kept
+        await bot.delete_webhook(drop_pending_updates=False)
+
+        while len(queue) < max_updates:
+            updates = await bot.get_updates(
+                offset=offset,
+                limit=min(FETCH_LIMIT, max_updates - len(queue)),
+                timeout=0
+            )
+            if not updates:
+                break
+
+            for update in updates:
+                priority = classify_update(update, stale_before)
+                if priority is DROP:
+                    dropped += 1
+                else:
+                    heapq.heappush(queue, (priority, update.update_id, update))
+            offset = updates[-1].update_id + 1
+
+        if offset:
+            # Confirm everything taken so far without consuming the next update
+            await bot.get_updates(offset=offset, limit=1, timeout=0)
+    except TelegramError as e:
+        # Batches fetched so far may already be confirmed, so still queue them
+        logger.error(f"Catch-up stopped early: {e}")
+
+    queued = len(queue)
+    while queue:
+        _, _, update = heapq.heappop(queue)
+        await application.update_queue.put(update)
+
+    if queued or dropped:
+        logger.info(f"Catch-up: queued {queued} pending updates, dropped {dropped} stale ones")
+    return queued
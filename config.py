@@ -5,4 +5,51 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 ADMIN_IDS = [id.strip() for id in os.getenv('ADMIN_IDS', '').split(',') if id.strip()]  # Comma-separated list of admin user IDs
-TON_WALLET = os.getenv('TON_WALLET', '')  # TON wallet address for donations 
\ No newline at end of file
+TON_WALLET = os.getenv('TON_WALLET', '')  # TON wallet address for donations 
+
+# Anti-flood / raid detection
+ANTIFLOOD_ENABLED = os.getenv('ANTIFLOOD_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+FLOOD_MAX_MESSAGES = int(os.getenv('FLOOD_MAX_MESSAGES', '8'))  # Messages per user allowed within the window
+FLOOD_WINDOW_SECONDS = float(os.getenv('FLOOD_WINDOW_SECONDS', '5'))
+FLOOD_MUTE_DURATION = os.getenv('FLOOD_MUTE_DURATION', '10m')
+RAID_MAX_JOINS = int(os.getenv('RAID_MAX_JOINS', '10'))  # Joins per group allowed within the window
+RAID_WINDOW_SECONDS = float(os.getenv('RAID_WINDOW_SECONDS', '30'))
+RAID_MODE_SECONDS = float(os.getenv('RAID_MODE_SECONDS', '300'))  # How long new joiners are muted after a raid
+
+# Webhook mode (long polling is used when WEBHOOK_URL is not set)
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # Public base URL, e.g. https://bot.example.com
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')  # Random token generated at startup when empty
+PORT = int(os.getenv('PORT', '8000'))  # Health checks and webhook updates share this port
+BOT_API_URL = os.getenv('BOT_API_URL', 'https://api.telegram.org/bot')  # Point at a local Bot API server if you run one
+
+# Update processing
+MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', '16'))  # Updates of one user always run in order
+
+# Startup catch-up (pending updates are dropped on restart when disabled)
+CATCHUP_ENABLED = os.getenv('CATCHUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CATCHUP_MAX_UPDATES = int(os.getenv('CATCHUP_MAX_UPDATES', '1000'))  # Backlog processed by priority before normal delivery resumes
+CATCHUP_STALE_SECONDS = float(os.getenv('CATCHUP_STALE_SECONDS', '600'))  # Forwards older than this are discarded
+
+# Logging (the level can also be switched at runtime with /loglevel)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'CRITICAL')  # Only critical crashes by default
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))  # Fraction of debug/info records kept
+
+# Bot API connection pools (broadcasts get their own pool so replies never queue behind them)
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', '128'))
+API_POOL_TIMEOUT = float(os.getenv('API_POOL_TIMEOUT', '3'))
+BROADCAST_POOL_SIZE = int(os.getenv('BROADCAST_POOL_SIZE', '32'))
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', '2'))  # Retries of transient network errors, with jitter
+
+# Update recording for offline replay/profiling (off unless a directory is set)
+RECORD_UPDATES_DIR = os.getenv('RECORD_UPDATES_DIR', '')
+RECORD_MAX_MB = float(os.getenv('RECORD_MAX_MB', '50'))  # Uncompressed size per file before rotating
+RECORD_MAX_FILES = int(os.getenv('RECORD_MAX_FILES', '10'))
+RECORD_SALT = os.getenv('RECORD_SALT', '')  # Keeps pseudonyms stable across restarts; random when empty
+
+# Forwards arriving together (bulk forwards, albums) get one consolidated reply
+FORWARD_BATCH_WINDOW = float(os.getenv('FORWARD_BATCH_WINDOW', '1.0'))  # Seconds of quiet that close a batch, 0 disables batching
+FORWARD_BATCH_MAX_WAIT = float(os.getenv('FORWARD_BATCH_MAX_WAIT', '5'))
+
+# Admin dashboard exports
+EXPORT_GZIP_ROWS = int(os.getenv('EXPORT_GZIP_ROWS', '100000'))  # Exports with at least this many rows are gzip-compressed
@@ -0,0 +1,142 @@
+"""
+Entity Cache for ID Finder Pro Bot
+Recently seen users and chats (name, username, title), so shared entities
+can be described without a get_chat round trip.
+
+Entries come from what the bot already observes: users_shared/chat_shared
+payloads (the request buttons ask Telegram to include names and usernames)
+and get_chat results. get_chat is only called on a miss.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+RESOLVE_CONCURRENCY = 5  # Parallel get_chat calls per resolve_many()
+
+# Fields kept per entity; absent values are None
+FIELDS = ('id', 'type', 'title', 'first_name', 'last_name', 'username', 'is_bot')
+
+def entity_from_chat(chat) -> Dict:
+    """Cache entry from a get_chat result (ChatFullInfo)"""
+    return {
+        'id': chat.id,
+        'type': chat.type,
+        'title': getattr(chat, 'title', None),
+        'first_name': getattr(chat, 'first_name', None),
+        'last_name': getattr(chat, 'last_name', None),
+        'username': getattr(chat, 'username', None),
+        'is_bot': None,  # Not part of ChatFullInfo
+    }
+
+def entity_from_shared_user(shared_user, is_bot: Optional[bool]) -> Optional[Dict]:
+    """Cache entry from a users_shared item, or None if the payload carries no name"""
+    if not getattr(shared_user, 'first_name', None):
+        return None
+    return {
+        'id': shared_user.user_id,
+        'type': 'private',
+        'title': None,
+        'first_name': shared_user.first_name,
+        'last_name': shared_user.last_name,
+        'username': shared_user.username,
+        'is_bot': is_bot,
+    }
+
+def entity_from_shared_chat(chat_shared, chat_type: Optional[str]) -> Optional[Dict]:
+    """Cache entry from a chat_shared payload, or None if the payload carries no title"""
+    if not getattr(chat_shared, 'title', None):
+        return None
+    return {
+        'id': chat_shared.chat_id,
+        'type': chat_type,
+        'title': chat_shared.title,
+        'first_name': None,
+        'last_name': None,
+        'username': chat_shared.username,
+        'is_bot': None,
+    }
+
+class EntityCache:
+    """
+    LRU of entity info by ID; entries expire after `ttl` seconds.
+    Lookups take an ID or an '@username' (case-insensitive).
+    """
+
+    def __init__(self, max_entries: int = 50000, ttl: float = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (stored_at, info)
+        self._ids_by_username: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _entity_id(self, key: Union[int, str]) -> Optional[int]:
+        if isinstance(key, str) and key.startswith('@'):
+            return self._ids_by_username.get(key[1:].lower())
+        return key
+
+    def get(self, key: Union[int, str]) -> Optional[Dict]:
+        entity_id = self._entity_id(key)
+        entry = self._entries.get(entity_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(entity_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, info: Dict):
+        """Store an entry; fields already known and missing from `info` are kept"""
+        entity_id = info['id']
+        previous = self._entries.pop(entity_id, None)
+        if previous is not None:
+            old_info = previous[1]
+            info = {key: info.get(key) if info.get(key) is not None else old_info.get(key) for key in FIELDS}
+            if old_info.get('username') and old_info['username'] != info['username']:
+                self._ids_by_username.pop(old_info['username'].lower(), None)
+        self._entries[entity_id] = (time.monotonic(), info)
+        if info.get('username'):
+            self._ids_by_username[info['username'].lower()] = entity_id
+        if len(self._entries) > self.max_entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            if evicted.get('username'):
+                self._ids_by_username.pop(evicted['username'].lower(), None)
+
+    async def resolve(self, bot, key: Union[int, str]) -> Dict:
+        """Cached info for an ID or '@username', calling get_chat only on a miss (errors propagate)"""
+        info = self.get(key)
+        if info is None:
+            info = entity_from_chat(await bot.get_chat(key))
+            self.put(info)
+        return info
+
+    async def resolve_many(self, bot, entity_ids: Iterable[Union[int, str]],
+                           concurrency: int = RESOLVE_CONCURRENCY) -> Dict[Union[int, str], Optional[Dict]]:
+        """
+        Resolve several IDs or '@usernames' at once; misses are fetched concurrently,
+        at most `concurrency` at a time. Keys that cannot be resolved map to None.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def resolve_one(entity_id):
+            async with semaphore:
+                try:
+                    return await self.resolve(bot, entity_id)
+                except Exception as e:
+                    logger.error(f"Error resolving entity {entity_id}: {e}")
+                    return None
+
+        entity_ids = list(dict.fromkeys(entity_ids))
+        results = await asyncio.gather(*[resolve_one(entity_id) for entity_id in entity_ids])
+        return dict(zip(entity_ids, results))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Global cache instance
+entity_cache = EntityCache()
@@ -0,0 +1,318 @@
+"""
+Data Exports for ID Finder Pro Bot
+Streams the users and groups databases into CSV, JSONL or Parquet files for the
+admin dashboard and /export.
+
+Rows are produced by generators and written straight into a spooled temporary
+file (in memory up to SPOOL_MAX_BYTES, on disk beyond that), in a worker thread.
+No full copy of a database or of the output text is built, and the event loop
+keeps serving updates meanwhile. Large CSV/JSONL exports are gzip-compressed;
+Parquet compresses internally and needs the optional pyarrow package.
+
+Exports can be narrowed to some fields and filtered by date and activity:
+
+    /export users jsonl fields=user_id,username since=2026-01-01 active=30
+"""
+
+import asyncio
+import csv
+import gzip
+import importlib.util
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+
+from config import EXPORT_GZIP_ROWS
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAX_BYTES = 8 * 1024 * 1024  # Export files larger than this spill to disk
+PARQUET_BATCH_ROWS = 50000  # Rows buffered per Parquet row group
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+class ExportField:
+    """One exportable column: CSV header, value getter and Parquet type"""
+    __slots__ = ('name', 'header', 'getter', 'kind')
+
+    def __init__(self, name: str, header: str, getter: Callable[[str, Dict], object], kind: str = 'string'):
+        self.name = name
+        self.header = header
+        self.getter = getter  # (record key, record) -> value
+        self.kind = kind  # 'int', 'string' or 'timestamp' (ISO text in the stores)
+
+def _field(key: str, default=None) -> Callable[[str, Dict], object]:
+    return lambda record_id, record: record.get(key, default)
+
+USER_FIELDS = {field.name: field for field in [
+    ExportField('user_id', 'User ID', lambda user_id, user: int(user_id), 'int'),
+    ExportField('username', 'Username', _field('username')),
+    ExportField('first_name', 'First Name', _field('first_name')),
+    ExportField('last_name', 'Last Name', _field('last_name')),
+    ExportField('joined_date', 'Join Date', _field('joined_date'), 'timestamp'),
+    ExportField('last_seen', 'Last Seen', _field('last_seen'), 'timestamp'),
+    ExportField('interaction_count', 'Interaction Count', _field('interaction_count', 0), 'int'),
+]}
+
+GROUP_FIELDS = {field.name: field for field in [
+    ExportField('group_id', 'Group ID', lambda group_id, group: int(group_id), 'int'),
+    ExportField('title', 'Group Name', _field('title')),
+    ExportField('type', 'Type', _field('type')),
+    ExportField('username', 'Username', _field('username')),
+    ExportField('privacy', 'Privacy', lambda group_id, group: "Public" if group.get('username') else "Private"),
+    ExportField('added_date', 'Added Date', _field('added_date'), 'timestamp'),
+    ExportField('last_interaction', 'Last Interaction', _field('last_interaction'), 'timestamp'),
+    ExportField('interaction_count', 'Interaction Count', _field('interaction_count', 0), 'int'),
+    ExportField('status', 'Status', lambda group_id, group: "Active" if group.get('is_active', True) else "Inactive"),
+    ExportField('invite_link', 'Invite Link', _field('invite_link')),
+]}
+
+# kind -> (fields, default fields, date filtered by since/until, date filtered by active)
+EXPORT_KINDS = {
+    'users': (USER_FIELDS, [name for name in USER_FIELDS if name != 'interaction_count'],
+              'joined_date', 'last_seen'),
+    'groups': (GROUP_FIELDS, [name for name in GROUP_FIELDS if name != 'invite_link'],
+               'added_date', 'last_interaction'),
+}
+
+class ExportSpec:
+    """What to export: kind, format, fields and filters"""
+
+    def __init__(self, kind: str, fmt: str = 'csv', fields: Optional[List[str]] = None,
+                 since: Optional[str] = None, until: Optional[str] = None, active_since: Optional[str] = None,
+                 min_interactions: int = 0, include_inactive: bool = False):
+        self.kind = kind
+        self.fmt = fmt
+        all_fields, default_fields, self.date_key, self.activity_key = EXPORT_KINDS[kind]
+        self.fields = [all_fields[name] for name in (fields or default_fields)]
+        # ISO date/time prefixes; the stores hold ISO text, so plain string comparison works
+        self.since = since
+        self.until = until
+        self.active_since = active_since
+        self.min_interactions = min_interactions
+        self.include_inactive = include_inactive  # Groups the bot was removed from
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.since or self.until or self.active_since or self.min_interactions or self.include_inactive)
+
+    def matches(self, record: Dict) -> bool:
+        if not self.include_inactive and not record.get('is_active', True):
+            return False
+        if self.since or self.until:
+            date = record.get(self.date_key) or ''
+            # Records without a date cannot be placed in the range, whichever bound is set
+            if not date or (self.since and date < self.since):
+                return False
+            # Inclusive: until=2026-01-31 keeps everything on that day
+            if self.until and date[:len(self.until)] > self.until:
+                return False
+        if self.active_since and (record.get(self.activity_key) or '') < self.active_since:
+            return False
+        if self.min_interactions and record.get('interaction_count', 0) < self.min_interactions:
+            return False
+        return True
+
+    def describe(self) -> str:
+        parts = []
+        if self.since:
+            parts.append(f"since {self.since}")
+        if self.until:
+            parts.append(f"until {self.until}")
+        if self.active_since:
+            parts.append(f"active since {self.active_since[:10]}")
+        if self.min_interactions:
+            parts.append(f"≥{self.min_interactions} interactions")
+        if self.include_inactive:
+            parts.append("including inactive")
+        return ", ".join(parts) or "none"
+
+def _parse_date(value: str, option: str) -> str:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise ValueError(f"{option} must be a date like 2026-01-31") from None
+
+def parse_export_args(args: List[str]) -> ExportSpec:
+    """
+    ExportSpec from /export arguments:
+    users|groups [csv|jsonl|parquet] [fields=a,b] [since=DATE] [until=DATE] [active=DAYS] [min=N] [inactive]
+    Raises ValueError with a message for the admin.
+    """
+    if not args or args[0].lower() not in EXPORT_KINDS:
+        raise ValueError("Choose what to export: users or groups")
+    kind = args[0].lower()
+    all_fields = EXPORT_KINDS[kind][0]
+    options = {'fmt': 'csv'}
+
+    for arg in args[1:]:
+        key, _, value = arg.partition('=')
+        key = key.lower()
+        if not value:
+            if key in FORMATS:
+                options['fmt'] = key
+            elif key == 'inactive' and kind == 'groups':
+                options['include_inactive'] = True
+            else:
+                raise ValueError(f"Unknown option: {arg}")
+        elif key == 'fields':
+            fields = [name.strip().lower() for name in value.split(',') if name.strip()]
+            unknown = [name for name in fields if name not in all_fields]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(all_fields)}")
+            options['fields'] = list(dict.fromkeys(fields))
+        elif key in ('since', 'until'):
+            options[key] = _parse_date(value, key)
+        elif key == 'active':
+            if not value.isdigit():
+                raise ValueError("active must be a number of days")
+            options['active_since'] = (datetime.now() - timedelta(days=int(value))).isoformat()
+        elif key == 'min':
+            if not value.isdigit():
+                raise ValueError("min must be a number of interactions")
+            options['min_interactions'] = int(value)
+        else:
+            raise ValueError(f"Unknown option: {arg}")
+
+    if options['fmt'] == 'parquet' and not parquet_available():
+        raise ValueError("Parquet export needs the pyarrow package (pip install pyarrow)")
+    return ExportSpec(kind, **options)
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+def export_rows(spec: ExportSpec, records: Dict, record_ids: List[str]) -> Iterator[List]:
+    """
+    Rows of the selected fields for matching records, in record_ids order.
+    Records deleted since the IDs were taken are skipped.
+    """
+    getters = [field.getter for field in spec.fields]
+    for record_id in record_ids:
+        record = records.get(record_id)
+        if record is None or not spec.matches(record):
+            continue
+        yield [getter(record_id, record) for getter in getters]
+
+def _open_text(spool, compress: bool) -> Tuple[io.TextIOWrapper, object]:
+    binary = gzip.GzipFile(fileobj=spool, mode='wb', compresslevel=6) if compress else spool
+    return io.TextIOWrapper(binary, encoding='utf-8', newline=''), binary
+
+def _close_text(text: io.TextIOWrapper, binary, compress: bool):
+    text.flush()
+    text.detach()  # Leaves the spool open
+    if compress:
+        binary.close()  # Writes the gzip trailer; does not close the spool
+
+def write_csv(spool, fields: List[ExportField], rows: Iterator[List], compress: bool) -> int:
+    text, binary = _open_text(spool, compress)
+    writer = csv.writer(text)
+    writer.writerow([field.header for field in fields])
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    _close_text(text, binary, compress)
+    return count
+
+def write_jsonl(spool, fields: List[ExportField], rows: Iterator[List], compress: bool) -> int:
+    text, binary = _open_text(spool, compress)
+    names = [field.name for field in fields]
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    count = 0
+    for row in rows:
+        text.write(dumps(dict(zip(names, row))))
+        text.write('\n')
+        count += 1
+    _close_text(text, binary, compress)
+    return count
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    """Stored ISO text as a naive local datetime for Parquet; None when empty or unparseable"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        # The stores write naive local times; keep offset-aware values on the same clock
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def write_parquet(spool, fields: List[ExportField], rows: Iterator[List], compress: bool) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {'int': pa.int64(), 'string': pa.string(), 'timestamp': pa.timestamp('us')}
+    schema = pa.schema([(field.name, types[field.kind]) for field in fields])
+
+    def to_batch(buffer: List[List]) -> pa.RecordBatch:
+        columns = []
+        for index, field in enumerate(fields):
+            values = [row[index] for row in buffer]
+            if field.kind == 'timestamp':
+                columns.append(pa.array([_parse_timestamp(value) for value in values], types['timestamp']))
+            elif field.kind == 'string':
+                columns.append(pa.array([None if value is None else str(value) for value in values], pa.string()))
+            else:
+                columns.append(pa.array(values, types[field.kind]))
+        return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    count = 0
+    with pq.ParquetWriter(spool, schema, compression='zstd') as writer:
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= PARQUET_BATCH_ROWS:
+                writer.write_batch(to_batch(buffer))
+                count += len(buffer)
+                buffer = []
+        if buffer or not count:
+            writer.write_batch(to_batch(buffer))
+            count += len(buffer)
+    return count
+
+WRITERS = {
+    'csv': (write_csv, 'csv'),
+    'jsonl': (write_jsonl, 'jsonl'),
+    'parquet': (write_parquet, 'parquet'),
+}
+
+def write_export(spec: ExportSpec, rows: Iterator[List], compress: bool) -> Tuple[tempfile.SpooledTemporaryFile, int]:
+    """Write rows into a spooled temp file, rewound for reading. Returns (file, row count)."""
+    writer, _ = WRITERS[spec.fmt]
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        count = writer(spool, spec.fields, rows, compress)
+        spool.seek(0)
+        return spool, count
+    except BaseException:
+        spool.close()
+        raise
+
+def export_filename(spec: ExportSpec, compress: bool) -> str:
+    extension = WRITERS[spec.fmt][1]
+    return f"{spec.kind}_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}{'.gz' if compress else ''}"
+
+def format_label(filename: str) -> str:
+    """'CSV', 'JSONL (gzip)', ... for captions"""
+    name, _, extension = filename.rpartition('.')
+    if extension == 'gz':
+        return f"{name.rpartition('.')[2].upper()} (gzip)"
+    return extension.upper()
+
+async def run_export(spec: ExportSpec, records: Dict) -> Tuple[tempfile.SpooledTemporaryFile, str, int]:
+    """
+    Stream one database into an export file in a worker thread.
+    Returns (file, filename, row count); the caller closes the file.
+    """
+    # Only the keys are snapshotted, so handlers may keep writing during the export
+    record_ids = list(records)
+    compress = spec.fmt != 'parquet' and len(record_ids) >= EXPORT_GZIP_ROWS
+    export_file, count = await asyncio.to_thread(write_export, spec, export_rows(spec, records, record_ids), compress)
+    filename = export_filename(spec, compress)
+    logger.info(f"Exported {count} {spec.kind} to {filename} (filters: {spec.describe()})")
+    return export_file, filename, count
@@ -0,0 +1,140 @@
+"""
+Forward Batching for ID Finder Pro Bot
+Collects forwarded messages a user sends in quick succession (a bulk forward
+or an album) and answers them with one consolidated reply instead of one
+reply per message.
+
+A batch stays open while forwards keep arriving less than `window` seconds
+apart, up to `max_wait` seconds (albums are never split), or until it holds
+`max_items` forwards.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from telegram import Message
+from telegram.ext import ContextTypes
+
+from templates import FORWARDS_HEADER, FORWARDS_LINE, FORWARDS_ID, FORWARDS_REPEATS, USERNAME_SUFFIX
+from utils import format_entity_response
+
+logger = logging.getLogger(__name__)
+
+JOB_PREFIX = 'forward_batch:'
+MAX_MESSAGE_LENGTH = 4096
+
+NO_ORIGIN_TEXT = "❌ Could not extract entity info from this forwarded message."
+
+class ForwardBatch:
+    """Forwards collected for one chat"""
+
+    def __init__(self, reply_to: Message, reply_markup):
+        self.reply_to = reply_to  # Consolidated reply goes under the first forward
+        self.reply_markup = reply_markup
+        self.items: List[Optional[Dict]] = []  # Entity info per forward, None if no origin found
+        self.first = self.last = time.monotonic()
+        self.media_group_id: Optional[str] = None  # Album of the latest forward
+
+    def add(self, message: Message, info: Optional[Dict]):
+        self.items.append(info)
+        self.last = time.monotonic()
+        self.media_group_id = message.media_group_id
+
+def summarize(items: List[Optional[Dict]]) -> List[str]:
+    """Lines of a consolidated reply: unique origins in first-seen order with repeat counts"""
+    origins: Dict[Tuple, List] = {}
+    unresolved = 0
+    for info in items:
+        if not info:
+            unresolved += 1
+            continue
+        # Hidden users have no ID, their display name is the best key
+        key = (info['type'], info['name']) if info['id'] == 'Hidden' else (info['type'], info['id'])
+        if key in origins:
+            origins[key][1] += 1
+        else:
+            origins[key] = [info, 1]
+
+    lines = [FORWARDS_HEADER.render(count=len(items), origins=len(origins))]
+    for n, (info, count) in enumerate(origins.values(), 1):
+        lines.append(FORWARDS_LINE.render(
+            n=n,
+            type=info['type'],
+            name=info['name'] or 'Unknown',
+            id=FORWARDS_ID.render(id=info['id']) if info['id'] != 'Hidden' else '',
+            username=USERNAME_SUFFIX.render(username=info['username']) if info.get('username') else '',
+            repeats=FORWARDS_REPEATS.render(count=count) if count > 1 else ''
+        ))
+    if unresolved:
+        lines.append(f"\n❌ {unresolved} message(s) without an identifiable origin")
+    return lines
+
+def split_lines(lines: List[str], limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Join lines into as few messages as fit Telegram's length limit"""
+    chunks, current = [], ''
+    for line in lines:
+        if current and len(current) + 1 + len(line) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+class ForwardBatcher:
+    """Per-chat forward batches, flushed by JobQueue jobs"""
+
+    def __init__(self, window: float = 1.0, max_wait: float = 5.0, max_items: int = 50):
+        self.window = window
+        self.max_wait = max_wait
+        self.max_items = max_items
+        self._batches: Dict[int, ForwardBatch] = {}
+
+    async def add(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int, message: Message,
+                  info: Optional[Dict], reply_markup=None):
+        """Queue a forward's entity info; the reply is sent when the batch closes"""
+        batch = self._batches.get(chat_id)
+        if batch is None:
+            batch = self._batches[chat_id] = ForwardBatch(message, reply_markup)
+            context.job_queue.run_once(self._flush_job, when=self.window, data=chat_id,
+                                       name=f"{JOB_PREFIX}{chat_id}")
+        batch.add(message, info)
+
+        if len(batch.items) >= self.max_items:
+            # The scheduled job finds no batch and does nothing
+            del self._batches[chat_id]
+            await self._send(batch)
+
+    async def _flush_job(self, context: ContextTypes.DEFAULT_TYPE):
+        chat_id = context.job.data
+        batch = self._batches.get(chat_id)
+        if batch is None:
+            return
+
+        now = time.monotonic()
+        idle = now - batch.last
+        if idle < self.window and (now - batch.first < self.max_wait or batch.media_group_id):
+            # Forwards are still arriving: wait for a quiet window
+            context.job_queue.run_once(self._flush_job, when=self.window - idle, data=chat_id,
+                                       name=f"{JOB_PREFIX}{chat_id}")
+            return
+
+        del self._batches[chat_id]
+        await self._send(batch)
+
+    async def _send(self, batch: ForwardBatch):
+        try:
+            if len(batch.items) == 1:
+                # A lone forward gets the usual detailed reply
+                info = batch.items[0]
+                text = format_entity_response(info) if info else NO_ORIGIN_TEXT
+                await batch.reply_to.reply_text(text, parse_mode='HTML', reply_markup=batch.reply_markup)
+                return
+
+            for text in split_lines(summarize(batch.items)):
+                await batch.reply_to.reply_text(text, parse_mode='HTML', reply_markup=batch.reply_markup)
+        except Exception as e:
+            logger.error(f"Error sending forward batch reply: {e}")
+
@@ -3,13 +3,20 @@ Group Management Commands for ID Finder Pro Bot
 Handles all group-specific functionality including user commands and admin commands.
 """
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity
 from telegram.ext import ContextTypes
 from telegram.error import BadRequest, Forbidden
 import re
 from group_db import GroupDatabase
+from group_rules import WarnRulesEngine, AUTO_ACTIONS, UNMUTE_PERMISSIONS
+from antiflood import FloodDetector
+from templates import escape, mention, full_name, USER_ID, GROUP_ID, WHOIS
+from config import (ANTIFLOOD_ENABLED, FLOOD_MAX_MESSAGES, FLOOD_WINDOW_SECONDS, FLOOD_MUTE_DURATION,
+                    RAID_MAX_JOINS, RAID_WINDOW_SECONDS, RAID_MODE_SECONDS)
 
 logger = logging.getLogger(__name__)
 
@@ -57,6 +64,45 @@ class GroupCommandHandler:
         
         return None, None, None
     
+    async def get_users_from_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Extract every target from a bulk command in one pass: the replied user,
+        text mentions, @usernames and numeric IDs. Returns {user_id: first_name}.
+        """
+        message = update.message
+        targets = {}
+        usernames = set()
+
+        if message.reply_to_message and message.reply_to_message.from_user:
+            target_user = message.reply_to_message.from_user
+            targets[target_user.id] = target_user.first_name
+
+        for entity, text in message.parse_entities([MessageEntity.TEXT_MENTION, MessageEntity.MENTION]).items():
+            if entity.type == MessageEntity.TEXT_MENTION and entity.user:
+                targets[entity.user.id] = entity.user.first_name
+            elif entity.type == MessageEntity.MENTION:
+                usernames.add(text.lstrip('@').lower())
+
+        for arg in context.args or []:
+            for token in arg.split(','):
+                if token.isdigit():
+                    targets.setdefault(int(token), token)
+
+        # Resolve usernames concurrently
+        async def resolve(username):
+            try:
+                chat_member = await context.bot.get_chat_member(message.chat_id, f"@{username}")
+                return chat_member.user
+            except Exception as e:
+                logger.error(f"Error getting user by username {username}: {e}")
+                return None
+
+        for user in await asyncio.gather(*[resolve(username) for username in usernames]):
+            if user:
+                targets[user.id] = user.first_name
+
+        return targets
+
     def parse_time_duration(self, time_str: str) -> timedelta:
         """Parse time duration string like '10m', '2h', '1d' into timedelta"""
         if not time_str:
@@ -84,6 +130,111 @@ class GroupCommandHandler:
 # Initialize handler instance
 group_handler = GroupCommandHandler()
 
+# Mute Expiry Scheduling
+
+MUTE_EXPIRY_JOB = 'mute_expiry'
+
+def schedule_mute_expiry(job_queue):
+    """Schedule the mute expiry job for the earliest pending mute expiry"""
+    if job_queue is None:
+        return
+
+    next_expiry = group_db.next_mute_expiry()
+    if next_expiry is None:
+        return
+
+    # Keep an already scheduled run if it fires before the next expiry
+    for job in job_queue.get_jobs_by_name(MUTE_EXPIRY_JOB):
+        if job.next_t and job.next_t.timestamp() <= next_expiry:
+            return
+        job.schedule_removal()
+
+    job_queue.run_once(expire_mutes_job, when=max(0.0, next_expiry - time.time()), name=MUTE_EXPIRY_JOB)
+
+async def expire_mutes_job(context: ContextTypes.DEFAULT_TYPE):
+    """Remove expired mutes in one batch and schedule the next run"""
+    try:
+        group_db.cleanup_expired_mutes()
+    except Exception as e:
+        logger.error(f"Error expiring mutes: {e}")
+    schedule_mute_expiry(context.job_queue)
+
+# Initialize warning rules engine
+rules_engine = WarnRulesEngine(group_db, group_handler.parse_time_duration, on_mute=schedule_mute_expiry)
+
+# Initialize flood / raid detector
+flood_detector = FloodDetector(FLOOD_MAX_MESSAGES, FLOOD_WINDOW_SECONDS, RAID_MAX_JOINS, RAID_WINDOW_SECONDS, RAID_MODE_SECONDS)
+
+# Anti-Flood Handlers (run on every group message, must stay cheap)
+
+async def antiflood_message_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Mutes users who send too many messages within the flood window"""
+    message = update.message
+    if not ANTIFLOOD_ENABLED or not message or not message.from_user or message.sender_chat:
+        return
+
+    chat_id = message.chat_id
+    user_id = message.from_user.id
+    if not flood_detector.record_message(chat_id, user_id):
+        return
+
+    # Only flagged users reach the slower checks below
+    try:
+        if not group_db.get_group_settings(chat_id).get('antiflood', True):
+            return
+        if await group_handler.is_user_admin(context, chat_id, user_id):
+            return
+
+        duration = group_handler.parse_time_duration(FLOOD_MUTE_DURATION)
+        await rules_engine.mute(context, chat_id, user_id, duration, "Flood detected", context.bot.id)
+
+        target_mention = mention(user_id, message.from_user.first_name)
+        await context.bot.send_message(
+            chat_id,
+            f"🌊 <b>Flood Detected</b>\n\n"
+            f"👤 <b>User:</b> {target_mention}\n"
+            f"⏰ <b>Muted for:</b> {FLOOD_MUTE_DURATION}",
+            parse_mode='HTML'
+        )
+    except Exception as e:
+        logger.error(f"Error handling flood in {chat_id}: {e}")
+
+async def antiflood_join_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Detects join raids and mutes new members while a raid is active"""
+    message = update.message
+    if not ANTIFLOOD_ENABLED or not message or not message.new_chat_members:
+        return
+
+    chat_id = message.chat_id
+    new_members = [member.id for member in message.new_chat_members if not member.is_bot]
+    raid_started = flood_detector.record_joins(chat_id, len(new_members))
+    if not new_members or not flood_detector.in_raid(chat_id):
+        return
+
+    try:
+        if not group_db.get_group_settings(chat_id).get('antiflood', True):
+            return
+
+        duration = timedelta(seconds=RAID_MODE_SECONDS)
+        results = await rules_engine.run_bulk(
+            new_members, lambda uid: rules_engine.restrict(context, chat_id, uid, duration)
+        )
+        muted = [uid for uid, error in results.items() if error is None]
+        if muted:
+            group_db.add_mutes_batch(chat_id, muted, duration, "Join raid", context.bot.id)
+            schedule_mute_expiry(context.job_queue)
+
+        if raid_started:
+            await context.bot.send_message(
+                chat_id,
+                f"🚨 <b>Join Raid Detected</b>\n\n"
+                f"New members are muted for the next {int(RAID_MODE_SECONDS // 60)} minutes.\n"
+                f"Admins can use /massban or /unmute to review them.",
+                parse_mode='HTML'
+            )
+    except Exception as e:
+        logger.error(f"Error handling join raid in {chat_id}: {e}")
+
 # User Commands (Available to Everyone in Group)
 
 async def group_id_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -92,17 +243,7 @@ async def group_id_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     user = update.effective_user
-    text = (
-        f"👤 <b>Your Telegram ID</b>\n\n"
-        f"🆔 <b>ID:</b> <code>{user.id}</code>\n"
-        f"👤 <b>Name:</b> {user.first_name}"
-    )
-    
-    if user.last_name:
-        text += f" {user.last_name}"
-    
-    if user.username:
-        text += f"\n📎 <b>Username:</b> @{user.username}"
+    text = USER_ID.render(id=user.id, name=full_name(user.first_name, user.last_name), username=user.username)
     
     await update.message.reply_text(text, parse_mode='HTML')
 
@@ -112,14 +253,7 @@ async def group_ids_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     chat = update.effective_chat
-    text = (
-        f"👥 <b>Group Information</b>\n\n"
-        f"🆔 <b>Group ID:</b> <code>{chat.id}</code>\n"
-        f"📝 <b>Title:</b> {chat.title}"
-    )
-    
-    if chat.username:
-        text += f"\n📎 <b>Username:</b> @{chat.username}"
+    text = GROUP_ID.render(id=chat.id, title=chat.title, username=chat.username)
     
     await update.message.reply_text(text, parse_mode='HTML')
 
@@ -143,18 +277,6 @@ async def whois_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_member = await context.bot.get_chat_member(update.effective_chat.id, user_id)
         user = chat_member.user
         
-        text = (
-            f"👤 <b>User Information</b>\n\n"
-            f"🆔 <b>ID:</b> <code>{user.id}</code>\n"
-            f"👤 <b>Name:</b> {user.first_name}"
-        )
-        
-        if user.last_name:
-            text += f" {user.last_name}"
-        
-        if user.username:
-            text += f"\n📎 <b>Username:</b> @{user.username}"
-        
         # Add group-specific info
         status_emoji = {
             'creator': '👑',
@@ -166,10 +288,14 @@ async def whois_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         }
         
         status = chat_member.status
-        text += f"\n🏷️ <b>Status:</b> {status_emoji.get(status, '❓')} {status.title()}"
-        
-        if user.is_bot:
-            text += f"\n🤖 <b>Type:</b> Bot"
+        text = WHOIS.render(
+            id=user.id,
+            name=full_name(user.first_name, user.last_name),
+            username=user.username,
+            status_emoji=status_emoji.get(status, '❓'),
+            status=status.title(),
+            bot='Bot' if user.is_bot else None
+        )
         
         await update.message.reply_text(text, parse_mode='HTML')
         
@@ -201,7 +327,7 @@ async def mentionid_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = chat_member.user
         
         # Create clickable mention using user ID
-        mention_text = f'<a href="tg://user?id={user.id}">{user.first_name}</a>'
+        mention_text = mention(user.id, user.first_name)
         
         await update.message.reply_text(
             f"👤 Clickable mention: {mention_text}\n"
@@ -246,10 +372,12 @@ async def group_help_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             "• <code>/warn @user [reason]</code> - Warn a user\n"
             "• <code>/warnings @user</code> - Check user warnings\n"
             "• <code>/resetwarn @user</code> - Reset user warnings\n"
+            "• <code>/warnconfig</code> - Configure warning limit and action\n"
             "• <code>/mute @user [time]</code> - Mute user (10m, 2h, 1d)\n"
             "• <code>/unmute @user</code> - Unmute user\n"
             "• <code>/kick @user</code> - Kick user from group\n"
             "• <code>/ban @user</code> - Ban user from group\n"
+            "• <code>/massban</code>, <code>/masskick</code>, <code>/massmute [time]</code> - Act on many users at once\n"
             "• <code>/unban @user</code> - Unban user\n"
             "• <code>/pin</code> - Pin replied message\n"
             "• <code>/groupinfo</code> - Show group statistics\n"
@@ -313,7 +441,8 @@ async def help_admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         "<b>⚠️ Warning System:</b>\n"
         "• /warn @user [reason] - Issue warning to user\n"
         "• /warnings @user - Check user's warning history\n"
-        "• /resetwarn @user - Clear all user warnings\n\n"
+        "• /resetwarn @user - Clear all user warnings\n"
+        "• /warnconfig [max] [mute|kick|ban|off] [expiry] [mute time] - Configure automatic action\n\n"
 
         "<b>🔇 Mute System:</b>\n"
         "• /mute @user [time] - Mute user temporarily\n"
@@ -323,7 +452,8 @@ async def help_admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         "<b>👢 Kick/Ban System:</b>\n"
         "• /kick @user - Remove user (can rejoin)\n"
         "• /ban @user - Ban user permanently\n"
-        "• /unban @user - Remove ban from user\n\n"
+        "• /unban @user - Remove ban from user\n"
+        "• /massban, /masskick, /massmute [time] @user1 @user2 123456 - Bulk actions\n\n"
 
         "<b>📌 Group Management:</b>\n"
         "• /pin - Pin the replied message\n"
@@ -334,7 +464,8 @@ async def help_admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
         "• All commands work with @username or reply-to-message\n"
         "• Cannot moderate other administrators\n"
         "• Mutes automatically expire after set duration\n"
-        "• Warning system tracks up to 3 warnings per user\n"
+        "• Users flooding the chat and mass joins are muted automatically\n"
+        "• Reaching the warning limit triggers the configured action automatically\n"
         "• These commands only work in groups where you're an admin\n\n"
 
         "🤖 <b>Bot:</b> @IDFinderProBot"
@@ -391,28 +522,48 @@ async def warn_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 reason = " ".join(context.args[1:])
 
     # Add warning to database
-    warning_count = group_handler.group_db.add_warning(chat_id, target_user_id, reason, user_id)
+    group_handler.group_db.add_warning(chat_id, target_user_id, reason, user_id)
+    rules = rules_engine.get_rules(chat_id)
+    warning_count = rules_engine.count_active_warnings(chat_id, target_user_id, rules)
+    max_warnings = rules['max_warnings']
 
     # Create mention for target user
-    target_mention = f'<a href="tg://user?id={target_user_id}">{target_first_name}</a>'
+    target_mention = mention(target_user_id, target_first_name)
 
-    await update.message.reply_text(
-        f"⚠️ <b>Warning Issued</b>\n\n"
-        f"👤 <b>User:</b> {target_mention}\n"
-        f"📝 <b>Reason:</b> {reason}\n"
-        f"📊 <b>Total Warnings:</b> {warning_count}/3\n\n"
-        f"🛡️ <b>Admin:</b> {update.effective_user.first_name}",
-        parse_mode='HTML'
+    # Announce the warning and apply the automatic action concurrently
+    outcome = await rules_engine.warn_and_enforce(
+        context, chat_id, target_user_id, user_id,
+        update.message.reply_text(
+            f"⚠️ <b>Warning Issued</b>\n\n"
+            f"👤 <b>User:</b> {target_mention}\n"
+            f"📝 <b>Reason:</b> {escape(reason)}\n"
+            f"📊 <b>Total Warnings:</b> {warning_count}/{max_warnings}\n\n"
+            f"🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}",
+            parse_mode='HTML'
+        )
     )
 
     # Check if user reached warning limit
-    if warning_count >= 3:
-        await update.message.reply_text(
-            f"🚨 <b>Warning Limit Reached!</b>\n\n"
-            f"{target_mention} has reached the maximum warning limit (3/3).\n"
-            f"Consider taking further action.",
-            parse_mode='HTML'
-        )
+    if not outcome:
+        return
+
+    if outcome['action'] == 'off':
+        action_text = "Consider taking further action."
+    elif outcome['error']:
+        action_text = f"❌ Automatic {outcome['action']} failed: {escape(outcome['error'])}"
+    elif outcome['action'] == 'mute':
+        action_text = f"🔇 User has been muted until {outcome['until'].strftime('%Y-%m-%d %H:%M')}. Warnings reset."
+    elif outcome['action'] == 'kick':
+        action_text = "👢 User has been kicked from the group. Warnings reset."
+    else:
+        action_text = "🚫 User has been banned from the group. Warnings reset."
+
+    await update.message.reply_text(
+        f"🚨 <b>Warning Limit Reached!</b>\n\n"
+        f"{target_mention} has reached the maximum warning limit ({outcome['warnings']}/{outcome['max_warnings']}).\n"
+        f"{action_text}",
+        parse_mode='HTML'
+    )
 
 async def warnings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Shows how many warnings the user has received"""
@@ -438,26 +589,28 @@ async def warnings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     warnings = group_handler.group_db.get_warnings(chat_id, target_user_id)
-    warning_count = len(warnings)
+    rules = rules_engine.get_rules(chat_id)
+    warning_count = rules_engine.count_active_warnings(chat_id, target_user_id, rules)
+    max_warnings = rules['max_warnings']
 
-    target_mention = f'<a href="tg://user?id={target_user_id}">{target_first_name}</a>'
+    target_mention = mention(target_user_id, target_first_name)
 
-    if warning_count == 0:
+    if not warnings:
         await update.message.reply_text(
             f"✅ <b>No Warnings</b>\n\n"
             f"👤 <b>User:</b> {target_mention}\n"
-            f"📊 <b>Warnings:</b> 0/3\n\n"
+            f"📊 <b>Warnings:</b> 0/{max_warnings}\n\n"
             f"This user has a clean record! 🎉",
             parse_mode='HTML'
         )
         return
 
     # Build warnings list
-    warnings_text = f"⚠️ <b>Warning History</b>\n\n👤 <b>User:</b> {target_mention}\n📊 <b>Total:</b> {warning_count}/3\n\n"
+    warnings_text = f"⚠️ <b>Warning History</b>\n\n👤 <b>User:</b> {target_mention}\n📊 <b>Active:</b> {warning_count}/{max_warnings}\n\n"
 
     for i, warning in enumerate(warnings[-5:], 1):  # Show last 5 warnings
         date = datetime.fromisoformat(warning['date']).strftime('%Y-%m-%d %H:%M')
-        warnings_text += f"<b>{i}.</b> {warning['reason']}\n   📅 {date}\n\n"
+        warnings_text += f"<b>{i}.</b> {escape(warning['reason'])}\n   📅 {date}\n\n"
 
     if len(warnings) > 5:
         warnings_text += f"... and {len(warnings) - 5} more warnings"
@@ -490,14 +643,77 @@ async def resetwarn_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     old_count = group_handler.group_db.get_warning_count(chat_id, target_user_id)
     group_handler.group_db.reset_warnings(chat_id, target_user_id)
 
-    target_mention = f'<a href="tg://user?id={target_user_id}">{target_first_name}</a>'
+    target_mention = mention(target_user_id, target_first_name)
 
     await update.message.reply_text(
         f"🔄 <b>Warnings Reset</b>\n\n"
         f"👤 <b>User:</b> {target_mention}\n"
         f"📊 <b>Previous Warnings:</b> {old_count}\n"
         f"📊 <b>Current Warnings:</b> 0\n\n"
-        f"🛡️ <b>Admin:</b> {update.effective_user.first_name}",
+        f"🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}",
+        parse_mode='HTML'
+    )
+
+async def warnconfig_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Shows or updates the warning limit and the automatic action"""
+    if update.effective_chat.type not in ['group', 'supergroup']:
+        return
+
+    user_id = update.effective_user.id
+    chat_id = update.effective_chat.id
+
+    # Check if user is admin
+    if not await group_handler.is_user_admin(context, chat_id, user_id):
+        await update.message.reply_text("❌ This command is only available to group administrators.")
+        return
+
+    if context.args:
+        try:
+            new_settings = {'max_warnings': int(context.args[0])}
+            if new_settings['max_warnings'] < 1:
+                raise ValueError("max_warnings must be positive")
+
+            if len(context.args) > 1:
+                action = context.args[1].lower()
+                if action not in AUTO_ACTIONS:
+                    raise ValueError(f"unknown action {action}")
+                new_settings['auto_action'] = action
+
+            if len(context.args) > 2:
+                expiry = context.args[2].lower()
+                if expiry in ['0', 'off', 'never']:
+                    new_settings['warn_expiry_hours'] = None
+                else:
+                    if not re.match(r'^\d+[mhd]$', expiry):
+                        raise ValueError(f"invalid expiry {expiry}")
+                    new_settings['warn_expiry_hours'] = group_handler.parse_time_duration(expiry).total_seconds() / 3600
+
+            if len(context.args) > 3:
+                mute_duration = context.args[3].lower()
+                if not re.match(r'^\d+[mhd]$', mute_duration):
+                    raise ValueError(f"invalid mute duration {mute_duration}")
+                new_settings['auto_mute_duration'] = mute_duration
+        except ValueError:
+            await update.message.reply_text(
+                "❌ Invalid settings.\n"
+                "Usage: <code>/warnconfig [max] [mute|kick|ban|off] [expiry] [mute time]</code>\n"
+                "Example: <code>/warnconfig 3 mute 7d 1h</code>",
+                parse_mode='HTML'
+            )
+            return
+
+        group_handler.group_db.update_group_settings(chat_id, new_settings)
+
+    rules = rules_engine.get_rules(chat_id)
+    expiry_hours = rules['warn_window'].total_seconds() / 3600 if rules['warn_window'] else None
+
+    await update.message.reply_text(
+        f"⚙️ <b>Warning Settings</b>\n\n"
+        f"📊 <b>Warning Limit:</b> {rules['max_warnings']}\n"
+        f"🛡️ <b>Automatic Action:</b> {rules['auto_action'].title()}\n"
+        f"🔇 <b>Auto Mute Duration:</b> {rules['auto_mute_duration']}\n"
+        f"⏳ <b>Warnings Expire After:</b> {f'{expiry_hours:g}h' if expiry_hours else 'Never'}\n\n"
+        f"Usage: <code>/warnconfig [max] [mute|kick|ban|off] [expiry] [mute time]</code>",
         parse_mode='HTML'
     )
 
@@ -545,34 +761,17 @@ async def mute_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     duration = group_handler.parse_time_duration(duration_str)
 
     try:
-        # Restrict user permissions
-        await context.bot.restrict_chat_member(
-            chat_id=chat_id,
-            user_id=target_user_id,
-            permissions={
-                'can_send_messages': False,
-                'can_send_media_messages': False,
-                'can_send_polls': False,
-                'can_send_other_messages': False,
-                'can_add_web_page_previews': False,
-                'can_change_info': False,
-                'can_invite_users': False,
-                'can_pin_messages': False
-            },
-            until_date=datetime.now() + duration
-        )
+        # Restrict user permissions and record the mute
+        await rules_engine.mute(context, chat_id, target_user_id, duration, f"Muted for {duration_str}", user_id)
 
-        # Add to database
-        group_handler.group_db.add_mute(chat_id, target_user_id, duration, f"Muted for {duration_str}", user_id)
-
-        target_mention = f'<a href="tg://user?id={target_user_id}">{target_first_name}</a>'
+        target_mention = mention(target_user_id, target_first_name)
 
         await update.message.reply_text(
             f"🔇 <b>User Muted</b>\n\n"
             f"👤 <b>User:</b> {target_mention}\n"
             f"⏰ <b>Duration:</b> {duration_str}\n"
             f"📅 <b>Until:</b> {(datetime.now() + duration).strftime('%Y-%m-%d %H:%M')}\n\n"
-            f"🛡️ <b>Admin:</b> {update.effective_user.first_name}",
+            f"🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}",
             parse_mode='HTML'
         )
 
@@ -610,28 +809,19 @@ async def unmute_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await context.bot.restrict_chat_member(
             chat_id=chat_id,
             user_id=target_user_id,
-            permissions={
-                'can_send_messages': True,
-                'can_send_media_messages': True,
-                'can_send_polls': True,
-                'can_send_other_messages': True,
-                'can_add_web_page_previews': True,
-                'can_change_info': False,
-                'can_invite_users': False,
-                'can_pin_messages': False
-            }
+            permissions=UNMUTE_PERMISSIONS
         )
 
         # Remove from database
         group_handler.group_db.remove_mute(chat_id, target_user_id)
 
-        target_mention = f'<a href="tg://user?id={target_user_id}">{target_first_name}</a>'
+        target_mention = mention(target_user_id, target_first_name)
 
         await update.message.reply_text(
             f"🔊 <b>User Unmuted</b>\n\n"
             f"👤 <b>User:</b> {target_mention}\n"
             f"✅ <b>Status:</b> Can now send messages\n\n"
-            f"🛡️ <b>Admin:</b> {update.effective_user.first_name}",
+            f"🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}",
             parse_mode='HTML'
         )
 
@@ -671,16 +861,15 @@ async def kick_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Kick user (ban then unban to allow rejoining)
-        await context.bot.ban_chat_member(chat_id, target_user_id)
-        await context.bot.unban_chat_member(chat_id, target_user_id)
+        await rules_engine.kick(context, chat_id, target_user_id)
 
-        target_mention = f'<a href="tg://user?id={target_user_id}">{target_first_name}</a>'
+        target_mention = mention(target_user_id, target_first_name)
 
         await update.message.reply_text(
             f"👢 <b>User Kicked</b>\n\n"
             f"👤 <b>User:</b> {target_mention}\n"
             f"✅ <b>Status:</b> Removed from group (can rejoin)\n\n"
-            f"🛡️ <b>Admin:</b> {update.effective_user.first_name}",
+            f"🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}",
             parse_mode='HTML'
         )
 
@@ -720,15 +909,15 @@ async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Ban user permanently
-        await context.bot.ban_chat_member(chat_id, target_user_id)
+        await rules_engine.ban(context, chat_id, target_user_id)
 
-        target_mention = f'<a href="tg://user?id={target_user_id}">{target_first_name}</a>'
+        target_mention = mention(target_user_id, target_first_name)
 
         await update.message.reply_text(
             f"🚫 <b>User Banned</b>\n\n"
             f"👤 <b>User:</b> {target_mention}\n"
             f"❌ <b>Status:</b> Permanently banned from group\n\n"
-            f"🛡️ <b>Admin:</b> {update.effective_user.first_name}",
+            f"🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}",
             parse_mode='HTML'
         )
 
@@ -738,6 +927,107 @@ async def ban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         logger.error(f"Error in ban command: {e}")
         await update.message.reply_text("❌ An error occurred while banning the user.")
 
+# Bulk Moderation Commands
+
+BULK_ACTION_LABELS = {
+    'ban': ('🚫', 'Banned'),
+    'kick': ('👢', 'Kicked'),
+    'mute': ('🔇', 'Muted'),
+}
+
+async def bulk_action_command(update: Update, context: ContextTypes.DEFAULT_TYPE, action: str):
+    """Applies ban, kick or mute to every replied, mentioned or listed user at once"""
+    if update.effective_chat.type not in ['group', 'supergroup']:
+        return
+
+    user_id = update.effective_user.id
+    chat_id = update.effective_chat.id
+
+    # One call for all admin checks
+    try:
+        admins = await context.bot.get_chat_administrators(chat_id)
+    except Exception as e:
+        logger.error(f"Error getting administrators: {e}")
+        await update.message.reply_text("❌ An error occurred while checking administrators.")
+        return
+
+    admin_ids = {admin.user.id for admin in admins}
+    if user_id not in admin_ids:
+        await update.message.reply_text("❌ This command is only available to group administrators.")
+        return
+
+    # The duration is the first argument that looks like one
+    duration_str = "1h"
+    if action == 'mute' and context.args:
+        for arg in context.args:
+            if re.match(r'^\d+[mhd]$', arg.lower()):
+                duration_str = arg.lower()
+                break
+        context.args = [arg for arg in context.args if arg.lower() != duration_str]
+    duration = group_handler.parse_time_duration(duration_str)
+
+    targets = await group_handler.get_users_from_message(update, context)
+    skipped = [target_id for target_id in targets if target_id in admin_ids or target_id == context.bot.id]
+    for target_id in skipped:
+        del targets[target_id]
+
+    if not targets:
+        await update.message.reply_text(
+            "❌ No users to act on.\n"
+            f"Usage: <code>/mass{action}{' [time]' if action == 'mute' else ''} @user1 @user2 123456789</code>, "
+            "mention users or reply to a message.",
+            parse_mode='HTML'
+        )
+        return
+
+    if action == 'ban':
+        results = await rules_engine.run_bulk(targets, lambda uid: rules_engine.ban(context, chat_id, uid))
+    elif action == 'kick':
+        results = await rules_engine.run_bulk(targets, lambda uid: rules_engine.kick(context, chat_id, uid))
+    else:
+        results = await rules_engine.run_bulk(targets, lambda uid: rules_engine.restrict(context, chat_id, uid, duration))
+
+    succeeded = [uid for uid, error in results.items() if error is None]
+    failed = {uid: error for uid, error in results.items() if error is not None}
+
+    # One database write for the whole batch
+    if action == 'mute' and succeeded:
+        group_handler.group_db.add_mutes_batch(chat_id, succeeded, duration, f"Muted for {duration_str}", user_id)
+        schedule_mute_expiry(context.job_queue)
+
+    emoji, label = BULK_ACTION_LABELS[action]
+    summary = (
+        f"{emoji} <b>Bulk Action: {label}</b>\n\n"
+        f"✅ <b>Succeeded:</b> {len(succeeded)}\n"
+        f"❌ <b>Failed:</b> {len(failed)}\n"
+    )
+    if skipped:
+        summary += f"🛡️ <b>Skipped (admins):</b> {len(skipped)}\n"
+    if action == 'mute':
+        summary += f"⏰ <b>Duration:</b> {duration_str}\n"
+
+    if failed:
+        summary += "\n<b>Failures:</b>\n"
+        for uid, error in list(failed.items())[:10]:
+            summary += f"• <code>{uid}</code>: {escape(error)}\n"
+        if len(failed) > 10:
+            summary += f"... and {len(failed) - 10} more\n"
+
+    summary += f"\n🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}"
+    await update.message.reply_text(summary, parse_mode='HTML')
+
+async def massban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Bans every mentioned, replied or listed user"""
+    await bulk_action_command(update, context, 'ban')
+
+async def masskick_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Kicks every mentioned, replied or listed user"""
+    await bulk_action_command(update, context, 'kick')
+
+async def massmute_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Mutes every mentioned, replied or listed user"""
+    await bulk_action_command(update, context, 'mute')
+
 async def unban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Unbans a previously banned user"""
     if update.effective_chat.type not in ['group', 'supergroup']:
@@ -765,13 +1055,13 @@ async def unban_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Unban user
         await context.bot.unban_chat_member(chat_id, target_user_id)
 
-        target_mention = f'<a href="tg://user?id={target_user_id}">{target_first_name}</a>'
+        target_mention = mention(target_user_id, target_first_name)
 
         await update.message.reply_text(
             f"✅ <b>User Unbanned</b>\n\n"
             f"👤 <b>User:</b> {target_mention}\n"
             f"🔓 <b>Status:</b> Can now rejoin the group\n\n"
-            f"🛡️ <b>Admin:</b> {update.effective_user.first_name}",
+            f"🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}",
             parse_mode='HTML'
         )
 
@@ -813,7 +1103,7 @@ async def pin_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(
             f"📌 <b>Message Pinned</b>\n\n"
             f"✅ The replied message has been pinned to the group.\n"
-            f"🛡️ <b>Admin:</b> {update.effective_user.first_name}",
+            f"🛡️ <b>Admin:</b> {escape(update.effective_user.first_name)}",
             parse_mode='HTML'
         )
 
@@ -849,7 +1139,7 @@ async def groupinfo_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         info_text = (
             f"📊 <b>Group Information</b>\n\n"
-            f"📝 <b>Title:</b> {chat.title}\n"
+            f"📝 <b>Title:</b> {escape(chat.title)}\n"
             f"🆔 <b>ID:</b> <code>{chat.id}</code>\n"
         )
 
@@ -858,7 +1148,7 @@ async def groupinfo_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         if chat.description:
             description = chat.description[:100] + "..." if len(chat.description) > 100 else chat.description
-            info_text += f"📄 <b>Description:</b> {description}\n"
+            info_text += f"📄 <b>Description:</b> {escape(description)}\n"
 
         info_text += (
             f"\n👥 <b>Members:</b> {member_count:,}\n"
@@ -906,9 +1196,7 @@ async def listadmins_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
             user = admin.user
 
             # Create user info string
-            user_info = f"👤 {user.first_name}"
-            if user.last_name:
-                user_info += f" {user.last_name}"
+            user_info = f"👤 {escape(full_name(user.first_name, user.last_name))}"
 
             if user.username:
                 user_info += f" (@{user.username})"
@@ -1,55 +1,155 @@
 """
 Group Database Management for ID Finder Pro Bot
 Handles warnings, mutes, and other moderation data per group.
+
+Moderation data is sharded into one JSON file per group inside ``data_dir``.
+Shards are loaded on first use and kept in an LRU cache, so memory and write
+cost scale with the active groups rather than every group ever seen. Active
+mute expiries live in a small separate index file so the expiry scheduler
+works without loading every shard.
+
+Nothing touches the disk until ``load()`` (called from the bot's post_init, or
+lazily on first use), so importing the bot has no side effects.
 """
 
+import bisect
+import heapq
 import json
 import os
+import shutil
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 
+from metrics import time_flush
+
 logger = logging.getLogger(__name__)
 
+MUTE_INDEX_FILE = "_mutes.json"
+
 class GroupDatabase:
     """Database for group moderation data"""
     
-    def __init__(self, db_file: str = "group_data.json"):
-        self.db_file = db_file
-        self.data = self._load_data()
+    def __init__(self, db_file: str = "group_data.json", data_dir: str = "group_data", max_cached_groups: int = 256):
+        self.db_file = db_file  # Legacy single-file store, migrated into data_dir on first start
+        self.data_dir = data_dir
+        self.max_cached_groups = max_cached_groups
+        self.data: "OrderedDict[str, Dict]" = OrderedDict()  # LRU cache of loaded group shards
+        self._loaded = False
+        # Mute expiry index: (group_key, user_key) -> until timestamp, plus a
+        # min-heap of (until, group_key, user_key) ordered by expiry time.
+        # Heap entries whose timestamp no longer matches the index are stale
+        # (mute removed or replaced) and are skipped when popped.
+        self._mute_until: Dict[Tuple[str, str], float] = {}
+        self._mute_heap: List[Tuple[float, str, str]] = []
     
-    def _load_data(self) -> Dict:
-        """Load data from JSON file"""
-        if os.path.exists(self.db_file):
-            try:
-                with open(self.db_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading group database: {e}")
-                return {}
-        return {}
-    
-    def _save_data(self):
-        """Save data to JSON file"""
+    def load(self):
+        """Migrate the legacy store if needed and load the mute index; runs once"""
+        if self._loaded:
+            return
+        self._migrate_legacy_data()
+        self._load_mute_index()
+        self._loaded = True
+    
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+    
+    def _shard_path(self, group_key: str) -> str:
+        """Path of the shard file for a group"""
+        return os.path.join(self.data_dir, f"{group_key}.json")
+    
+    def _write_json(self, path: str, payload):
+        """Write JSON atomically so a crash never leaves a truncated shard"""
+        tmp_path = f"{path}.tmp"
+        with time_flush('group_data'):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, path)
+    
+    def _migrate_legacy_data(self):
+        """Split the legacy single-file store into per-group shards
+        
+        Shards are written into a scratch directory that is renamed into place
+        only once complete, so a crash mid-migration is simply redone on the
+        next start instead of leaving a partial data_dir behind. Errors are
+        raised: the legacy file is left untouched for the next attempt.
+        """
+        if os.path.isdir(self.data_dir):
+            return
+        if not os.path.exists(self.db_file):
+            os.makedirs(self.data_dir, exist_ok=True)
+            return
+        
+        migrating_dir = f"{self.data_dir}.migrating"
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2, ensure_ascii=False)
+            shutil.rmtree(migrating_dir, ignore_errors=True)  # Left over from an interrupted migration
+            os.makedirs(migrating_dir)
+            
+            with open(self.db_file, 'r', encoding='utf-8') as f:
+                legacy_data = json.load(f)
+            
+            mute_index = {}
+            for group_key, group_data in legacy_data.items():
+                self._write_json(os.path.join(migrating_dir, f"{group_key}.json"), group_data)
+                for user_key, mute_data in group_data.get('mutes', {}).items():
+                    mute_index[f"{group_key}:{user_key}"] = mute_data.get('until')
+            self._write_json(os.path.join(migrating_dir, MUTE_INDEX_FILE), mute_index)
+            
+            os.replace(migrating_dir, self.data_dir)
+            logger.info(f"Migrated {len(legacy_data)} groups from {self.db_file} into {self.data_dir}")
         except Exception as e:
-            logger.error(f"Error saving group database: {e}")
+            # Running on without data_dir would silently drop every moderation change, so fail startup
+            logger.error(f"Error migrating group database: {e}")
+            raise
     
-    def _get_group_data(self, group_id: int) -> Dict:
-        """Get or create group data structure"""
+    def _load_group(self, group_key: str) -> Optional[Dict]:
+        """Load a group shard from disk"""
+        path = self._shard_path(group_key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading group shard {group_key}: {e}")
+            return None
+    
+    def _save_group(self, group_key: str, group_data: Dict):
+        """Save a single group shard"""
+        try:
+            self._write_json(self._shard_path(group_key), group_data)
+        except Exception as e:
+            logger.error(f"Error saving group shard {group_key}: {e}")
+    
+    def _get_group_data(self, group_id) -> Dict:
+        """Get group data structure, loading the shard or creating defaults in memory"""
+        self._ensure_loaded()
         group_key = str(group_id)
-        if group_key not in self.data:
-            self.data[group_key] = {
-                'warnings': {},  # user_id: [{'reason': str, 'date': str, 'admin_id': int}]
-                'mutes': {},     # user_id: {'until': str, 'reason': str, 'admin_id': int}
-                'settings': {
-                    'max_warnings': 3,
-                    'auto_action': 'mute'  # 'mute', 'kick', 'ban'
-                }
+        group_data = self.data.get(group_key)
+        if group_data is not None:
+            self.data.move_to_end(group_key)
+            return group_data
+        
+        # Defaults only reach disk once the group is actually modified
+        group_data = self._load_group(group_key) or {
+            'warnings': {},  # user_id: [{'reason': str, 'date': str, 'admin_id': int}]
+            'mutes': {},     # user_id: {'until': str, 'reason': str, 'admin_id': int}
+            'settings': {
+                'max_warnings': 3,
+                'auto_action': 'mute',  # 'mute', 'kick', 'ban', 'off'
+                'warn_expiry_hours': None,  # None = warnings never expire
+                'auto_mute_duration': '24h'
             }
-        return self.data[group_key]
+        }
+        self.data[group_key] = group_data
+        
+        # Shards are saved on every change, so evicting never loses data
+        while len(self.data) > self.max_cached_groups:
+            self.data.popitem(last=False)
+        return group_data
     
     # Warning System
     
@@ -68,7 +168,7 @@ class GroupDatabase:
         }
         
         group_data['warnings'][user_key].append(warning)
-        self._save_data()
+        self._save_group(str(group_id), group_data)
         
         return len(group_data['warnings'][user_key])
     
@@ -82,6 +182,17 @@ class GroupDatabase:
         """Get warning count for a user"""
         return len(self.get_warnings(group_id, user_id))
     
+    def get_active_warning_count(self, group_id: int, user_id: int, window: Optional[timedelta] = None) -> int:
+        """Get the number of warnings issued within the expiry window"""
+        warnings = self.get_warnings(group_id, user_id)
+        if window is None:
+            return len(warnings)
+        
+        # Warnings are appended in date order and ISO dates sort lexicographically,
+        # so the first unexpired warning is found by bisection without parsing dates
+        cutoff = (datetime.now() - window).isoformat()
+        return len(warnings) - bisect.bisect_right(warnings, cutoff, key=lambda w: w['date'])
+    
     def reset_warnings(self, group_id: int, user_id: int):
         """Reset all warnings for a user"""
         group_data = self._get_group_data(group_id)
@@ -89,10 +200,59 @@ class GroupDatabase:
         
         if user_key in group_data['warnings']:
             del group_data['warnings'][user_key]
-            self._save_data()
+            self._save_group(str(group_id), group_data)
     
     # Mute System
     
+    def _load_mute_index(self):
+        """Build the mute expiry heap from the mute index file"""
+        path = os.path.join(self.data_dir, MUTE_INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                mute_index = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading mute index: {e}")
+            return
+        
+        for key, until in mute_index.items():
+            try:
+                group_key, user_key = key.rsplit(':', 1)
+                self._track_mute(group_key, user_key, datetime.fromisoformat(until))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Invalid mute index entry {key}: {e}")
+    
+    def _save_mute_index(self):
+        """Save the active mute expiries"""
+        mute_index = {
+            f"{group_key}:{user_key}": datetime.fromtimestamp(until_ts).isoformat()
+            for (group_key, user_key), until_ts in self._mute_until.items()
+        }
+        try:
+            self._write_json(os.path.join(self.data_dir, MUTE_INDEX_FILE), mute_index)
+        except Exception as e:
+            logger.error(f"Error saving mute index: {e}")
+    
+    def _track_mute(self, group_key: str, user_key: str, until_time: datetime):
+        """Register a mute expiry in the index and the expiry heap"""
+        until_ts = until_time.timestamp()
+        self._mute_until[(group_key, user_key)] = until_ts
+        heapq.heappush(self._mute_heap, (until_ts, group_key, user_key))
+        
+        # Replaced and removed mutes leave stale heap entries behind, compact occasionally
+        if len(self._mute_heap) > 2 * len(self._mute_until) + 64:
+            self._mute_heap = [(ts, g, u) for (g, u), ts in self._mute_until.items()]
+            heapq.heapify(self._mute_heap)
+    
+    def _active_mute_until(self, group_key: str, user_key: str) -> Optional[float]:
+        """Return the expiry timestamp of an active mute, or None"""
+        self._ensure_loaded()
+        until_ts = self._mute_until.get((group_key, user_key))
+        if until_ts is None or until_ts <= time.time():
+            return None
+        return until_ts
+    
     def add_mute(self, group_id: int, user_id: int, duration: timedelta, reason: str, admin_id: int):
         """Add a mute for a user"""
         group_data = self._get_group_data(group_id)
@@ -106,8 +266,33 @@ class GroupDatabase:
             'admin_id': admin_id,
             'muted_at': datetime.now().isoformat()
         }
+        self._track_mute(str(group_id), user_key, until_time)
         
-        self._save_data()
+        self._save_group(str(group_id), group_data)
+        self._save_mute_index()
+    
+    def add_mutes_batch(self, group_id: int, user_ids: List[int], duration: timedelta, reason: str, admin_id: int):
+        """Add the same mute for several users, saving once"""
+        if not user_ids:
+            return
+        
+        group_key = str(group_id)
+        group_data = self._get_group_data(group_id)
+        now = datetime.now()
+        until_time = now + duration
+        
+        for user_id in user_ids:
+            user_key = str(user_id)
+            group_data['mutes'][user_key] = {
+                'until': until_time.isoformat(),
+                'reason': reason,
+                'admin_id': admin_id,
+                'muted_at': now.isoformat()
+            }
+            self._track_mute(group_key, user_key, until_time)
+        
+        self._save_group(group_key, group_data)
+        self._save_mute_index()
     
     def remove_mute(self, group_id: int, user_id: int):
         """Remove mute for a user"""
@@ -116,51 +301,74 @@ class GroupDatabase:
         
         if user_key in group_data['mutes']:
             del group_data['mutes'][user_key]
-            self._save_data()
+            self._mute_until.pop((str(group_id), user_key), None)
+            self._save_group(str(group_id), group_data)
+            self._save_mute_index()
     
     def is_user_muted(self, group_id: int, user_id: int) -> bool:
         """Check if user is currently muted"""
-        group_data = self._get_group_data(group_id)
-        user_key = str(user_id)
-        
-        if user_key not in group_data['mutes']:
-            return False
-        
-        mute_data = group_data['mutes'][user_key]
-        until_time = datetime.fromisoformat(mute_data['until'])
-        
-        if datetime.now() > until_time:
-            # Mute expired, remove it
-            del group_data['mutes'][user_key]
-            self._save_data()
-            return False
-        
-        return True
+        return self._active_mute_until(str(group_id), str(user_id)) is not None
     
     def get_mute_info(self, group_id: int, user_id: int) -> Optional[Dict]:
         """Get mute information for a user"""
-        group_data = self._get_group_data(group_id)
+        group_key = str(group_id)
         user_key = str(user_id)
         
-        if user_key not in group_data['mutes']:
+        until_ts = self._active_mute_until(group_key, user_key)
+        if until_ts is None:
             return None
         
-        mute_data = group_data['mutes'][user_key]
-        until_time = datetime.fromisoformat(mute_data['until'])
-        
-        if datetime.now() > until_time:
-            # Mute expired, remove it
-            del group_data['mutes'][user_key]
-            self._save_data()
+        mute_data = self._get_group_data(group_key)['mutes'].get(user_key)
+        if mute_data is None:
             return None
         
         return {
-            'until': until_time,
+            'until': datetime.fromtimestamp(until_ts),
             'reason': mute_data['reason'],
             'admin_id': mute_data['admin_id'],
             'muted_at': datetime.fromisoformat(mute_data['muted_at'])
         }
     
+    def active_mute_count(self) -> int:
+        """Number of mutes in the expiry index (not yet expired by the scheduler), across all groups"""
+        self._ensure_loaded()
+        return len(self._mute_until)
+    
+    def next_mute_expiry(self) -> Optional[float]:
+        """Get the timestamp of the earliest pending mute expiry, if any"""
+        self._ensure_loaded()
+        while self._mute_heap:
+            until_ts, group_key, user_key = self._mute_heap[0]
+            if self._mute_until.get((group_key, user_key)) == until_ts:
+                return until_ts
+            heapq.heappop(self._mute_heap)
+        return None
+    
+    def expire_due_mutes(self, now: Optional[float] = None) -> int:
+        """Remove all mutes that have expired. Saves each touched shard once per batch. Returns count removed."""
+        self._ensure_loaded()
+        if now is None:
+            now = time.time()
+        
+        expired = 0
+        touched_groups = {}
+        while self._mute_heap and self._mute_heap[0][0] <= now:
+            until_ts, group_key, user_key = heapq.heappop(self._mute_heap)
+            if self._mute_until.get((group_key, user_key)) != until_ts:
+                continue  # Stale entry, mute was removed or replaced
+            
+            del self._mute_until[(group_key, user_key)]
+            group_data = self._get_group_data(group_key)
+            group_data['mutes'].pop(user_key, None)
+            touched_groups[group_key] = group_data
+            expired += 1
+        
+        for group_key, group_data in touched_groups.items():
+            self._save_group(group_key, group_data)
+        if expired:
+            self._save_mute_index()
+        return expired
+    
     # Group Settings
     
     def get_group_settings(self, group_id: int) -> Dict:
@@ -172,18 +380,19 @@ class GroupDatabase:
         """Update group settings"""
         group_data = self._get_group_data(group_id)
         group_data['settings'].update(settings)
-        self._save_data()
+        self._save_group(str(group_id), group_data)
     
     # Statistics
     
     def get_group_stats(self, group_id: int) -> Dict:
         """Get group moderation statistics"""
+        group_key = str(group_id)
         group_data = self._get_group_data(group_id)
         
         total_warnings = sum(len(warnings) for warnings in group_data['warnings'].values())
         users_with_warnings = len(group_data['warnings'])
-        active_mutes = len([mute for mute in group_data['mutes'].values() 
-                           if datetime.fromisoformat(mute['until']) > datetime.now()])
+        active_mutes = sum(1 for user_key in group_data['mutes']
+                           if self._active_mute_until(group_key, user_key) is not None)
         
         return {
             'total_warnings': total_warnings,
@@ -194,19 +403,7 @@ class GroupDatabase:
     
     def cleanup_expired_mutes(self):
         """Clean up expired mutes from all groups"""
-        current_time = datetime.now()
-        
-        for group_id, group_data in self.data.items():
-            expired_users = []
-            
-            for user_id, mute_data in group_data['mutes'].items():
-                until_time = datetime.fromisoformat(mute_data['until'])
-                if current_time > until_time:
-                    expired_users.append(user_id)
-            
-            for user_id in expired_users:
-                del group_data['mutes'][user_id]
-        
-        if expired_users:
-            self._save_data()
-            logger.info(f"Cleaned up {len(expired_users)} expired mutes")
+        expired = self.expire_due_mutes()
+        if expired:
+            logger.info(f"Cleaned up {expired} expired mutes")
+        return expired
@@ -0,0 +1,172 @@
+"""
+Moderation Rules Engine for ID Finder Pro Bot
+Enforces each group's warning threshold by running the configured automatic action.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+AUTO_ACTIONS = ('mute', 'kick', 'ban', 'off')
+
+# Bulk actions: parallel API calls per command and retries on flood control
+BULK_CONCURRENCY = 10
+BULK_MAX_RETRIES = 3
+
+# Permissions applied to muted users
+MUTE_PERMISSIONS = {
+    'can_send_messages': False,
+    'can_send_media_messages': False,
+    'can_send_polls': False,
+    'can_send_other_messages': False,
+    'can_add_web_page_previews': False,
+    'can_change_info': False,
+    'can_invite_users': False,
+    'can_pin_messages': False
+}
+
+# Permissions restored on unmute
+UNMUTE_PERMISSIONS = {
+    'can_send_messages': True,
+    'can_send_media_messages': True,
+    'can_send_polls': True,
+    'can_send_other_messages': True,
+    'can_add_web_page_previews': True,
+    'can_change_info': False,
+    'can_invite_users': False,
+    'can_pin_messages': False
+}
+
+class WarnRulesEngine:
+    """Applies mute, kick or ban automatically when a user reaches the group's warning limit"""
+
+    def __init__(self, group_db, parse_duration: Callable[[str], timedelta], on_mute: Optional[Callable] = None):
+        self.group_db = group_db
+        self.parse_duration = parse_duration
+        self.on_mute = on_mute  # Called with the job queue after a mute, used to schedule expiry
+
+    def get_rules(self, chat_id: int) -> Dict:
+        """Get the warning rules for a group from the cached group settings"""
+        settings = self.group_db.get_group_settings(chat_id)
+        expiry_hours = settings.get('warn_expiry_hours')
+        auto_action = settings.get('auto_action', 'mute')
+
+        return {
+            'max_warnings': max(1, int(settings.get('max_warnings', 3))),
+            'auto_action': auto_action if auto_action in AUTO_ACTIONS else 'mute',
+            'warn_window': timedelta(hours=expiry_hours) if expiry_hours else None,
+            'auto_mute_duration': settings.get('auto_mute_duration', '24h')
+        }
+
+    def count_active_warnings(self, chat_id: int, user_id: int, rules: Optional[Dict] = None) -> int:
+        """Count the warnings that still count towards the limit"""
+        rules = rules or self.get_rules(chat_id)
+        return self.group_db.get_active_warning_count(chat_id, user_id, rules['warn_window'])
+
+    # Actions
+
+    async def restrict(self, context, chat_id: int, user_id: int, duration: timedelta):
+        """Restrict a user for the given duration without recording it"""
+        await context.bot.restrict_chat_member(
+            chat_id=chat_id,
+            user_id=user_id,
+            permissions=MUTE_PERMISSIONS,
+            until_date=datetime.now() + duration
+        )
+
+    async def mute(self, context, chat_id: int, user_id: int, duration: timedelta, reason: str, admin_id: int):
+        """Restrict a user and record the mute"""
+        await self.restrict(context, chat_id, user_id, duration)
+        self.group_db.add_mute(chat_id, user_id, duration, reason, admin_id)
+        if self.on_mute:
+            self.on_mute(context.job_queue)
+
+    async def kick(self, context, chat_id: int, user_id: int):
+        """Remove a user from the group while allowing them to rejoin"""
+        await context.bot.ban_chat_member(chat_id, user_id)
+        await context.bot.unban_chat_member(chat_id, user_id)
+
+    async def ban(self, context, chat_id: int, user_id: int):
+        """Ban a user permanently"""
+        await context.bot.ban_chat_member(chat_id, user_id)
+
+    async def run_bulk(self, user_ids: Iterable[int], action: Callable[[int], Awaitable]) -> Dict[int, Optional[str]]:
+        """
+        Run an action for many users concurrently within the rate limit.
+        Returns user_id -> None on success or the error message on failure.
+        """
+        semaphore = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def run_one(user_id):
+            async with semaphore:
+                for attempt in range(BULK_MAX_RETRIES):
+                    try:
+                        await action(user_id)
+                        return None
+                    except RetryAfter as e:
+                        retry_after = e.retry_after
+                        delay = retry_after.total_seconds() if isinstance(retry_after, timedelta) else retry_after
+                        if attempt == BULK_MAX_RETRIES - 1:
+                            return str(e)
+                        await asyncio.sleep(delay)
+                    except Exception as e:
+                        return str(e)
+
+        user_ids = list(user_ids)
+        results = await asyncio.gather(*[run_one(user_id) for user_id in user_ids])
+        return dict(zip(user_ids, results))
+
+    # Enforcement
+
+    async def enforce(self, context, chat_id: int, user_id: int, admin_id: int) -> Optional[Dict]:
+        """
+        Run the configured action if the user reached the warning limit.
+        Returns a dict describing the outcome, or None if the limit was not reached.
+        """
+        rules = self.get_rules(chat_id)
+        active_warnings = self.count_active_warnings(chat_id, user_id, rules)
+        if active_warnings < rules['max_warnings']:
+            return None
+
+        action = rules['auto_action']
+        outcome = {'action': action, 'warnings': active_warnings, 'max_warnings': rules['max_warnings'], 'error': None}
+        if action == 'off':
+            return outcome
+
+        try:
+            if action == 'mute':
+                duration = self.parse_duration(rules['auto_mute_duration'])
+                outcome['until'] = datetime.now() + duration
+                await self.mute(context, chat_id, user_id, duration,
+                                f"Reached {rules['max_warnings']} warnings", admin_id)
+            elif action == 'kick':
+                await self.kick(context, chat_id, user_id)
+            elif action == 'ban':
+                await self.ban(context, chat_id, user_id)
+
+            # Start over once the penalty has been applied
+            self.group_db.reset_warnings(chat_id, user_id)
+        except Exception as e:
+            logger.error(f"Error enforcing {action} for user {user_id} in {chat_id}: {e}")
+            outcome['error'] = str(e)
+
+        return outcome
+
+    async def warn_and_enforce(self, context, chat_id: int, user_id: int, admin_id: int, announce):
+        """
+        Send the warning announcement and run enforcement concurrently.
+        A failed announcement is logged and never hides the enforcement outcome,
+        since the mute, kick or ban may already have been applied.
+        """
+        announced, outcome = await asyncio.gather(announce, self.enforce(context, chat_id, user_id, admin_id),
+                                                  return_exceptions=True)
+        if isinstance(announced, Exception):
+            logger.error(f"Error announcing warning for user {user_id} in {chat_id}: {announced}")
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
@@ -1,14 +1,59 @@
+import asyncio
+import heapq
 import json
 import os
+import threading
+from collections import Counter
 from datetime import datetime
+from types import MappingProxyType
 import logging
 
+from metrics import time_flush
+
 logger = logging.getLogger(__name__)
 
 class GroupsDatabase:
     def __init__(self, db_file='groups.json'):
         self.db_file = db_file
-        self.groups = self.load_groups()
+        self._groups = None  # Loaded on first access, or in the background by load()
+        self._load_lock = threading.Lock()
+        self._load_task = None
+        # Statistics of active groups, built on load and kept up to date by every write
+        self._active = {}  # group_id_str -> group
+        self._type_counts = Counter()
+        self._public_groups = 0
+        self._total_interactions = 0
+
+    @property
+    def groups(self):
+        if self._groups is None:
+            self.load()
+        return self._groups
+
+    @property
+    def loaded(self):
+        return self._groups is not None
+
+    def _ensure_loaded(self):
+        if self._groups is None:
+            self.load()
+
+    def load(self):
+        """Load the database once; safe to call from a worker thread"""
+        with self._load_lock:
+            if self._groups is None:
+                groups = self.load_groups()
+                for group_id_str, group in groups.items():
+                    self._count(group_id_str, group, 1)
+                self._groups = groups  # Published last: the counters are complete by then
+
+    async def wait_loaded(self):
+        """Load in a worker thread, or wait for the load already running; never blocks the event loop"""
+        if self._groups is not None:
+            return
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(asyncio.to_thread(self.load))
+        await asyncio.shield(self._load_task)
 
     def load_groups(self):
         """Load groups from JSON file"""
@@ -24,11 +69,27 @@ class GroupsDatabase:
     def save_groups(self):
         """Save groups to JSON file"""
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
+            with time_flush('groups'), open(self.db_file, 'w', encoding='utf-8') as f:
                 json.dump(self.groups, f, indent=2, ensure_ascii=False)
         except Exception as e:
             logger.error(f"Error saving groups database: {e}")
 
+    def _count(self, group_id_str, group, sign):
+        """Add (sign=1) or remove (sign=-1) a group's contribution to the statistics"""
+        if not group.get('is_active', True):
+            return
+        if sign > 0:
+            self._active[group_id_str] = group
+        else:
+            self._active.pop(group_id_str, None)
+        group_type = group.get('type', 'unknown')
+        self._type_counts[group_type] += sign
+        if self._type_counts[group_type] <= 0:
+            del self._type_counts[group_type]
+        if group.get('username'):
+            self._public_groups += sign
+        self._total_interactions += sign * group.get('interaction_count', 0)
+
     def add_group(self, group_id, group_title, group_type, username=None, invite_link=None):
         """Add or update a group in the database"""
         try:
@@ -48,9 +109,11 @@ class GroupsDatabase:
                     'interaction_count': 1,
                     'is_active': True
                 }
+                self._count(group_id_str, self.groups[group_id_str], 1)
                 logger.info(f"Added new group: {group_title} ({group_id})")
             else:
                 # Update existing group
+                self._count(group_id_str, self.groups[group_id_str], -1)
                 self.groups[group_id_str].update({
                     'title': group_title,
                     'type': group_type,
@@ -59,6 +122,7 @@ class GroupsDatabase:
                     'last_interaction': current_time,
                     'is_active': True
                 })
+                self._count(group_id_str, self.groups[group_id_str], 1)
                 logger.info(f"Updated group: {group_title} ({group_id})")
             
             self.save_groups()
@@ -70,8 +134,11 @@ class GroupsDatabase:
         try:
             group_id_str = str(group_id)
             if group_id_str in self.groups:
-                self.groups[group_id_str]['interaction_count'] += 1
-                self.groups[group_id_str]['last_interaction'] = datetime.now().isoformat()
+                group = self.groups[group_id_str]
+                group['interaction_count'] += 1
+                group['last_interaction'] = datetime.now().isoformat()
+                if group.get('is_active', True):
+                    self._total_interactions += 1
                 self.save_groups()
         except Exception as e:
             logger.error(f"Error incrementing interaction for group {group_id}: {e}")
@@ -81,6 +148,7 @@ class GroupsDatabase:
         try:
             group_id_str = str(group_id)
             if group_id_str in self.groups:
+                self._count(group_id_str, self.groups[group_id_str], -1)
                 self.groups[group_id_str]['is_active'] = False
                 self.groups[group_id_str]['last_interaction'] = datetime.now().isoformat()
                 self.save_groups()
@@ -89,37 +157,34 @@ class GroupsDatabase:
 
     def get_total_groups(self):
         """Get total number of groups"""
-        return len([g for g in self.groups.values() if g.get('is_active', True)])
+        self._ensure_loaded()
+        return len(self._active)
 
     def get_all_groups(self):
-        """Get all active groups"""
-        return {k: v for k, v in self.groups.items() if v.get('is_active', True)}
+        """Read-only live view of all active groups, keyed by group ID string (no copy)"""
+        self._ensure_loaded()
+        return MappingProxyType(self._active)
 
     def get_recent_groups(self, limit=10):
         """Get recently added groups"""
-        active_groups = [(k, v) for k, v in self.groups.items() if v.get('is_active', True)]
-        # Sort by added_date (most recent first)
-        sorted_groups = sorted(active_groups, key=lambda x: x[1].get('added_date', ''), reverse=True)
-        return sorted_groups[:limit]
+        self._ensure_loaded()
+        # Most recent added_date first
+        return heapq.nlargest(limit, self._active.items(), key=lambda x: x[1].get('added_date', ''))
 
     def get_group_stats(self):
-        """Get comprehensive group statistics"""
-        active_groups = self.get_all_groups()
-        total_groups = len(active_groups)
-        total_interactions = sum(g.get('interaction_count', 0) for g in active_groups.values())
-        
-        # Group by type
-        type_counts = {}
-        for group in active_groups.values():
-            group_type = group.get('type', 'unknown')
-            type_counts[group_type] = type_counts.get(group_type, 0) + 1
-        
+        """Get comprehensive group statistics (constant time)"""
+        self._ensure_loaded()
+        total_groups = len(self._active)
+        total_interactions = self._total_interactions
+        type_counts = dict(self._type_counts)
+
         # Public vs Private groups
-        public_groups = len([g for g in active_groups.values() if g.get('username')])
+        public_groups = self._public_groups
         private_groups = total_groups - public_groups
         
         return {
             'total_groups': total_groups,
+            'tracked_groups': len(self._groups),  # Including groups the bot was removed from
             'total_interactions': total_interactions,
             'type_counts': type_counts,
             'public_groups': public_groups,
@@ -0,0 +1,206 @@
+"""
+Load Test Driver for ID Finder Pro Bot
+Replays a synthetic update stream (forwards, inline queries, group commands)
+at a target rate through the real Application, against the fake Bot API, and
+reports end-to-end latency percentiles per update kind. Forwards are answered
+by a batched reply after their handler returns, so their latency runs until
+the fake Bot API receives the sendMessage for that chat.
+
+Usage:
+    python loadtest/driver.py --rate 100 --count 2000
+    python loadtest/driver.py --rate 50 --count 1000 --latency 0.05 --retry-after-rate 0.01
+    python loadtest/driver.py --broadcast-users 500 --output loadtest.json   # with a concurrent broadcast
+    python loadtest/driver.py --count 5000 --record recordings/               # keep the stream for replay.py
+
+The bot runs in a temporary directory, so its JSON stores never touch the
+real users.json/groups.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, Iterator, Tuple
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(LOADTEST_DIR)
+sys.path.insert(0, LOADTEST_DIR)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fake_bot_api import FakeBotAPI  # noqa: E402
+from harness import ADMIN_ID, TOKEN, run_in_tempdir, start_bot, stop_bot  # noqa: E402
+
+GROUP_ID = -1_001_234_567_890
+USER_BASE = 10_000_000
+
+class StreamGenerator:
+    """Synthetic update payloads in the Bot API JSON shape"""
+
+    def __init__(self, users: int, fixtures: int, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.fixtures = fixtures
+        self.started = set()
+        self.update_ids = iter(range(1, 10 ** 9))
+        self.message_ids = iter(range(1, 10 ** 9))
+
+    @staticmethod
+    def user(uid: int) -> Dict:
+        return {'id': uid, 'is_bot': False, 'first_name': f"Load {uid}", 'username': f"load{uid}"}
+
+    def _message(self, chat: Dict, sender: Dict, **fields) -> Dict:
+        return dict({'message_id': next(self.message_ids), 'date': int(time.time()),
+                     'chat': chat, 'from': sender}, **fields)
+
+    def _private(self, uid: int, **fields) -> Dict:
+        chat = {'id': uid, 'type': 'private', 'first_name': f"Load {uid}"}
+        return {'update_id': next(self.update_ids), 'message': self._message(chat, self.user(uid), **fields)}
+
+    def _command(self, text: str) -> Dict:
+        return {'text': text, 'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]}
+
+    def forward(self) -> Iterator[Tuple[str, Dict]]:
+        uid = USER_BASE + self.rng.randrange(self.users)
+        if uid not in self.started:
+            # Forwards are only handled inside the conversation, which /start opens
+            self.started.add(uid)
+            yield 'start', self._private(uid, **self._command('/start'))
+        origin = self.rng.choice([
+            {'type': 'user', 'date': int(time.time()), 'sender_user': self.user(uid + 1)},
+            {'type': 'channel', 'date': int(time.time()), 'message_id': 7,
+             'chat': {'id': -1_001_000_000_001, 'type': 'channel', 'title': 'News'}},
+            {'type': 'hidden_user', 'date': int(time.time()), 'sender_user_name': 'Hidden'},
+        ])
+        yield 'forward', self._private(uid, text='forwarded', forward_origin=origin)
+
+    def inline(self) -> Iterator[Tuple[str, Dict]]:
+        uid = USER_BASE + self.rng.randrange(self.users)
+        # Mostly resolvable fixtures, some misses that fail in getChat
+        query = f"@user{self.rng.randrange(self.fixtures)}" if self.rng.random() < 0.8 else f"@missing{uid}"
+        yield 'inline', {'update_id': next(self.update_ids),
+                         'inline_query': {'id': str(next(self.message_ids)), 'from': self.user(uid),
+                                          'query': query, 'offset': ''}}
+
+    def group(self) -> Iterator[Tuple[str, Dict]]:
+        chat = {'id': GROUP_ID, 'type': 'supergroup', 'title': 'Load Test Group'}
+        uid = USER_BASE + self.rng.randrange(self.users)
+        kind = self.rng.choice(['/id', '/ids', '/warn'])
+        if kind == '/warn':
+            target = self._message(chat, self.user(uid), text='spam')
+            message = self._message(chat, self.user(ADMIN_ID), reply_to_message=target, **self._command('/warn flood'))
+        else:
+            message = self._message(chat, self.user(uid), **self._command(kind))
+        yield 'group', {'update_id': next(self.update_ids), 'message': message}
+
+    def stream(self, count: int, mix: Dict[str, float]) -> Iterator[Tuple[str, Dict]]:
+        kinds = list(mix)
+        weights = [mix[k] for k in kinds]
+        produced = 0
+        while produced < count:
+            for item in getattr(self, self.rng.choices(kinds, weights)[0])():
+                produced += 1
+                yield item
+
+async def run(args) -> Dict:
+    fake = FakeBotAPI(TOKEN, port=args.api_port, latency=args.latency, error_rate=args.error_rate,
+                      retry_after_rate=args.retry_after_rate, admin_ids=[ADMIN_ID], seed=args.seed)
+    await fake.start()
+    port = fake._server.sockets[0].getsockname()[1]
+
+    if args.broadcast_users:
+        from synthetic import make_users
+        with open('users.json', 'w', encoding='utf-8') as f:
+            json.dump(make_users(args.broadcast_users), f)
+
+    bot, application, tracker = await start_bot(port, args.log_level, args.record or '')
+    fake.on_message = tracker.message_sent
+    from telegram import Update
+    from telegram.ext import CallbackContext
+    loop = asyncio.get_running_loop()
+
+    async def broadcast():
+        update = Update.de_json({'update_id': 0, 'callback_query': {
+            'id': 'broadcast', 'from': StreamGenerator.user(ADMIN_ID), 'chat_instance': 'x', 'data': 'notify_send',
+            'message': {'message_id': 1, 'date': int(time.time()),
+                        'chat': {'id': ADMIN_ID, 'type': 'private', 'first_name': 'Admin'}, 'text': 'preview'}}},
+            application.bot)
+        context = CallbackContext.from_update(update, application)
+        context.user_data['notification'] = {'text': 'Load test broadcast', 'entities': [], 'files': [], 'buttons': []}
+        started = loop.time()
+        await bot.send_notification(update, context)
+        return loop.time() - started
+
+    broadcast_task = asyncio.create_task(broadcast()) if args.broadcast_users else None
+    mix = dict((kind, float(weight)) for kind, weight in (part.split('=') for part in args.mix.split(',')))
+    generator = StreamGenerator(args.users, 1000, args.seed)
+
+    started = loop.time()
+    for n, (kind, payload) in enumerate(generator.stream(args.count, mix)):
+        delay = started + n / args.rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        update = Update.de_json(payload, application.bot)
+        tracker.start(update.update_id, kind, update.effective_chat.id if kind == 'forward' else None)
+        await application.update_queue.put(update)
+    send_seconds = loop.time() - started
+
+    await tracker.wait(args.drain_timeout)
+    total_seconds = loop.time() - started
+    broadcast_seconds = await broadcast_task if broadcast_task else None
+
+    await stop_bot(application)
+    await fake.stop()
+
+    processed = tracker.processed
+    return {
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'updates_sent': args.count,
+        'updates_processed': processed,
+        'updates_unfinished': tracker.unfinished,
+        'send_seconds': round(send_seconds, 2),
+        'total_seconds': round(total_seconds, 2),
+        'throughput_per_sec': round(processed / total_seconds, 2) if total_seconds else None,
+        'latency': tracker.report(),
+        'broadcast_seconds': round(broadcast_seconds, 2) if broadcast_seconds is not None else None,
+        'handler_errors': {key[0]: value for key, value in bot.metrics.handler_errors._values.items()},
+        'fake_api': fake.stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test against a fake Bot API")
+    parser.add_argument('--rate', type=float, default=50, help="Updates per second (default: %(default)s)")
+    parser.add_argument('--count', type=int, default=1000, help="Updates to send (default: %(default)s)")
+    parser.add_argument('--mix', default='forward=4,inline=3,group=3',
+                        help="Relative weights of forward/inline/group updates (default: %(default)s)")
+    parser.add_argument('--users', type=int, default=500, help="Distinct synthetic senders (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0.02, help="Mean fake API latency in seconds (default: %(default)s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of calls failing with 502")
+    parser.add_argument('--retry-after-rate', type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument('--broadcast-users', type=int, default=0,
+                        help="Run send_notification to this many users during the stream")
+    parser.add_argument('--api-port', type=int, default=0, help="Fake Bot API port (default: any free port)")
+    parser.add_argument('--drain-timeout', type=float, default=60, help="Seconds to wait for in-flight updates")
+    parser.add_argument('--log-level', default='CRITICAL')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', help="Record the (anonymized) stream here for loadtest/replay.py")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    if args.record:
+        args.record = os.path.abspath(args.record)
+
+    report = run_in_tempdir(run, args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
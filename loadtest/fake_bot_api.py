@@ -0,0 +1,178 @@
+"""
+Fake Telegram Bot API for ID Finder Pro Bot load tests
+A local stand-in for api.telegram.org with configurable latency, error rates,
+RetryAfter (429) responses and chat fixtures for getChat/getChatMember.
+
+Point the bot at it with BOT_API_URL=http://127.0.0.1:<port>/bot.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from email.parser import BytesParser
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import parse_qsl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web_server import WebServer, Request, Response  # noqa: E402
+
+BOT_USER = {'id': 999000, 'is_bot': True, 'first_name': 'ID Finder Pro', 'username': 'idfinder_loadtest_bot',
+            'can_join_groups': True, 'can_read_all_group_messages': False, 'supports_inline_queries': True}
+
+# Methods needed to start the bot; never delayed by injected failures
+STARTUP_METHODS = {'getMe', 'setMyCommands', 'deleteWebhook', 'setWebhook', 'getUpdates', 'close', 'logOut'}
+
+# Methods that return a Message object
+MESSAGE_METHODS = {'sendMessage', 'sendPhoto', 'sendVideo', 'sendDocument', 'sendAnimation', 'sendAudio',
+                   'sendVoice', 'sendSticker', 'sendInvoice', 'editMessageText', 'editMessageCaption',
+                   'editMessageReplyMarkup', 'copyMessage', 'forwardMessage'}
+
+ADMIN_RIGHTS = {
+    'can_be_edited': False, 'is_anonymous': False, 'can_manage_chat': True, 'can_delete_messages': True,
+    'can_manage_video_chats': True, 'can_restrict_members': True, 'can_promote_members': False,
+    'can_change_info': True, 'can_invite_users': True, 'can_post_stories': False,
+    'can_edit_stories': False, 'can_delete_stories': False, 'can_pin_messages': True,
+}
+
+def default_fixtures(users: int = 1000, channels: int = 100) -> Dict[str, Dict]:
+    """Public chats resolvable by getChat: @user<N> (private) and @channel<N>"""
+    chats = {}
+    for n in range(users):
+        chats[f"@user{n}"] = {'id': 5_000_000 + n, 'type': 'private', 'username': f"user{n}",
+                              'first_name': f"User {n}"}
+    for n in range(channels):
+        chats[f"@channel{n}"] = {'id': -1_001_000_000_000 - n, 'type': 'channel', 'username': f"channel{n}",
+                                 'title': f"Channel {n}"}
+    return chats
+
+class FakeBotAPI(WebServer):
+    """Answers Bot API calls for one token at /bot<token>/<method>"""
+
+    def __init__(self, token: str, host: str = '127.0.0.1', port: int = 8081,
+                 latency: float = 0.0, error_rate: float = 0.0, retry_after_rate: float = 0.0,
+                 retry_after: int = 1, fixtures: Optional[Dict[str, Dict]] = None,
+                 admin_ids: Iterable[int] = (), seed: int = 0):
+        super().__init__(host, port)
+        self.prefix = f"/bot{token}/"
+        self.latency = latency  # Mean seconds per call, exponentially distributed
+        self.error_rate = error_rate
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.fixtures = default_fixtures() if fixtures is None else fixtures
+        self.fixtures_by_id = {chat['id']: chat for chat in self.fixtures.values()}
+        self.admin_ids = set(admin_ids)
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.injected: Counter = Counter()
+        self._message_ids = itertools.count(1)
+        self.on_message: Optional[Callable[[int], None]] = None  # Called with the chat ID of every message sent
+
+    def _find_route(self, request: Request):
+        if request.path.startswith(self.prefix):
+            return self._handle_api
+        return super()._find_route(request)
+
+    @staticmethod
+    def _parse_params(request: Request) -> Dict[str, str]:
+        content_type = request.headers.get('content-type', '')
+        if content_type.startswith('application/json'):
+            return json.loads(request.body or b'{}')
+        if content_type.startswith('multipart/form-data'):
+            message = BytesParser().parsebytes(
+                b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + request.body)
+            return {part.get_param('name', header='content-disposition'): part.get_payload(decode=True).decode('utf-8', 'replace')
+                    for part in message.get_payload() if not part.get_filename()}
+        return dict(parse_qsl(request.body.decode('utf-8') or request.query))
+
+    @staticmethod
+    def _reply(result) -> Response:
+        return 200, 'application/json', json.dumps({'ok': True, 'result': result}).encode()
+
+    @staticmethod
+    def _error(code: int, description: str, parameters: Optional[Dict] = None) -> Response:
+        payload = {'ok': False, 'error_code': code, 'description': description}
+        if parameters:
+            payload['parameters'] = parameters
+        return code, 'application/json', json.dumps(payload).encode()
+
+    async def _handle_api(self, request: Request) -> Response:
+        api_method = request.path[len(self.prefix):]
+        self.calls[api_method] += 1
+
+        if api_method not in STARTUP_METHODS:
+            if self.latency:
+                await asyncio.sleep(self.rng.expovariate(1 / self.latency))
+            roll = self.rng.random()
+            if roll < self.retry_after_rate:
+                self.injected['retry_after'] += 1
+                return self._error(429, f"Too Many Requests: retry after {self.retry_after}",
+                                   {'retry_after': self.retry_after})
+            if roll < self.retry_after_rate + self.error_rate:
+                self.injected['error'] += 1
+                return self._error(502, "Bad Gateway")
+
+        params = self._parse_params(request)
+        handler = getattr(self, f"api_{api_method}", None)
+        if handler is not None:
+            return handler(params)
+        if api_method in MESSAGE_METHODS:
+            if self.on_message and 'chat_id' in params:
+                self.on_message(int(params['chat_id']))
+            return self._reply(self._message(params))
+        return self._reply(True)
+
+    def _chat(self, chat_id) -> Dict:
+        chat_id = int(chat_id)
+        if chat_id in self.fixtures_by_id:
+            return self.fixtures_by_id[chat_id]
+        return {'id': chat_id, 'type': 'private' if chat_id > 0 else 'supergroup',
+                'first_name': 'User', 'title': 'Group'}
+
+    def _message(self, params: Dict) -> Dict:
+        return {'message_id': next(self._message_ids), 'date': int(time.time()),
+                'chat': self._chat(params.get('chat_id', 0)), 'from': BOT_USER,
+                'text': params.get('text', '')}
+
+    # Methods with specific results
+
+    def api_getMe(self, params):
+        return self._reply(BOT_USER)
+
+    def api_getUpdates(self, params):
+        return self._reply([])
+
+    def api_getChat(self, params):
+        chat_id = params.get('chat_id', '')
+        chat = self.fixtures.get(chat_id)
+        if chat is None and chat_id.lstrip('-').isdigit():
+            chat = self.fixtures_by_id.get(int(chat_id))
+        if chat is None:
+            return self._error(400, "Bad Request: chat not found")
+        return self._reply(dict(chat, accent_color_id=0, max_reaction_count=11,
+                                accepted_gift_types={'unlimited_gifts': False, 'limited_gifts': False,
+                                                     'unique_gifts': False, 'premium_subscription': False,
+                                                     'gifts_from_channels': False}))
+
+    def api_getChatMember(self, params):
+        user_id = int(params.get('user_id', 0))
+        user = {'id': user_id, 'is_bot': False, 'first_name': f"User {user_id}"}
+        if user_id in self.admin_ids or user_id == BOT_USER['id']:
+            return self._reply(dict(ADMIN_RIGHTS, status='administrator', user=user))
+        return self._reply({'status': 'member', 'user': user})
+
+    def api_getChatAdministrators(self, params):
+        return self._reply([dict(ADMIN_RIGHTS, status='administrator',
+                                 user={'id': uid, 'is_bot': False, 'first_name': f"Admin {uid}"})
+                            for uid in self.admin_ids])
+
+    def api_getChatMemberCount(self, params):
+        return self._reply(100)
+
+    def stats(self) -> Dict:
+        return {'calls': dict(self.calls), 'injected': dict(self.injected)}
@@ -0,0 +1,136 @@
+"""
+Shared Load Test Harness for ID Finder Pro Bot
+Starts the real Application against the fake Bot API and tracks when each
+injected update has gone through the whole handler graph.
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(LOADTEST_DIR)
+sys.path.insert(0, ROOT)
+
+TOKEN = '123456:LOADTEST'
+ADMIN_ID = 1
+
+def percentiles(samples: List[float]) -> Dict:
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000, 2)
+
+    return {'count': len(ordered), 'p50_ms': pct(50), 'p90_ms': pct(90), 'p99_ms': pct(99),
+            'max_ms': round(ordered[-1] * 1000, 2)}
+
+class LatencyTracker:
+    """
+    Measures enqueue-to-last-handler latency per update kind. Updates started
+    with a reply_chat are answered after their handler returns (batched
+    forwards), so they finish at the next message the bot sends to that chat
+    instead; message_sent is hooked to the fake Bot API for that.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.pending: Dict[int, Tuple[str, float, Optional[int]]] = {}
+        self.awaiting_reply: Dict[int, List[Tuple[str, float]]] = {}  # chat_id -> handled, not yet answered
+        self.latencies: Dict[str, List[float]] = {}
+        self.closed = False
+        self._done = asyncio.Event()
+
+    def start(self, update_id: int, kind: str, reply_chat: Optional[int] = None):
+        self.pending[update_id] = (kind, self.loop.time(), reply_chat)
+
+    def _finish(self, kind: str, started: float):
+        self.latencies.setdefault(kind, []).append(self.loop.time() - started)
+
+    def _check_done(self):
+        if self.closed and not self.unfinished:
+            self._done.set()
+
+    async def handle_update(self, update, context):
+        kind, started, reply_chat = self.pending.pop(update.update_id, (None, None, None))
+        if kind is not None:
+            if reply_chat is None:
+                self._finish(kind, started)
+            else:
+                # Per-user ordering means earlier replies to this chat have already been sent
+                self.awaiting_reply.setdefault(reply_chat, []).append((kind, started))
+        self._check_done()
+
+    def message_sent(self, chat_id: int):
+        """Fake Bot API hook: the bot sent a message to chat_id"""
+        for kind, started in self.awaiting_reply.pop(chat_id, ()):
+            self._finish(kind, started)
+        self._check_done()
+
+    @property
+    def unfinished(self) -> int:
+        return len(self.pending) + sum(len(waiting) for waiting in self.awaiting_reply.values())
+
+    async def wait(self, timeout: float):
+        """Wait until every started update has finished, or the timeout passes"""
+        self.closed = True
+        if not self.unfinished:
+            return
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    @property
+    def processed(self) -> int:
+        return sum(len(v) for v in self.latencies.values())
+
+    def report(self) -> Dict:
+        return {'all': percentiles([s for v in self.latencies.values() for s in v]),
+                **{kind: percentiles(v) for kind, v in sorted(self.latencies.items())}}
+
+async def start_bot(api_port: int, log_level: str = 'CRITICAL', record_dir: str = ''):
+    """Import the bot configured for the fake API, start it and attach a LatencyTracker"""
+    os.environ.update({
+        'BOT_TOKEN': TOKEN,
+        'BOT_API_URL': f"http://127.0.0.1:{api_port}/bot",
+        'ADMIN_IDS': str(ADMIN_ID),
+        'PORT': '0',
+        'WEBHOOK_URL': '',
+        'CATCHUP_ENABLED': 'false',
+        'RECORD_UPDATES_DIR': record_dir,
+        'LOG_LEVEL': log_level,
+    })
+    import bot  # Imported here so config picks up the environment above
+    from telegram import Update
+    from telegram.ext import TypeHandler
+
+    application = bot.build_application()
+    tracker = LatencyTracker()
+    # Runs after every other handler group has finished with the update
+    application.add_handler(TypeHandler(Update, tracker.handle_update), group=100)
+
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+    return bot, application, tracker
+
+async def stop_bot(application):
+    await application.stop()
+    await application.shutdown()
+    await application.post_shutdown(application)
+
+def run_in_tempdir(coroutine_function, *args):
+    """Run the bot in a throwaway directory so its JSON stores never touch the real ones"""
+    workdir = tempfile.mkdtemp(prefix='idfinder-loadtest-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        return asyncio.run(coroutine_function(*args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
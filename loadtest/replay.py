@@ -0,0 +1,215 @@
+"""
+Update Replay for ID Finder Pro Bot
+Feeds a recording made with RECORD_UPDATES_DIR (or driver.py --record) back
+through the real Application, against the fake Bot API, with profiling on.
+
+Timing follows the recording: original speed by default, --speed N for N
+times faster, --speed 0 for as fast as the bot can take them. Idle gaps are
+capped by --max-gap so an overnight recording doesn't replay overnight.
+
+Profiles:
+    --cprofile   deterministic profile, written as <prefix>.pstats
+                 (python -m pstats, snakeviz, ...)
+    --sample     low-overhead sampling of the event loop thread, written as
+                 folded stacks in <prefix>.folded (flamegraph.pl, speedscope)
+
+Usage:
+    python loadtest/replay.py recordings/ --speed 10 --sample
+    python loadtest/replay.py recordings/updates-*.jsonl.gz --speed 0 --cprofile --prefix profile/run1
+"""
+
+import argparse
+import asyncio
+import cProfile
+import glob
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, LOADTEST_DIR)
+
+from fake_bot_api import FakeBotAPI  # noqa: E402
+from harness import ADMIN_ID, ROOT, TOKEN, run_in_tempdir, start_bot, stop_bot  # noqa: E402
+from update_recorder import read_recording  # noqa: E402
+
+UPDATE_KINDS = ('message', 'edited_message', 'callback_query', 'inline_query', 'chosen_inline_result',
+                'my_chat_member', 'chat_member', 'chat_join_request', 'pre_checkout_query', 'channel_post')
+
+def update_kind(payload: Dict) -> str:
+    for kind in UPDATE_KINDS:
+        if kind in payload:
+            return kind
+    return 'other'
+
+def recording_files(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, 'updates-*.jsonl.gz'))))
+        else:
+            files.append(path)
+    return files
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into folded-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005, focus: bool = True):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.focus = focus
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _is_bot_code(filename: str) -> bool:
+        return filename.startswith(ROOT) and not filename.startswith(LOADTEST_DIR)
+
+    def _fold(self, frame) -> str:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append((code.co_filename, f"{os.path.basename(code.co_filename)}:{code.co_name}"))
+            frame = frame.f_back
+        frames.reverse()
+        if self.focus:
+            # Start the stack at the first bot frame; loop and library frames above it are noise
+            for i, (filename, _) in enumerate(frames):
+                if self._is_bot_code(filename):
+                    frames = frames[i:]
+                    break
+            else:
+                return '(idle or library)'
+        return ';'.join(name for _, name in frames)
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._fold(frame)] += 1
+                self.samples += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+async def replay(args) -> Dict:
+    fake = FakeBotAPI(TOKEN, port=args.api_port, latency=args.latency, admin_ids=[ADMIN_ID], seed=args.seed)
+    await fake.start()
+    port = fake._server.sockets[0].getsockname()[1]
+    bot, application, tracker = await start_bot(port, args.log_level)
+    from telegram import Update
+    loop = asyncio.get_running_loop()
+
+    profiler = cProfile.Profile() if args.cprofile else None
+    sampler = StackSampler(threading.get_ident(), args.interval, args.focus) if args.sample else None
+    if profiler:
+        profiler.enable()
+    if sampler:
+        sampler.start()
+
+    sent = 0
+    started = loop.time()
+    previous_ts = None
+    due = started
+    for ts, payload in read_recording(recording_files(args.recordings)):
+        if args.speed > 0:
+            if previous_ts is not None:
+                due += min(max(ts - previous_ts, 0), args.max_gap) / args.speed
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        previous_ts = ts
+        update = Update.de_json(payload, application.bot)
+        tracker.start(update.update_id, update_kind(payload))
+        await application.update_queue.put(update)
+        sent += 1
+        if args.limit and sent >= args.limit:
+            break
+    send_seconds = loop.time() - started
+
+    await tracker.wait(args.drain_timeout)
+    total_seconds = loop.time() - started
+
+    if sampler:
+        sampler.stop()
+    if profiler:
+        profiler.disable()
+
+    await stop_bot(application)
+    await fake.stop()
+
+    profiles = {}
+    if profiler:
+        profiles['cprofile'] = args.prefix + '.pstats'
+        profiler.dump_stats(profiles['cprofile'])
+    if sampler:
+        profiles['folded'] = args.prefix + '.folded'
+        sampler.write(profiles['folded'])
+
+    handler_latency = {}
+    for (handler,), (buckets, total) in sorted(bot.metrics.handler_latency._values.items()):
+        count = sum(buckets)
+        handler_latency[handler] = {'count': count, 'mean_ms': round(total / count * 1000, 2) if count else None}
+    return {
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'updates_sent': sent,
+        'updates_processed': tracker.processed,
+        'updates_unfinished': tracker.unfinished,
+        'send_seconds': round(send_seconds, 2),
+        'total_seconds': round(total_seconds, 2),
+        'latency': tracker.report(),
+        'handler_latency': handler_latency,
+        'samples': sampler.samples if sampler else None,
+        'profiles': profiles,
+        'fake_api': fake.stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded update stream with profiling")
+    parser.add_argument('recordings', nargs='+', help="Recording files or directories")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Replay speed multiplier, 0 for as fast as possible (default: %(default)s)")
+    parser.add_argument('--max-gap', type=float, default=5.0,
+                        help="Cap on idle time between updates, in recorded seconds (default: %(default)s)")
+    parser.add_argument('--limit', type=int, default=0, help="Stop after this many updates")
+    parser.add_argument('--cprofile', action='store_true', help="Write a cProfile <prefix>.pstats")
+    parser.add_argument('--sample', action='store_true', help="Write sampled folded stacks to <prefix>.folded")
+    parser.add_argument('--interval', type=float, default=0.005, help="Sampling interval in seconds")
+    parser.add_argument('--no-focus', dest='focus', action='store_false',
+                        help="Keep event loop and library frames in sampled stacks")
+    parser.add_argument('--prefix', default='replay', help="Path prefix for profile files (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0.02, help="Mean fake API latency in seconds")
+    parser.add_argument('--api-port', type=int, default=0, help="Fake Bot API port (default: any free port)")
+    parser.add_argument('--drain-timeout', type=float, default=60, help="Seconds to wait for in-flight updates")
+    parser.add_argument('--log-level', default='CRITICAL')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    args.recordings = [os.path.abspath(path) for path in args.recordings]
+    args.prefix = os.path.abspath(args.prefix)
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    os.makedirs(os.path.dirname(args.prefix), exist_ok=True)
+
+    report = run_in_tempdir(replay, args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Logging Helpers for ID Finder Pro Bot
+Lazy structured log events, sampling of chatty levels and a runtime-switchable log level.
+"""
+
+import logging
+import random
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+# Third-party loggers that stay at WARNING or above even in debug mode
+NOISY_LOGGERS = ('httpx', 'httpcore', 'telegram', 'telegram.ext')
+
+class Lazy:
+    """Defers an expensive value until a log record is actually formatted"""
+    __slots__ = ('func',)
+
+    def __init__(self, func: Callable[[], object]):
+        self.func = func
+
+    def __str__(self) -> str:
+        return str(self.func())
+
+    __repr__ = __str__
+
+def log_event(log: logging.Logger, level: int, event: str, **fields):
+    """
+    Log a structured event as `event key=value ...`.
+    Nothing is formatted unless the level is enabled.
+    """
+    if not log.isEnabledFor(level):
+        return
+    if fields:
+        log.log(level, '%s %s', event, Lazy(lambda: ' '.join(f"{k}={v!r}" for k, v in fields.items())))
+    else:
+        log.log(level, '%s', event)
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+_sampling_filter = SamplingFilter()
+
+def parse_level(level) -> Optional[int]:
+    """Level number for a name like 'debug' or a number, None if invalid"""
+    if isinstance(level, int):
+        return level
+    level = str(level).strip().upper()
+    if level.isdigit():
+        return int(level)
+    value = logging.getLevelName(level)
+    return value if isinstance(value, int) else None
+
+def set_log_level(level) -> Optional[str]:
+    """Switch the log level at runtime. Returns the level name, None if invalid."""
+    value = parse_level(level)
+    if value is None:
+        return None
+    logging.getLogger().setLevel(value)
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(max(value, logging.WARNING))
+    return logging.getLevelName(value)
+
+def get_log_level() -> str:
+    return logging.getLevelName(logging.getLogger().level)
+
+def set_sample_rate(rate: float):
+    _sampling_filter.rate = min(max(rate, 0.0), 1.0)
+
+def configure_logging(level='CRITICAL', sample_rate: float = 1.0):
+    """Set up the root handler with sampling; defaults to only showing critical crashes"""
+    logging.basicConfig(format=LOG_FORMAT)
+    for handler in logging.getLogger().handlers:
+        if _sampling_filter not in handler.filters:
+            handler.addFilter(_sampling_filter)
+    set_sample_rate(sample_rate)
+    if set_log_level(level) is None:
+        set_log_level(logging.CRITICAL)
+        logger.critical(f"Invalid LOG_LEVEL {level!r}, using CRITICAL")
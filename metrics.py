@@ -0,0 +1,252 @@
+"""
+Metrics for ID Finder Pro Bot
+Counters, gauges and histograms rendered in the Prometheus text format on /metrics.
+"""
+
+import abc
+import bisect
+import functools
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric(abc.ABC):
+    """Base class: a named metric with optional label names"""
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines for the metric, without the HELP and TYPE header"""
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+class Gauge(Metric):
+    """Value that goes up and down; can also be computed at scrape time"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._functions: Dict[Tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """Evaluate `func` on every scrape instead of storing a value"""
+        self._functions[self._key(labels)] = func
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def _samples(self) -> List[str]:
+        values = dict(self._values)
+        for key, func in self._functions.items():
+            try:
+                values[key] = func()
+            except Exception as e:
+                logger.error(f"Error computing gauge {self.name}{key}: {e}")
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a `with` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    """Holds metrics by name and renders them together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+# Global registry and the bot's metrics
+registry = Registry()
+
+handler_latency = registry.histogram(
+    'bot_handler_duration_seconds', 'Time spent in update handlers', ('handler',))
+handler_errors = registry.counter(
+    'bot_handler_errors_total', 'Exceptions raised by update handlers', ('handler',))
+api_calls = registry.counter(
+    'bot_api_calls_total', 'Bot API requests by method', ('method',))
+api_errors = registry.counter(
+    'bot_api_errors_total', 'Failed Bot API requests by method and error', ('method', 'error'))
+api_latency = registry.histogram(
+    'bot_api_duration_seconds', 'Bot API request latency by method', ('method',))
+api_retries = registry.counter(
+    'bot_api_retries_total', 'Bot API requests retried after a transient failure', ('method',))
+store_size = registry.gauge(
+    'bot_store_entries', 'Number of records held by each store', ('store',))
+store_flush_latency = registry.histogram(
+    'bot_store_flush_duration_seconds', 'Time spent writing a store to disk', ('store',))
+store_last_flush = registry.gauge(
+    'bot_store_last_flush_seconds', 'Duration of the most recent store write', ('store',))
+
+@contextmanager
+def time_flush(store: str):
+    """Record how long a store write blocks"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        store_flush_latency.observe(elapsed, store=store)
+        store_last_flush.set(elapsed, store=store)
+
+def timed_callback(callback):
+    """Wrap a handler callback to record its latency and errors"""
+    if getattr(callback, '_metrics_wrapped', False):
+        return callback
+    name = getattr(callback, '__name__', type(callback).__name__)
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        start = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            handler_errors.inc(handler=name)
+            raise
+        finally:
+            handler_latency.observe(time.perf_counter() - start, handler=name)
+
+    wrapper._metrics_wrapped = True
+    return wrapper
+
+def instrument_handlers(application):
+    """Wrap every registered handler callback, including those inside conversations"""
+    from telegram.ext import ConversationHandler
+
+    def instrument(handler):
+        if isinstance(handler, ConversationHandler):
+            for inner in handler.entry_points + handler.fallbacks:
+                instrument(inner)
+            for handlers in handler.states.values():
+                for inner in handlers:
+                    instrument(inner)
+        elif getattr(handler, 'callback', None) is not None:
+            handler.callback = timed_callback(handler.callback)
+
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            instrument(handler)
+
+async def metrics_route(request):
+    """Web server route serving the registry in the Prometheus text format"""
+    return 200, 'text/plain; version=0.0.4; charset=utf-8', registry.render().encode('utf-8')
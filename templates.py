@@ -0,0 +1,205 @@
+"""
+Reply Templates for ID Finder Pro Bot
+HTML reply templates shared by the private and group handlers.
+
+Each template is compiled once, at import, into a generated render function:
+runs of required lines become %-format strings and optional lines plain
+`if`s. Rendering escapes every field value exactly once with html.escape, so names
+and titles containing <, > or & can no longer break parse_mode='HTML'; the
+template's own markup is never escaped. Lines starting with '?' are optional
+and dropped when any of their fields is None or empty. Rendered templates are
+Markup, so they can fill a slot of another template without being escaped
+again.
+
+    USER_ID = Template(
+        "🆔 <b>ID:</b> <code>{id}</code>\\n"
+        "?📎 <b>Username:</b> @{username}"
+    )
+    USER_ID.render(id=42, username=None)  # -> '🆔 <b>ID:</b> <code>42</code>'
+"""
+
+import html
+from string import Formatter
+from typing import Callable, List, Optional, Tuple
+
+class Markup(str):
+    """Trusted HTML (e.g. a rendered mention); inserted without escaping"""
+    __slots__ = ()
+
+def escape(value) -> str:
+    """The single escaping step used by all templates"""
+    cls = value.__class__
+    if cls is str:
+        return html.escape(value, quote=False)
+    if cls is int or cls is Markup:
+        return value if cls is Markup else str(value)  # Nothing in an int needs escaping
+    return html.escape(str(value), quote=False)
+
+class Template:
+    """A precompiled HTML template with escaped {field} slots and optional lines"""
+    __slots__ = ('source', 'render')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.render: Callable[..., Markup] = self._compile(source)
+
+    @staticmethod
+    def _compile(source: str) -> Callable[..., Markup]:
+        """
+        Generate the render function once: each run of required lines becomes one
+        %-format string filled with escaped values, and each optional line an
+        `if` on its fields. Rendering is then a handful of escape calls and one
+        string formatting per run, with no per-call walk over the template.
+        """
+        body = []
+        required: List[Tuple[str, List[str]]] = []  # Pending run of required lines
+        optional_lines = 0
+
+        def slot(field: str, spec: str, ref: str) -> str:
+            return f"escape(format({ref}, {spec!r}))" if spec else f"escape({ref})"
+
+        def line_code(text: str, slots: List[str]) -> str:
+            return f"{text!r} % ({', '.join(slots)},)" if slots else repr(text)
+
+        def flush_required():
+            if required:
+                text = '\n'.join(text for text, _ in required)
+                slots = [code for _, line_slots in required for code in line_slots]
+                body.append(f"    lines.append({line_code(text, slots)})")
+                required.clear()
+
+        for line in source.split('\n'):
+            optional = line.startswith('?')
+            if optional:
+                line = line[1:]
+            text, slots, fields = [], [], []
+            for literal, field, spec, _ in Formatter().parse(line):
+                text.append(literal.replace('%', '%%'))
+                if field:
+                    if not field.isidentifier():
+                        raise ValueError(f"Unsupported template field: {field!r}")
+                    text.append('%s')
+                    fields.append(field)
+                    slots.append(slot(field, spec or '', f"_{field}" if optional else f"values[{field!r}]"))
+            text = ''.join(text)
+            if not optional:
+                required.append((text, slots))
+                continue
+            flush_required()
+            optional_lines += 1
+            # Dropped when any of its fields is None or empty
+            for field in dict.fromkeys(fields):
+                body.append(f"    _{field} = values.get({field!r})")
+            condition = ' and '.join(f"_{field} is not None and _{field} != ''" for field in dict.fromkeys(fields))
+            body.append(f"    if {condition or 'True'}:")
+            body.append(f"        lines.append({line_code(text, slots)})")
+        flush_required()
+
+        if optional_lines:
+            code = "def render(**values):\n    lines = []\n" + '\n'.join(body) + "\n    return Markup('\\n'.join(lines))\n"
+        else:
+            # A single run: format it directly
+            code = "def render(**values):\n    return Markup(" + body[0][len("    lines.append("):-1] + ")\n"
+        namespace = {'escape': escape, 'format': format, 'Markup': Markup}
+        exec(compile(code, f"<template {source[:40]!r}>", 'exec'), namespace)
+        return namespace['render']
+
+MENTION = Template('<a href="tg://user?id={id}">{name}</a>')
+
+def mention(user_id: int, name: str) -> Markup:
+    """Clickable mention of a user by ID"""
+    return MENTION.render(id=user_id, name=name or 'User')
+
+def full_name(first_name: Optional[str], last_name: Optional[str]) -> str:
+    return f"{first_name or ''} {last_name or ''}".strip()
+
+# Entity replies (forwards, usernames, inline mode)
+
+ENTITY = Template(
+    "✅ <b>Entity Detected:</b> {type}\n"
+    "🔗 <b>Name/Title:</b> {name}\n"
+    "?🆔 <b>ID:</b> <code>{id}</code>\n"
+    "?📎 <b>Username:</b> @{username}\n"
+    "?✅ <b>Verified:</b> {verified}\n"
+    "?📱 <b>Story ID:</b> <code>{story_id}</code>\n"
+    "?📅 <b>Forward Date:</b> {forward_date}"
+)
+
+STORY_NOTE = "\n\n💡 <b>Note:</b> This information was extracted from a forwarded story."
+
+ENTITY_ERROR = Template(
+    "❌ <b>{message}</b>\n"
+    "\n"
+    "🔍 <b>Reason:</b> {reason}\n"
+    "\n"
+    "ℹ️ <b>Explanation:</b>\n"
+    "{explanation}"
+)
+
+# Shared users and chats (keyboard request buttons)
+
+SHARED_USER = Template(
+    "✅ <b>Entity:</b> {type}\n"
+    "🔗 <b>Name:</b> {name}\n"
+    "🆔 <b>ID:</b> <code>{id}</code>\n"
+    "?📎 <b>Username:</b> @{username}"
+)
+
+SHARED_USERS_HEADER = Template("✅ <b>{count} {kind} Shared</b>\n")
+SHARED_USERS_LINE = Template("{n}. 🔗 {name} — 🆔 <code>{id}</code>{username}")
+USERNAME_SUFFIX = Template(" — @{username}")
+SHARED_USERS_LINE_LIMITED = Template("{n}. 🆔 <code>{id}</code> <i>(limited information)</i>")
+
+SHARED_CHAT = Template(
+    "✅ <b>Entity:</b> {type}\n"
+    "🔗 <b>Name/Title:</b> {title}\n"
+    "🆔 <b>ID:</b> <code>{id}</code>\n"
+    "?📎 <b>Username:</b> @{username}"
+)
+
+SHARED_CHAT_ADD = Template(
+    "✅ <b>Ready to Add Bot!</b>\n\n"
+    "📋 <b>Selected {type}:</b> {title}\n"
+    "🆔 <b>ID:</b> <code>{id}</code>\n\n"
+    "🚀 <b>Click the button below to add the bot:</b>"
+)
+
+# Forward batches
+
+FORWARDS_HEADER = Template("✅ <b>{count} Forwarded Messages</b> — {origins} unique origins\n")
+FORWARDS_LINE = Template("{n}. <b>{type}:</b> {name}{id}{username}{repeats}")
+FORWARDS_ID = Template(" — 🆔 <code>{id}</code>")
+FORWARDS_REPEATS = Template(" (×{count})")
+
+# Member lookups (/mem, /whois, /id in groups)
+
+MEMBER_INFO = Template(
+    "✅ <b>Member Information</b>\n\n"
+    "👤 <b>Name:</b> {name}\n"
+    "🆔 <b>User ID:</b> <code>{id}</code>\n"
+    "?📎 <b>Username:</b> @{username}\n"
+    "📊 <b>Status:</b> {status}"
+)
+
+WHOIS = Template(
+    "👤 <b>User Information</b>\n\n"
+    "🆔 <b>ID:</b> <code>{id}</code>\n"
+    "👤 <b>Name:</b> {name}\n"
+    "?📎 <b>Username:</b> @{username}\n"
+    "🏷️ <b>Status:</b> {status_emoji} {status}\n"
+    "?🤖 <b>Type:</b> {bot}"
+)
+
+USER_ID = Template(
+    "👤 <b>Your Telegram ID</b>\n\n"
+    "🆔 <b>ID:</b> <code>{id}</code>\n"
+    "👤 <b>Name:</b> {name}\n"
+    "?📎 <b>Username:</b> @{username}"
+)
+
+GROUP_ID = Template(
+    "👥 <b>Group Information</b>\n\n"
+    "🆔 <b>Group ID:</b> <code>{id}</code>\n"
+    "📝 <b>Title:</b> {title}\n"
+    "?📎 <b>Username:</b> @{username}"
+)
@@ -0,0 +1,71 @@
+"""
+Tests for flood and raid detection (antiflood.py)
+"""
+
+from antiflood import FloodDetector, SlidingWindowCounter
+
+
+def test_limit_within_window():
+    counter = SlidingWindowCounter(limit=3, window=10)
+
+    assert not counter.hit('a', now=0)
+    assert not counter.hit('a', now=4)
+    assert counter.hit('a', now=10)  # Three events, the oldest exactly one window ago
+
+
+def test_events_outside_window_do_not_count():
+    counter = SlidingWindowCounter(limit=3, window=10)
+
+    counter.hit('a', now=0)
+    counter.hit('a', now=5)
+    assert not counter.hit('a', now=10.5)  # The event at 0 has left the window
+    assert counter.hit('a', now=11)
+
+
+def test_keys_are_independent_and_reset():
+    counter = SlidingWindowCounter(limit=2, window=10)
+
+    counter.hit('a', now=0)
+    assert not counter.hit('b', now=1)
+    assert counter.hit('a', now=2)
+    counter.reset('a')
+    assert not counter.hit('a', now=3)
+
+
+def test_count_hits_several_events_at_once():
+    counter = SlidingWindowCounter(limit=5, window=10)
+
+    assert not counter.hit('a', count=4, now=0)
+    assert counter.hit('a', count=1, now=1)
+    assert SlidingWindowCounter(limit=5, window=10).hit('b', count=50, now=0)
+
+
+def test_least_recent_keys_are_evicted():
+    counter = SlidingWindowCounter(limit=2, window=10, max_keys=2)
+
+    counter.hit('a', now=0)
+    counter.hit('b', now=0)
+    counter.hit('a', now=1)  # Refreshes 'a', so 'b' is the oldest
+    counter.hit('c', now=1)
+    assert 'b' not in counter._events
+    assert counter.hit('a', now=2)
+
+
+def test_flood_triggers_once_per_burst():
+    detector = FloodDetector(max_messages=3, window=5, max_joins=10, join_window=10, raid_mode_seconds=60)
+
+    results = [detector.record_message(-100, 1, now=t) for t in (0, 1, 2, 3, 4)]
+    assert results == [False, False, True, False, False]
+    assert detector.record_message(-100, 1, now=4.5)
+    assert not detector.record_message(-100, 2, now=4.5)  # Other users are counted separately
+
+
+def test_join_raid_mode_starts_once_and_expires():
+    detector = FloodDetector(max_messages=5, window=5, max_joins=4, join_window=10, raid_mode_seconds=60)
+
+    assert not detector.record_joins(-100, count=3, now=0)
+    assert detector.record_joins(-100, count=1, now=1)
+    assert not detector.record_joins(-100, count=5, now=2)  # Already in raid mode
+    assert detector.in_raid(-100, now=60)
+    assert not detector.in_raid(-100, now=61)
+    assert not detector.in_raid(-200, now=1)
@@ -0,0 +1,107 @@
+"""
+Tests for the retry policy of the Bot API request layer (api_client.py)
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from telegram.error import NetworkError, TimedOut
+from telegram.request import HTTPXRequest
+
+from api_client import InstrumentedRequest
+
+URL = 'https://api.telegram.org/bot1:test/'
+
+
+def network_error(cause, error_class=NetworkError):
+    error = error_class('failed')
+    error.__cause__ = cause
+    return error
+
+
+class StubTransport:
+    """Stands in for HTTPXRequest.do_request: plays back one outcome per attempt"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def __call__(self, request, url, method, request_data=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, b'{}'
+
+
+@pytest.fixture
+def request_with(monkeypatch):
+    def make(*outcomes, max_retries=2):
+        stub = StubTransport(outcomes)
+        monkeypatch.setattr(HTTPXRequest, 'do_request', stub)
+        return InstrumentedRequest(max_retries=max_retries, retry_base_delay=0), stub
+    return make
+
+
+def call(request, api_method):
+    return asyncio.run(request.do_request(URL + api_method, 'POST'))
+
+
+def test_unsent_errors_are_retried_for_any_method(request_with):
+    for cause in (httpx.ConnectError('x'), httpx.ConnectTimeout('x'), httpx.PoolTimeout('x')):
+        request, stub = request_with(network_error(cause), 200)
+
+        assert call(request, 'sendMessage') == (200, b'{}')
+        assert stub.calls == 2
+
+
+def test_sent_errors_are_only_retried_for_read_only_methods(request_with):
+    request, stub = request_with(network_error(httpx.ReadTimeout('x'), TimedOut))
+    with pytest.raises(TimedOut):
+        call(request, 'sendMessage')
+    assert stub.calls == 1  # The message may have been delivered
+
+    request, stub = request_with(network_error(httpx.ReadTimeout('x'), TimedOut), 200)
+    assert call(request, 'getChat') == (200, b'{}')
+    assert stub.calls == 2
+
+
+def test_get_updates_is_not_treated_as_read_only(request_with):
+    request, stub = request_with(network_error(httpx.ReadError('x')))
+    with pytest.raises(NetworkError):
+        call(request, 'getUpdates')
+    assert stub.calls == 1
+
+
+@pytest.mark.parametrize('code', [502, 503, 504])
+def test_gateway_errors_are_retried_for_read_only_methods(request_with, code):
+    request, stub = request_with(code, 200)
+    assert call(request, 'getChatMember') == (200, b'{}')
+    assert stub.calls == 2
+
+    request, stub = request_with(code)
+    assert call(request, 'sendMessage') == (code, b'{}')
+    assert stub.calls == 1
+
+
+@pytest.mark.parametrize('code', [400, 403, 429, 500])
+def test_other_status_codes_are_returned(request_with, code):
+    request, stub = request_with(code)
+    assert call(request, 'getChat') == (code, b'{}')
+    assert stub.calls == 1
+
+
+def test_attempts_are_capped(request_with):
+    request, stub = request_with(502, 502, 502, 200)
+    assert call(request, 'getChat') == (502, b'{}')
+    assert stub.calls == 3  # The first attempt and max_retries=2 retries
+
+    request, stub = request_with(*[network_error(httpx.ConnectError('x'))] * 2, max_retries=1)
+    with pytest.raises(NetworkError):
+        call(request, 'sendMessage')
+    assert stub.calls == 2
+
+    request, stub = request_with(503, max_retries=0)
+    assert call(request, 'getChat') == (503, b'{}')
+    assert stub.calls == 1
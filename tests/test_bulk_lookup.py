@@ -0,0 +1,72 @@
+"""
+Tests for the /bulk identifier parser and CSV (bulk_lookup.py)
+"""
+
+import csv
+import io
+
+import pytest
+
+from bulk_lookup import CSV_HEADER, build_csv, decode_upload, normalize_identifier, parse_identifiers
+
+
+@pytest.mark.parametrize('token, expected', [
+    ('@durov', '@durov'),
+    ('durov', '@durov'),
+    ('(@durov)', '@durov'),
+    ('123456789', 123456789),
+    ('-1001234567890', -1001234567890),
+    ('https://t.me/durov', '@durov'),
+    ('t.me/durov/42?single', '@durov'),
+    ('telegram.me/s/channelname', '@channelname'),
+    ('https://t.me/c/1234567890/55', -1001234567890),
+    ('https://t.me/+AbCdEfGh', None),
+    ('https://t.me/joinchat/AbCdEfGh', None),
+    ('abc', None),  # Too short for a username
+    ('1name', None),
+    ('12345678901234567', None),  # Too long for an ID
+])
+def test_normalize_identifier(token, expected):
+    assert normalize_identifier(token) == expected
+
+
+def test_parse_identifiers_dedups_and_reports_invalid():
+    text = "@Durov, durov;https://t.me/DUROV\n12345 12345\n!!bad!! t.me/+invite\n\n@telegram"
+
+    identifiers, invalid, skipped = parse_identifiers(text)
+
+    assert identifiers == [('@Durov', '@Durov'), ('12345', 12345), ('@telegram', '@telegram')]
+    assert invalid == ['!!bad!!', 't.me/+invite']
+    assert skipped == 0
+
+
+def test_parse_identifiers_caps_items():
+    text = ' '.join(str(n) for n in range(1, 11)) + ' 1 2'
+
+    identifiers, invalid, skipped = parse_identifiers(text, max_items=4)
+
+    assert [identifier for _, identifier in identifiers] == [1, 2, 3, 4]
+    assert skipped == 6  # Duplicates of kept items are not counted as skipped
+    assert invalid == []
+
+
+def test_decode_upload_strips_bom_and_bad_bytes():
+    assert decode_upload('﻿@durov\n'.encode('utf-8') + b'\xff') == '@durov\n�'
+
+
+def test_build_csv_rows_in_input_order():
+    identifiers = [('@durov', '@durov'), ('-1001', -1001), ('@ghost', '@ghost')]
+    results = {
+        '@durov': {'id': 1, 'type': 'private', 'first_name': 'Pavel', 'last_name': None, 'username': 'durov'},
+        -1001: {'id': -1001, 'type': 'channel', 'title': 'News', 'username': None},
+    }
+
+    rows = list(csv.reader(io.StringIO(build_csv(identifiers, results, ['bad!']).decode('utf-8'))))
+
+    assert rows == [
+        CSV_HEADER,
+        ['@durov', '1', 'private', 'Pavel', '@durov', 'ok'],
+        ['-1001', '-1001', 'channel', 'News', '', 'ok'],
+        ['@ghost', '', '', '', '', 'not found'],
+        ['bad!', '', '', '', '', 'invalid'],
+    ]
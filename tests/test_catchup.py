@@ -0,0 +1,95 @@
+"""
+Tests for the startup catch-up queue (catchup.py)
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from telegram import Bot, Update
+
+from catchup import DROP, PRIORITY_CRITICAL, PRIORITY_NORMAL, catch_up, classify_update
+
+BOT = Bot('1:test')
+NOW = int(time.time())
+USER = {'id': 5, 'is_bot': False, 'first_name': 'A'}
+CHAT = {'id': 5, 'type': 'private', 'first_name': 'A'}
+GROUP = {'id': -100, 'type': 'supergroup', 'title': 'G'}
+
+
+def make_update(update_id, **fields):
+    return Update.de_json({'update_id': update_id, **fields}, BOT)
+
+
+def message(date=NOW, **fields):
+    return {'message_id': 1, 'date': date, 'chat': CHAT, 'from': USER, **fields}
+
+
+def member_update():
+    member = {'status': 'member', 'user': {'id': 1, 'is_bot': True, 'first_name': 'Bot'}}
+    left = {'status': 'left', 'user': {'id': 1, 'is_bot': True, 'first_name': 'Bot'}}
+    return {'chat': GROUP, 'from': USER, 'date': NOW, 'old_chat_member': left, 'new_chat_member': member}
+
+
+def forward(date):
+    return message(date=date, forward_origin={'type': 'hidden_user', 'date': date, 'sender_user_name': 'X'})
+
+
+PAYMENT = {'currency': 'XTR', 'total_amount': 5, 'invoice_payload': 'p',
+           'telegram_payment_charge_id': 't', 'provider_payment_charge_id': 'p'}
+
+
+def test_classify_update():
+    stale_before = NOW - 600
+    cases = [
+        (make_update(1, my_chat_member=member_update()), PRIORITY_CRITICAL),
+        (make_update(2, message=message(successful_payment=PAYMENT)), PRIORITY_CRITICAL),
+        (make_update(3, pre_checkout_query={'id': 'q', 'from': USER, 'currency': 'XTR', 'total_amount': 5,
+                                            'invoice_payload': 'p'}), PRIORITY_CRITICAL),
+        (make_update(4, inline_query={'id': 'q', 'from': USER, 'query': 'x', 'offset': ''}), DROP),
+        (make_update(5, message=forward(NOW - 3600)), DROP),
+        (make_update(6, message=forward(NOW - 60)), PRIORITY_NORMAL),
+        (make_update(7, message=message(date=NOW - 3600, text='/start')), PRIORITY_NORMAL),
+        (make_update(8, callback_query={'id': 'c', 'from': USER, 'chat_instance': 'i', 'data': 'x'}),
+         PRIORITY_NORMAL),
+    ]
+    for update, expected in cases:
+        assert classify_update(update, stale_before) == expected, update.update_id
+
+
+class FakeBot:
+    def __init__(self, updates):
+        self.pending = updates
+        self.calls = []
+
+    async def delete_webhook(self, drop_pending_updates):
+        pass
+
+    async def get_updates(self, offset, limit, timeout):
+        self.calls.append((offset, limit))
+        return [u for u in self.pending if u.update_id >= offset][:limit]
+
+
+def test_catch_up_queues_by_priority_and_confirms():
+    updates = [
+        make_update(10, message=message(text='/start')),
+        make_update(11, inline_query={'id': 'q', 'from': USER, 'query': 'x', 'offset': ''}),
+        make_update(12, my_chat_member=member_update()),
+        make_update(13, message=message(text='/help')),
+    ]
+    bot = FakeBot(updates)
+
+    async def run():
+        application = SimpleNamespace(bot=bot, update_queue=asyncio.Queue())
+        queued = await catch_up(application, max_updates=3)
+        order = []
+        while not application.update_queue.empty():
+            order.append(application.update_queue.get_nowait().update_id)
+        return queued, order
+
+    queued, order = asyncio.run(run())
+
+    # max_updates counts queued updates; the dropped inline query does not use up the budget
+    assert queued == 3
+    assert order == [12, 10, 13]
+    assert bot.calls[-1] == (14, 1)  # Everything taken is confirmed
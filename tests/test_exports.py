@@ -0,0 +1,87 @@
+"""
+Tests for the CSV/JSONL/Parquet exports (exports.py)
+"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from exports import ExportSpec, export_rows, parse_export_args, write_export
+
+USERS = {
+    '1': {'username': 'a', 'first_name': 'A', 'joined_date': '2026-01-15T10:00:00', 'last_seen': '2026-03-01T09:00:00'},
+    '2': {'username': 'b', 'first_name': 'B', 'joined_date': '2026-01-31T23:59:00+02:00', 'last_seen': ''},
+    '3': {'username': 'c', 'first_name': 'C', 'joined_date': '', 'last_seen': 'not a date'},
+    '4': {'username': 'd', 'first_name': 'D', 'joined_date': '2026-02-01T00:00:00', 'last_seen': '2026-02-01'},
+}
+
+
+def exported_ids(spec, records=USERS):
+    return [row[0] for row in export_rows(spec, records, list(records))]
+
+
+def test_parse_export_args():
+    spec = parse_export_args(['groups', 'jsonl', 'fields=title,group_id', 'since=2026-01-01', 'min=5', 'inactive'])
+
+    assert (spec.kind, spec.fmt) == ('groups', 'jsonl')
+    assert [field.name for field in spec.fields] == ['title', 'group_id']
+    assert spec.since == '2026-01-01'
+    assert spec.min_interactions == 5
+    assert spec.include_inactive
+
+
+@pytest.mark.parametrize('args', [[], ['channels'], ['users', 'fields=nope'], ['users', 'inactive'],
+                                  ['users', 'since=yesterday'], ['users', 'active=x'], ['users', 'xml']])
+def test_parse_export_args_rejects(args):
+    with pytest.raises(ValueError):
+        parse_export_args(args)
+
+
+def test_since_and_until_both_drop_undated_records():
+    assert exported_ids(ExportSpec('users', since='2026-01-01')) == [1, 2, 4]
+    assert exported_ids(ExportSpec('users', until='2026-01-31')) == [1, 2]
+    assert exported_ids(ExportSpec('users')) == [1, 2, 3, 4]
+
+
+def test_csv_export():
+    spec = ExportSpec('users', fields=['user_id', 'username'])
+    export_file, count = write_export(spec, export_rows(spec, USERS, list(USERS)), compress=False)
+
+    with export_file:
+        rows = list(csv.reader(io.TextIOWrapper(export_file, encoding='utf-8')))
+    assert count == 4
+    assert rows[0] == ['User ID', 'Username']
+    assert rows[1:] == [['1', 'a'], ['2', 'b'], ['3', 'c'], ['4', 'd']]
+
+
+def test_jsonl_export_gzip():
+    spec = ExportSpec('users', fmt='jsonl', fields=['user_id', 'joined_date'])
+    export_file, count = write_export(spec, export_rows(spec, USERS, list(USERS)), compress=True)
+
+    with export_file:
+        lines = gzip.decompress(export_file.read()).decode('utf-8').splitlines()
+    assert count == 4
+    assert json.loads(lines[0]) == {'user_id': 1, 'joined_date': '2026-01-15T10:00:00'}
+
+
+def test_parquet_timestamps_tolerate_offsets_and_bad_values():
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    spec = ExportSpec('users', fmt='parquet', fields=['user_id', 'joined_date', 'last_seen'])
+    export_file, count = write_export(spec, export_rows(spec, USERS, list(USERS)), compress=False)
+
+    with export_file:
+        table = pq.read_table(export_file)
+    assert count == 4
+    joined = table.column('joined_date').to_pylist()
+    last_seen = table.column('last_seen').to_pylist()
+    assert joined[0] == datetime(2026, 1, 15, 10, 0)
+    offset_value = datetime(2026, 1, 31, 21, 59, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert joined[1] == offset_value
+    assert joined[2] is None
+    assert last_seen[1] is None and last_seen[2] is None
+    assert last_seen[3] == datetime(2026, 2, 1)
@@ -0,0 +1,56 @@
+"""
+Tests for the consolidated forward reply (forward_batch.py)
+"""
+
+from forward_batch import split_lines, summarize
+from utils import EntityInfo
+
+
+def test_summarize_groups_origins_in_first_seen_order():
+    lines = summarize([
+        EntityInfo('user', 7, 'ann', 'Ann'),
+        None,
+        EntityInfo('channel', -1001, None, None),
+        EntityInfo('user', 7, 'ann', 'Ann'),
+        EntityInfo('hidden_user', 'Hidden', None, 'Ghost'),
+        EntityInfo('hidden_user', 'Hidden', None, 'Ghost'),
+        EntityInfo('hidden_user', 'Hidden', None, 'Other'),
+    ])
+
+    assert lines[0] == '✅ <b>7 Forwarded Messages</b> — 4 unique origins\n'
+    assert lines[1] == '1. <b>user:</b> Ann — 🆔 <code>7</code> — @ann (×2)'
+    assert lines[2] == '2. <b>channel:</b> Unknown — 🆔 <code>-1001</code>'
+    # Hidden users have no ID and are told apart by name
+    assert lines[3] == '3. <b>hidden_user:</b> Ghost (×2)'
+    assert lines[4] == '4. <b>hidden_user:</b> Other'
+    assert lines[5] == '\n❌ 1 message(s) without an identifiable origin'
+
+
+def test_summarize_escapes_names():
+    lines = summarize([EntityInfo('user', 7, None, '<b>Ann</b> & co')])
+
+    assert '&lt;b&gt;Ann&lt;/b&gt; &amp; co' in lines[1]
+    assert '<b>Ann</b>' not in lines[1]
+
+
+def test_summarize_without_origins():
+    assert summarize([None, None]) == ['✅ <b>2 Forwarded Messages</b> — 0 unique origins\n',
+                                       '\n❌ 2 message(s) without an identifiable origin']
+
+
+def test_split_lines_packs_up_to_limit():
+    lines = ['a' * 4, 'b' * 4, 'c' * 4, 'd' * 4]
+
+    assert split_lines(lines, limit=9) == ['aaaa\nbbbb', 'cccc\ndddd']
+    assert split_lines(lines, limit=8) == ['aaaa', 'bbbb', 'cccc', 'dddd']
+    assert split_lines(lines) == ['aaaa\nbbbb\ncccc\ndddd']
+    assert split_lines([]) == []
+
+
+def test_split_lines_keeps_every_line_once():
+    lines = [f"{n}. " + 'x' * (n % 97) for n in range(500)]
+
+    chunks = split_lines(lines, limit=1000)
+
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert '\n'.join(chunks).split('\n') == lines
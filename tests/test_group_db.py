@@ -0,0 +1,147 @@
+"""
+Tests for the sharded group moderation store (group_db.py)
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from group_db import MUTE_INDEX_FILE, GroupDatabase
+
+
+def write_legacy(tmp_path, data):
+    path = tmp_path / "group_data.json"
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+def make_db(tmp_path, **kwargs):
+    return GroupDatabase(db_file=str(tmp_path / "group_data.json"), data_dir=str(tmp_path / "group_data"), **kwargs)
+
+
+def legacy_group(mute_until=None):
+    group = {'warnings': {'5': [{'reason': 'spam', 'date': '2026-01-01T00:00:00', 'admin_id': 1}]},
+             'mutes': {},
+             'settings': {'max_warnings': 3}}
+    if mute_until:
+        group['mutes']['6'] = {'until': mute_until.isoformat(), 'reason': 'flood', 'admin_id': 1,
+                               'muted_at': '2026-01-01T00:00:00'}
+    return group
+
+
+def test_construction_touches_no_files(tmp_path):
+    write_legacy(tmp_path, {'-100': legacy_group()})
+    make_db(tmp_path)
+    assert not (tmp_path / "group_data").exists()
+
+
+def test_migration_splits_legacy_store(tmp_path):
+    until = datetime.now() + timedelta(hours=1)
+    write_legacy(tmp_path, {'-100': legacy_group(until), '-200': legacy_group()})
+
+    db = make_db(tmp_path)
+    db.load()
+
+    data_dir = tmp_path / "group_data"
+    assert sorted(os.listdir(data_dir)) == sorted(['-100.json', '-200.json', MUTE_INDEX_FILE])
+    assert not (tmp_path / "group_data.migrating").exists()
+    assert db.get_warning_count(-100, 5) == 1
+    assert db.is_user_muted(-100, 6)
+    assert db.next_mute_expiry() == until.timestamp()
+
+
+def test_interrupted_migration_is_redone(tmp_path):
+    write_legacy(tmp_path, {'-100': legacy_group(), '-200': legacy_group()})
+    # A crash mid-migration leaves a partial scratch directory and no data_dir
+    scratch = tmp_path / "group_data.migrating"
+    scratch.mkdir()
+    (scratch / "-100.json").write_text('{"warnings": {', encoding='utf-8')
+
+    db = make_db(tmp_path)
+    db.load()
+
+    assert not scratch.exists()
+    assert db.get_warning_count(-100, 5) == 1
+    assert db.get_warning_count(-200, 5) == 1
+
+
+def test_fresh_start_without_legacy_store(tmp_path):
+    db = make_db(tmp_path)
+    db.add_warning(-100, 5, "spam", 1)
+
+    assert (tmp_path / "group_data" / "-100.json").exists()
+    assert make_db(tmp_path).get_warning_count(-100, 5) == 1
+
+
+def test_active_mute_count(tmp_path):
+    db = make_db(tmp_path)
+    assert db.active_mute_count() == 0
+
+    db.add_mutes_batch(-100, [1, 2], timedelta(hours=1), "raid", 9)
+    db.add_mute(-200, 3, timedelta(hours=1), "spam", 9)
+    db.add_mute(-200, 3, timedelta(hours=2), "spam again", 9)  # Replaces, not adds
+    assert db.active_mute_count() == 3
+
+    db.remove_mute(-100, 1)
+    assert db.active_mute_count() == 2
+
+
+def test_expire_due_mutes_in_expiry_order(tmp_path):
+    db = make_db(tmp_path)
+    db.add_mute(-100, 1, timedelta(minutes=10), "a", 9)
+    db.add_mute(-100, 2, timedelta(minutes=30), "b", 9)
+    db.add_mute(-200, 3, timedelta(minutes=20), "c", 9)
+    first = db.next_mute_expiry()
+
+    assert db.expire_due_mutes(now=first - 1) == 0
+    assert db.expire_due_mutes(now=first + 15 * 60) == 2
+    assert not db.is_user_muted(-100, 1) and not db.is_user_muted(-200, 3)
+    assert db.is_user_muted(-100, 2)
+    assert db.get_mute_info(-100, 2)['reason'] == "b"
+
+    # Expired mutes are gone from the shards and the index on disk too
+    reloaded = make_db(tmp_path)
+    assert reloaded.get_mute_info(-200, 3) is None
+    assert reloaded.next_mute_expiry() == db.next_mute_expiry()
+
+
+def test_replaced_and_removed_mutes_leave_no_stale_expiry(tmp_path):
+    db = make_db(tmp_path)
+    db.add_mute(-100, 1, timedelta(minutes=5), "short", 9)
+    db.add_mute(-100, 1, timedelta(hours=1), "long", 9)
+    db.add_mute(-100, 2, timedelta(minutes=1), "removed", 9)
+    db.remove_mute(-100, 2)
+
+    # The first pending expiry is the replacement, not the stale short mute
+    until = db.next_mute_expiry()
+    assert until > (datetime.now() + timedelta(minutes=30)).timestamp()
+    assert db.expire_due_mutes(now=until - 1) == 0
+    assert db.is_user_muted(-100, 1)
+    assert db.expire_due_mutes(now=until) == 1
+    assert db.next_mute_expiry() is None
+
+
+def test_lapsed_mutes_are_not_reported_before_expiry_runs(tmp_path):
+    db = make_db(tmp_path)
+    db.add_mute(-100, 1, timedelta(seconds=-1), "lapsed", 9)
+
+    assert not db.is_user_muted(-100, 1)
+    assert db.get_mute_info(-100, 1) is None
+    assert db.cleanup_expired_mutes() == 1
+
+
+def test_failed_migration_fails_loudly_and_is_retried(tmp_path):
+    legacy = tmp_path / "group_data.json"
+    legacy.write_text('{"-100": {"warnings": ', encoding='utf-8')
+    db = make_db(tmp_path)
+
+    with pytest.raises(ValueError):
+        db.load()
+    with pytest.raises(ValueError):
+        db.get_warning_count(-100, 5)  # Never runs against a missing data_dir
+    assert not (tmp_path / "group_data").exists()
+
+    write_legacy(tmp_path, {'-100': legacy_group()})
+    assert db.get_warning_count(-100, 5) == 1
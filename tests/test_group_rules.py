@@ -0,0 +1,81 @@
+"""
+Tests for the automatic warning-limit enforcement (group_rules.py)
+"""
+
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from telegram.error import BadRequest
+
+from group_db import GroupDatabase
+from group_rules import WarnRulesEngine
+
+
+class FakeBot:
+    def __init__(self):
+        self.calls = []
+
+    async def restrict_chat_member(self, chat_id, user_id, permissions, until_date):
+        self.calls.append(('restrict', chat_id, user_id))
+
+    async def ban_chat_member(self, chat_id, user_id):
+        self.calls.append(('ban', chat_id, user_id))
+
+    async def unban_chat_member(self, chat_id, user_id):
+        self.calls.append(('unban', chat_id, user_id))
+
+
+def make_engine(tmp_path, **settings):
+    group_db = GroupDatabase(db_file=str(tmp_path / "group_data.json"), data_dir=str(tmp_path / "group_data"))
+    group_db.update_group_settings(-100, {'max_warnings': 2, **settings})
+    engine = WarnRulesEngine(group_db, lambda text: timedelta(hours=1))
+    context = SimpleNamespace(bot=FakeBot(), job_queue=None)
+    return engine, group_db, context
+
+
+async def failed_announcement():
+    raise BadRequest("Not enough rights to send text messages to the chat")
+
+
+async def announcement():
+    return 'sent'
+
+
+def test_failed_announcement_keeps_enforcement_outcome(tmp_path):
+    engine, group_db, context = make_engine(tmp_path)
+    group_db.add_warning(-100, 5, "spam", 1)
+    group_db.add_warning(-100, 5, "spam", 1)
+
+    outcome = asyncio.run(engine.warn_and_enforce(context, -100, 5, 1, failed_announcement()))
+
+    assert outcome['action'] == 'mute' and outcome['error'] is None
+    assert context.bot.calls == [('restrict', -100, 5)]
+    assert group_db.is_user_muted(-100, 5)
+    assert group_db.get_warning_count(-100, 5) == 0
+
+
+def test_below_limit_only_announces(tmp_path):
+    engine, group_db, context = make_engine(tmp_path)
+    group_db.add_warning(-100, 5, "spam", 1)
+
+    assert asyncio.run(engine.warn_and_enforce(context, -100, 5, 1, announcement())) is None
+    assert context.bot.calls == []
+
+
+@pytest.mark.parametrize('action, calls', [
+    ('kick', [('ban', -100, 5), ('unban', -100, 5)]),
+    ('ban', [('ban', -100, 5)]),
+    ('off', []),
+])
+def test_configured_action_is_applied(tmp_path, action, calls):
+    engine, group_db, context = make_engine(tmp_path, auto_action=action)
+    group_db.add_warning(-100, 5, "spam", 1)
+    group_db.add_warning(-100, 5, "spam", 1)
+
+    outcome = asyncio.run(engine.warn_and_enforce(context, -100, 5, 1, announcement()))
+
+    assert outcome['action'] == action
+    assert context.bot.calls == calls
+    assert group_db.get_warning_count(-100, 5) == (2 if action == 'off' else 0)
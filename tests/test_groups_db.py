@@ -0,0 +1,62 @@
+"""
+Tests for the incrementally maintained group statistics (groups_db.py)
+"""
+
+import json
+
+import pytest
+
+from groups_db import GroupsDatabase
+
+
+def make_db(tmp_path, groups=None):
+    path = tmp_path / "groups.json"
+    if groups is not None:
+        path.write_text(json.dumps(groups), encoding='utf-8')
+    return GroupsDatabase(str(path))
+
+
+def test_stats_split_active_and_tracked(tmp_path):
+    db = make_db(tmp_path, {
+        '-1': {'id': -1, 'type': 'group', 'username': None, 'interaction_count': 3, 'is_active': True},
+        '-2': {'id': -2, 'type': 'supergroup', 'username': 'pub', 'interaction_count': 5, 'is_active': False},
+    })
+
+    stats = db.get_group_stats()
+
+    assert stats['tracked_groups'] == 2
+    assert stats['total_groups'] == 1
+    assert stats['total_interactions'] == 3
+    assert stats['type_counts'] == {'group': 1}
+    assert stats['public_groups'] == 0
+
+
+def test_counters_follow_writes(tmp_path):
+    db = make_db(tmp_path)
+    db.add_group(-1, 'One', 'supergroup', username='one')
+    db.add_group(-2, 'Two', 'group')
+    db.increment_interaction(-1)
+    db.mark_group_inactive(-2)
+
+    stats = db.get_group_stats()
+    assert (stats['tracked_groups'], stats['total_groups']) == (2, 1)
+    assert stats['total_interactions'] == 2
+    assert stats['public_groups'] == 1 and stats['private_groups'] == 0
+
+    db.add_group(-2, 'Two', 'group')  # Re-added after removal
+    stats = db.get_group_stats()
+    assert (stats['tracked_groups'], stats['total_groups']) == (2, 2)
+    assert stats['type_counts'] == {'supergroup': 1, 'group': 1}
+    assert db.get_total_groups() == 2
+
+
+def test_all_groups_is_a_read_only_view(tmp_path):
+    db = make_db(tmp_path)
+    db.add_group(-1, 'One', 'supergroup')
+    groups = db.get_all_groups()
+
+    assert list(groups) == ['-1']
+    with pytest.raises(TypeError):
+        groups['-2'] = {}
+    db.mark_group_inactive(-1)
+    assert len(groups) == 0  # A live view, not a snapshot
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import threading
+import time
+
+from groups_db import GroupsDatabase
+from user_db import UserDatabase
+
+class SlowUserDatabase(UserDatabase):
+    def __init__(self, db_file):
+        super().__init__(db_file)
+        self.loads = 0
+
+    def _load_users(self):
+        self.loads += 1
+        time.sleep(0.3)
+        return super()._load_users()
+
+def test_wait_loaded_keeps_event_loop_running(tmp_path):
+    path = tmp_path / 'users.json'
+    path.write_text(json.dumps({'1': {'user_id': 1, 'first_name': 'A'}}))
+    db = SlowUserDatabase(str(path))
+
+    async def main():
+        stalls = []
+
+        async def ticker():
+            while True:
+                start = time.monotonic()
+                await asyncio.sleep(0.01)
+                stalls.append(time.monotonic() - start)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(*[db.wait_loaded() for _ in range(5)])
+        task.cancel()
+        return max(stalls)
+
+    max_stall = asyncio.run(main())
+    assert db.loaded and db.get_total_users() == 1
+    assert db.loads == 1  # Concurrent waiters share one load
+    assert max_stall < 0.2
+
+def test_wait_loaded_joins_a_load_running_in_another_thread(tmp_path):
+    path = tmp_path / 'groups.json'
+    path.write_text(json.dumps({'-1': {'id': -1, 'type': 'group', 'is_active': True}}))
+    db = GroupsDatabase(str(path))
+    thread = threading.Thread(target=db.load)
+    thread.start()
+    asyncio.run(db.wait_loaded())
+    thread.join()
+    assert db.get_total_groups() == 1
@@ -0,0 +1,79 @@
+"""
+Tests for the precompiled HTML reply templates (templates.py)
+"""
+
+import pytest
+
+from templates import ENTITY, Markup, Template, escape, full_name, mention
+
+
+def test_fields_are_escaped_once_and_markup_is_not():
+    template = Template("<b>{name}</b> <code>{id}</code>")
+
+    assert template.render(name='<i>Tom & Jerry</i>', id=1) == '<b>&lt;i&gt;Tom &amp; Jerry&lt;/i&gt;</b> <code>1</code>'
+    assert template.render(name='&amp;', id=1) == '<b>&amp;amp;</b> <code>1</code>'
+    assert template.render(name="it's \"quoted\"", id=1) == '<b>it\'s "quoted"</b> <code>1</code>'
+
+
+def test_rendered_templates_nest_without_double_escaping():
+    inner = Template("<i>{name}</i>").render(name='A & B')
+    outer = Template("Hi {who}!").render(who=inner)
+
+    assert isinstance(inner, Markup)
+    assert outer == 'Hi <i>A &amp; B</i>!'
+
+
+def test_escape():
+    assert escape('<a>&') == '&lt;a&gt;&amp;'
+    assert escape(42) == '42'
+    assert escape(Markup('<b>x</b>')) == '<b>x</b>'
+
+
+def test_optional_lines_drop_on_missing_values():
+    template = Template("A {a}\n?B {b}\n?C {c} {d}")
+
+    assert template.render(a=1, b=2, c=3, d=4) == 'A 1\nB 2\nC 3 4'
+    assert template.render(a=1, b=None, c=3, d='') == 'A 1'
+    assert template.render(a='', b=0, c=3, d=False) == 'A \nB 0\nC 3 False'
+
+
+def test_format_spec_applies_before_escaping():
+    assert Template("{n:,} {x:>3}").render(n=1234567, x='<') == '1,234,567   &lt;'
+
+
+def test_entity_reply():
+    text = ENTITY.render(type='user', name='Ann <3', id=7, username='ann', verified=None, story_id=None,
+                         forward_date='2026-01-02 03:04:05')
+
+    assert text == ("✅ <b>Entity Detected:</b> user\n"
+                    "🔗 <b>Name/Title:</b> Ann &lt;3\n"
+                    "🆔 <b>ID:</b> <code>7</code>\n"
+                    "📎 <b>Username:</b> @ann\n"
+                    "📅 <b>Forward Date:</b> 2026-01-02 03:04:05")
+
+
+def test_mention_and_full_name():
+    assert mention(7, '<Ann>') == '<a href="tg://user?id=7">&lt;Ann&gt;</a>'
+    assert mention(7, '') == '<a href="tg://user?id=7">User</a>'
+    assert full_name('Ann', None) == 'Ann'
+    assert full_name(None, None) == ''
+
+
+def test_literal_percent_and_braces_survive_compilation():
+    template = Template("100% {{sure}} {name}\n?50%% {{maybe}} {x}")
+
+    assert template.render(name='<a>', x='%s') == '100% {sure} &lt;a&gt;\n50%% {maybe} %s'
+    assert template.render(name='a', x=None) == '100% {sure} a'
+
+
+def test_leading_and_trailing_optional_lines():
+    template = Template("?{a}\nmiddle\n?{b}")
+
+    assert template.render(a='x', b='y') == 'x\nmiddle\ny'
+    assert template.render(a='', b=None) == 'middle'
+    assert Template("?{a}").render(a=None) == ''
+
+
+def test_missing_required_field_raises():
+    with pytest.raises(KeyError, match='b'):
+        Template("{a} {b}").render(a=1)
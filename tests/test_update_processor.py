@@ -0,0 +1,55 @@
+import asyncio
+import time
+from datetime import datetime
+
+from telegram import Chat, Message, Update, User
+
+from update_processor import KeyedUpdateProcessor
+
+def message_update(update_id: int, user_id: int) -> Update:
+    chat = Chat(user_id, Chat.PRIVATE)
+    return Update(update_id, message=Message(update_id, datetime.now(), chat, from_user=User(user_id, 'U', False)))
+
+def test_flooding_user_does_not_starve_others():
+    async def main():
+        processor = KeyedUpdateProcessor(2)
+        order = []
+
+        async def handle(update_id, user_id, delay):
+            await asyncio.sleep(delay)
+            order.append((user_id, update_id))
+
+        # One user floods far more updates than there are workers, as the
+        # Application would: one task per update, all started at once
+        tasks = [asyncio.create_task(processor.process_update(message_update(n, 1), handle(n, 1, 0.01)))
+                 for n in range(200)]
+        await asyncio.sleep(0)
+        start = time.monotonic()
+        await processor.process_update(message_update(1000, 2), handle(1000, 2, 0))
+        waited = time.monotonic() - start
+
+        await asyncio.gather(*tasks)
+        return waited, order, processor
+
+    waited, order, processor = asyncio.run(main())
+    # Served while the flood (about 2 s of serialized work) is still running
+    assert waited < 0.5
+    flood = [update_id for user_id, update_id in order if user_id == 1]
+    assert flood == sorted(flood)  # The flooding user's updates stay in order
+    assert processor.active_keys == 0
+
+def test_updates_of_one_user_never_overlap():
+    async def main():
+        processor = KeyedUpdateProcessor(4)
+        running = {'now': 0, 'max': 0}
+
+        async def handle():
+            running['now'] += 1
+            running['max'] = max(running['max'], running['now'])
+            await asyncio.sleep(0.005)
+            running['now'] -= 1
+
+        await asyncio.gather(*[processor.process_update(message_update(n, 7), handle()) for n in range(20)])
+        return running['max']
+
+    assert asyncio.run(main()) == 1
@@ -0,0 +1,145 @@
+"""
+Tests for the anonymized update recorder (update_recorder.py)
+"""
+
+import json
+import os
+
+from telegram import Bot, Update
+
+from update_recorder import Anonymizer, UpdateRecorder, read_recording
+
+SALT = b'test-salt'
+USER = {'id': 123456789, 'is_bot': False, 'first_name': 'Alice', 'last_name': 'Smith', 'username': 'alice'}
+CHAT = {'id': 123456789, 'type': 'private', 'first_name': 'Alice', 'username': 'alice'}
+
+
+def message_update(update_id, **fields):
+    message = {'message_id': 10, 'date': 1760000000, 'chat': CHAT, 'from': USER}
+    message.update(fields)
+    return {'update_id': update_id, 'message': message}
+
+
+CONTACT = message_update(1, contact={
+    'phone_number': '+15551234567', 'first_name': 'Bob', 'user_id': 987654321,
+    'vcard': 'BEGIN:VCARD\nTEL:+15551234567\nADR:;;1 Main St\nEND:VCARD'})
+LOCATION = message_update(2, location={'latitude': 52.520008, 'longitude': 13.404954})
+VENUE = message_update(3, location={'latitude': 52.520008, 'longitude': 13.404954}, venue={
+    'location': {'latitude': 52.520008, 'longitude': 13.404954}, 'title': 'Home',
+    'address': '1 Main St', 'foursquare_id': '4b0588', 'google_place_id': 'ChIJAVkDPzdOqEcR'})
+LINK = message_update(
+    4, text='see here: https://example.com/private?token=abc',
+    entities=[{'type': 'text_link', 'offset': 0, 'length': 3, 'url': 'https://example.com/secret'},
+              {'type': 'url', 'offset': 10, 'length': 37}],
+    link_preview_options={'url': 'https://example.com/private?token=abc', 'is_disabled': False})
+POLL = message_update(5, poll={
+    'id': '5001', 'question': 'Where does Alice live?', 'type': 'quiz', 'total_voter_count': 1,
+    'is_closed': False, 'is_anonymous': True, 'allows_multiple_answers': False, 'allows_revoting': False,
+    'members_only': False, 'correct_option_ids': [0], 'explanation': 'Alice told me',
+    'options': [{'persistent_id': 'o1', 'text': 'Berlin', 'voter_count': 1},
+                {'persistent_id': 'o2', 'text': 'Paris', 'voter_count': 0}]})
+DOCUMENT = message_update(6, document={'file_id': 'AgADBAAD', 'file_unique_id': 'AQADx', 'mime_type': 'application/pdf',
+                                       'file_name': 'alice_passport.pdf', 'file_size': 1024})
+PAYMENT = message_update(7, successful_payment={
+    'currency': 'XTR', 'total_amount': 5, 'invoice_payload': 'donate_stars_5',
+    'telegram_payment_charge_id': 'tg_charge_1', 'provider_payment_charge_id': 'prov_1',
+    'order_info': {'name': 'Alice Smith', 'phone_number': '+15551234567', 'email': 'alice@example.org',
+                   'shipping_address': {'country_code': 'DE', 'state': 'Berlin State', 'city': 'Berlin',
+                                        'street_line1': '1 Main St', 'street_line2': 'Flat 2',
+                                        'post_code': '10115'}}})
+UNKNOWN_FIELD = message_update(8, some_future_field={'secret_note': 'Alice is away'})
+
+SECRETS = ['+15551234567', 'VCARD', '1 Main St', '52.52', '13.40', '4b0588', 'ChIJ', 'example.com',
+           'token=abc', 'Alice', 'Smith', 'alice', 'Bob', '123456789', '987654321', 'Berlin', 'Paris',
+           'Flat 2', '10115', 'passport', 'AgADBAAD', 'tg_charge_1', 'prov_1']
+ALL_UPDATES = [CONTACT, LOCATION, VENUE, LINK, POLL, DOCUMENT, PAYMENT, UNKNOWN_FIELD]
+
+
+def record_and_read(tmp_path, updates):
+    recorder = UpdateRecorder(str(tmp_path), salt=SALT)
+    for update in updates:
+        recorder.record(update, timestamp=1.0)
+    recorder.close()
+    paths = sorted(os.path.join(tmp_path, name) for name in os.listdir(tmp_path))
+    return [payload for _, payload in read_recording(paths)]
+
+
+def test_recording_leaks_no_personal_data(tmp_path):
+    recorded = record_and_read(tmp_path, ALL_UPDATES)
+    assert len(recorded) == len(ALL_UPDATES)
+
+    output = json.dumps(recorded)
+    for secret in SECRETS:
+        assert secret not in output
+
+    contact, location, venue, link, poll, document, payment, unknown = (payload['message'] for payload in recorded)
+    assert 'vcard' not in contact['contact']
+    assert location['location'] == {'latitude': 0.0, 'longitude': 0.0}
+    assert venue['venue']['address'] == 'x' * len('1 Main St')
+    assert 'foursquare_id' not in venue['venue'] and 'google_place_id' not in venue['venue']
+    assert all('url' not in entity for entity in link['entities'])
+    assert 'url' not in link['link_preview_options']
+    assert poll['poll']['question'] == 'x' * len('Where does Alice live?')
+    assert [option['text'] for option in poll['poll']['options']] == ['xxxxxx', 'xxxxx']
+    assert document['document']['file_name'] == 'x' * len('alice_passport.pdf')
+    address = payment['successful_payment']['order_info']['shipping_address']
+    assert address['street_line1'] == 'x' * len('1 Main St') and address['post_code'] == 'xxxxx'
+    assert unknown['some_future_field'] == {'secret_note': 'x' * len('Alice is away')}
+
+
+def test_structural_strings_are_kept(tmp_path):
+    recorded = record_and_read(tmp_path, [POLL, DOCUMENT, PAYMENT])
+    poll, document, payment = (payload['message'] for payload in recorded)
+
+    assert poll['chat']['type'] == 'private'
+    assert poll['poll']['type'] == 'quiz' and poll['poll']['id'] == '5001'
+    assert document['document']['mime_type'] == 'application/pdf'
+    assert payment['successful_payment']['currency'] == 'XTR'
+    assert payment['successful_payment']['invoice_payload'] == 'donate_stars_5'
+
+
+def test_recorded_updates_still_replay(tmp_path):
+    recorded = record_and_read(tmp_path, ALL_UPDATES)
+    bot = Bot('1:test')
+
+    updates = [Update.de_json(payload, bot) for payload in recorded]
+
+    assert updates[0].message.contact.phone_number == 'x' * len('+15551234567')
+    assert updates[1].message.location.latitude == 0.0
+    assert updates[2].message.venue.title == 'Anon'
+    assert updates[3].message.entities[0].type == 'text_link'
+    assert updates[4].message.poll.type == 'quiz'
+    assert updates[6].message.successful_payment.order_info.shipping_address.city == 'xxxxxx'
+
+
+def test_pseudonyms_are_stable_and_keep_chat_shape():
+    anonymizer = Anonymizer(SALT)
+
+    assert anonymizer.entity_id(42) == Anonymizer(SALT).entity_id(42)
+    assert anonymizer.entity_id(42) != Anonymizer(b'other').entity_id(42)
+    assert anonymizer.entity_id(42) > 0
+    assert str(anonymizer.entity_id(-1001234567890)).startswith('-100')
+    assert -1_000_000_000 < anonymizer.entity_id(-4567) < 0
+    assert anonymizer.username('Alice') == anonymizer.username('alice')
+
+
+def test_text_keeps_commands_and_shape():
+    anonymizer = Anonymizer(SALT)
+
+    assert anonymizer.text('/warn spam links') == '/warn ' + 'x' * len('spam links')
+    assert anonymizer.text('/start') == '/start'
+    assert anonymizer.text('hello') == 'xxxxx'
+    assert anonymizer.text('@alice') == '@' + anonymizer.username('alice')
+
+
+def test_non_entity_ids_are_kept():
+    anonymizer = Anonymizer(SALT)
+    update = {'update_id': 7, 'callback_query': {'id': '555', 'from': USER, 'data': 'menu'},
+              'poll': {'id': '999'}}
+
+    scrubbed = anonymizer.scrub(update)
+
+    assert scrubbed['update_id'] == 7
+    assert scrubbed['callback_query']['id'] == '555'
+    assert scrubbed['callback_query']['from']['id'] == anonymizer.entity_id(USER['id'])
+    assert scrubbed['poll']['id'] == '999'
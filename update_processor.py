@@ -0,0 +1,90 @@
+"""
+Concurrent Update Processing for ID Finder Pro Bot
+Runs updates from different users in parallel while keeping each user's updates in order.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Dict, Hashable, Optional
+import logging
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+class KeyedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes up to `max_concurrent_updates` updates at once, serialized per key.
+
+    Updates sharing a key (the sender, or the chat when there is no sender) run
+    strictly one after another in arrival order, so ConversationHandler state
+    transitions of a single user never interleave. Updates with different keys
+    run in parallel.
+
+    The key lock is taken before a worker slot, so a burst from one user waits
+    on its own lock instead of occupying workers the other users need. The base
+    class's semaphore is bypassed for the same reason: it would be acquired
+    before the key lock.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._workers = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._running = 0
+        # key -> [lock, number of updates holding or waiting for it]
+        self._locks: Dict[Hashable, list] = {}
+
+    @staticmethod
+    def get_key(update: object) -> Optional[Hashable]:
+        """Serialization key for an update, None if it can run unordered"""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user:
+            return ('user', update.effective_user.id)
+        if update.effective_chat:
+            return ('chat', update.effective_chat.id)
+        return None
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self.get_key(update)
+        if key is None:
+            async with self._workers:
+                await self.do_process_update(update, coroutine)
+            return
+
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._workers:
+                    await self.do_process_update(update, coroutine)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        # Only called with a worker slot held
+        self._running += 1
+        try:
+            await coroutine
+        finally:
+            self._running -= 1
+
+    @property
+    def current_concurrent_updates(self) -> int:
+        return self._running
+
+    @property
+    def active_keys(self) -> int:
+        """Number of users/chats with updates running or queued"""
+        return len(self._locks)
+
+    async def initialize(self) -> None:
+        logger.info(f"Concurrent update processing enabled with {self.max_concurrent_updates} workers")
+
+    async def shutdown(self) -> None:
+        if self._locks:
+            logger.info(f"Shutting down with updates pending for {len(self._locks)} users/chats")
@@ -0,0 +1,162 @@
+"""
+Update Recorder for ID Finder Pro Bot
+Opt-in capture of incoming updates for offline replay and profiling.
+
+Updates are anonymized before they touch disk: user and chat IDs are replaced
+with stable keyed pseudonyms, names and usernames are rewritten, message text
+is reduced to its shape (a leading /command is kept) and coordinates are
+zeroed. Every other string is blanked unless its key is a known structural
+one (types, statuses, callback data, ...), so fields added to the Bot API
+later are scrubbed by default. Records are appended as JSON lines to gzip
+files that rotate by size, keeping only the newest files.
+"""
+
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from datetime import datetime
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keys whose integer value is a user or chat ID
+ID_KEYS = {'id', 'user_id', 'chat_id', 'sender_chat_id', 'migrate_to_chat_id', 'migrate_from_chat_id'}
+# Parents whose 'id' is not a user/chat ID (message IDs, query IDs, ...)
+NON_ENTITY_PARENTS = {'callback_query', 'inline_query', 'chosen_inline_result', 'pre_checkout_query',
+                      'shipping_query', 'poll', 'poll_answer', 'photo', 'document', 'video', 'sticker'}
+NAME_KEYS = {'first_name', 'last_name', 'title', 'sender_user_name', 'author_signature'}
+TEXT_KEYS = {'text', 'caption', 'query'}
+COORDINATE_KEYS = {'latitude', 'longitude'}
+# Optional free-form fields, left out entirely
+DROP_KEYS = {'invite_link', 'bio', 'description', 'email', 'vcard', 'url', 'web_page',
+             'foursquare_id', 'foursquare_type', 'google_place_id', 'google_place_type'}
+# String values kept as they are: enums and bot-generated values the handlers and
+# Update.de_json dispatch on. Any other string is blanked to its length.
+STRUCTURAL_KEYS = {'id', 'type', 'status', 'source', 'format', 'currency', 'language_code', 'mime_type',
+                   'emoji', 'media_group_id', 'data', 'callback_data', 'invoice_payload', 'shipping_option_id',
+                   'result_id', 'offset', 'chat_type', 'game_short_name', 'parse_mode'}
+
+class Anonymizer:
+    """Keyed, stable pseudonyms so the same user maps to the same fake ID across a recording"""
+
+    def __init__(self, salt: Optional[bytes] = None):
+        self.salt = salt or secrets.token_bytes(16)
+
+    def _hash(self, value) -> int:
+        digest = hmac.new(self.salt, str(value).encode(), hashlib.sha256).digest()
+        return int.from_bytes(digest[:6], 'big')
+
+    def entity_id(self, value: int) -> int:
+        """Keep the sign and the -100 supergroup/channel form so chat types stay consistent"""
+        if value > 0:
+            return 1 + self._hash(value) % 9_000_000_000
+        if str(value).startswith('-100'):
+            return -1_000_000_000_000 - self._hash(value) % 1_000_000_000
+        return -(1 + self._hash(value) % 999_999_999)
+
+    def username(self, value: str) -> str:
+        return f"u{self._hash(value.lower()) % 10 ** 10}"
+
+    def text(self, value: str) -> str:
+        """Keep a leading /command and @mentions' shape, blank everything else"""
+        if value.startswith('/'):
+            command, _, rest = value.partition(' ')
+            return command + (' ' + 'x' * len(rest) if rest else '')
+        if value.startswith('@'):
+            return '@' + self.username(value[1:])
+        return 'x' * len(value)
+
+    def scrub(self, obj, parent: str = ''):
+        if isinstance(obj, dict):
+            result = {}
+            for key, value in obj.items():
+                if key in DROP_KEYS:
+                    continue
+                if key in ID_KEYS and isinstance(value, int) and parent not in NON_ENTITY_PARENTS:
+                    result[key] = self.entity_id(value)
+                elif key == 'user_ids' and isinstance(value, list):
+                    result[key] = [self.entity_id(v) for v in value]
+                elif key == 'username' and isinstance(value, str):
+                    result[key] = self.username(value)
+                elif key in NAME_KEYS and isinstance(value, str):
+                    result[key] = 'Anon'
+                elif key in TEXT_KEYS and isinstance(value, str):
+                    result[key] = self.text(value)
+                elif isinstance(value, str):
+                    result[key] = value if key in STRUCTURAL_KEYS else 'x' * len(value)
+                elif key in COORDINATE_KEYS and isinstance(value, (int, float)):
+                    result[key] = 0.0
+                else:
+                    result[key] = self.scrub(value, key)
+            return result
+        if isinstance(obj, list):
+            return [self.scrub(item, parent) for item in obj]
+        if isinstance(obj, str) and parent not in STRUCTURAL_KEYS:
+            return 'x' * len(obj)  # Strings inside lists
+        return obj
+
+class UpdateRecorder:
+    """Appends anonymized updates to size-rotated gzip JSONL files"""
+
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024, max_files: int = 10,
+                 salt: Optional[bytes] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes  # Uncompressed bytes per file
+        self.max_files = max_files
+        self.anonymizer = Anonymizer(salt)
+        self._file = None
+        self._written = 0
+        self.recorded = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self):
+        name = datetime.now().strftime('updates-%Y%m%d-%H%M%S-%f.jsonl.gz')
+        self._file = gzip.open(os.path.join(self.directory, name), 'wt', encoding='utf-8', compresslevel=6)
+        self._written = 0
+        self._prune()
+
+    def _prune(self):
+        files = sorted(f for f in os.listdir(self.directory) if f.startswith('updates-') and f.endswith('.jsonl.gz'))
+        for name in files[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError as e:
+                logger.error(f"Error removing old recording {name}: {e}")
+
+    def record(self, update_dict: dict, timestamp: Optional[float] = None):
+        """Anonymize and append one raw update"""
+        if self._file is None:
+            self._open()
+        line = json.dumps({'ts': timestamp or time.time(), 'update': self.anonymizer.scrub(update_dict)},
+                          separators=(',', ':'), ensure_ascii=False)
+        self._file.write(line + '\n')
+        self._written += len(line) + 1
+        self.recorded += 1
+        if self._written >= self.max_bytes:
+            self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def handle_update(self, update, context):
+        """TypeHandler callback; never lets a recording problem affect the bot"""
+        try:
+            self.record(update.to_dict())
+        except Exception as e:
+            logger.error(f"Error recording update: {e}")
+
+def read_recording(paths):
+    """Yield (timestamp, update_dict) from recording files in order"""
+    for path in paths:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['ts'], record['update']
@@ -1,15 +1,45 @@
+import asyncio
 import json
 import os
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional
 import logging
 
+from metrics import time_flush
+
 logger = logging.getLogger(__name__)
 
 class UserDatabase:
     def __init__(self, db_file: str = "users.json"):
         self.db_file = db_file
-        self.users = self._load_users()
+        self._users: Optional[Dict] = None  # Loaded on first access, or in the background by load()
+        self._load_lock = threading.Lock()
+        self._load_task: Optional[asyncio.Future] = None
+    
+    @property
+    def users(self) -> Dict:
+        if self._users is None:
+            self.load()
+        return self._users
+    
+    @property
+    def loaded(self) -> bool:
+        return self._users is not None
+    
+    def load(self):
+        """Load the database once; safe to call from a worker thread"""
+        with self._load_lock:
+            if self._users is None:
+                self._users = self._load_users()
+    
+    async def wait_loaded(self):
+        """Load in a worker thread, or wait for the load already running; never blocks the event loop"""
+        if self._users is not None:
+            return
+        if self._load_task is None:
+            self._load_task = asyncio.ensure_future(asyncio.to_thread(self.load))
+        await asyncio.shield(self._load_task)
     
     def _load_users(self) -> Dict:
         """Load users from JSON file"""
@@ -25,7 +55,7 @@ class UserDatabase:
     def _save_users(self):
         """Save users to JSON file"""
         try:
-            with open(self.db_file, 'w', encoding='utf-8') as f:
+            with time_flush('users'), open(self.db_file, 'w', encoding='utf-8') as f:
                 json.dump(self.users, f, indent=2, ensure_ascii=False)
         except Exception as e:
             logger.error(f"Error saving users database: {e}")
@@ -1,283 +1,202 @@
+from datetime import datetime
+from typing import Callable, Dict, Optional
 from telegram import Message, User, Chat
 from telegram.constants import ChatType
 import logging
 from config import TON_WALLET
+from log_utils import log_event
+from templates import ENTITY, ENTITY_ERROR, STORY_NOTE
 
 logger = logging.getLogger(__name__)
 
-async def extract_forward_origin_info(forward_origin):
+FORWARD_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Display type per chat type; anything else falls back to the caller's default
+CHAT_TYPE_NAMES = {
+    ChatType.CHANNEL: 'Channel',
+    ChatType.GROUP: 'Group',
+    ChatType.SUPERGROUP: 'Group',
+}
+
+class EntityInfo:
+    """
+    Normalized info about the user or chat behind a forward or username.
+    Reads like the dict it replaces: info['type'], info.get('username').
+    """
+    __slots__ = ('type', 'id', 'username', 'name', 'verified', 'story_id', 'date')
+
+    def __init__(self, entity_type: str, entity_id, username: Optional[str] = None, name: Optional[str] = None,
+                 verified: Optional[bool] = None, story_id: Optional[int] = None, date: Optional[datetime] = None):
+        self.type = entity_type
+        self.id = entity_id  # 'Hidden' for users who hide their account
+        self.username = username
+        self.name = name
+        self.verified = verified
+        self.story_id = story_id
+        self.date = date  # Original send date of a forward
+
+    @property
+    def forward_date(self) -> Optional[str]:
+        # Formatted on demand: batched replies never show it. Same text as
+        # FORWARD_DATE_FORMAT, without strftime's cost
+        return self.date.isoformat(' ', 'seconds')[:19] if self.date else None
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict:
+        return {'type': self.type, 'id': self.id, 'username': self.username, 'name': self.name,
+                'verified': self.verified, 'story_id': self.story_id, 'forward_date': self.forward_date}
+
+    def __repr__(self) -> str:
+        return f"EntityInfo({self.type!r}, {self.id!r}, username={self.username!r})"
+
+def user_entity(user, entity_type: str, date: Optional[datetime] = None, story_id: Optional[int] = None) -> EntityInfo:
+    name = f"{user.first_name or ''} {user.last_name or ''}".strip()
+    return EntityInfo(entity_type, user.id, user.username, name, getattr(user, 'is_verified', None), story_id, date)
+
+def chat_entity(chat, entity_type: str, date: Optional[datetime] = None, story_id: Optional[int] = None) -> EntityInfo:
+    return EntityInfo(entity_type, chat.id, chat.username, chat.title, getattr(chat, 'is_verified', None),
+                      story_id, date)
+
+# One extractor per forward origin type; each returns None if the origin lacks its sender
+
+def _from_user_origin(origin) -> Optional[EntityInfo]:
+    user = origin.sender_user
+    if not user:
+        return None
+    return user_entity(user, 'Bot' if user.is_bot else 'User', origin.date)
+
+def _from_channel_origin(origin) -> Optional[EntityInfo]:
+    return chat_entity(origin.chat, 'Channel', origin.date) if origin.chat else None
+
+def _from_chat_origin(origin) -> Optional[EntityInfo]:
+    chat = origin.sender_chat
+    if not chat:
+        return None
+    return chat_entity(chat, CHAT_TYPE_NAMES.get(chat.type, 'Chat'), origin.date)
+
+def _from_hidden_user_origin(origin) -> Optional[EntityInfo]:
+    if not origin.sender_user_name:
+        return None
+    return EntityInfo('Hidden User', 'Hidden', name=origin.sender_user_name, date=origin.date)
+
+def _from_story_origin(origin) -> Optional[EntityInfo]:
+    story_id = getattr(origin, 'story_id', None)
+    # Channel stories carry sender_chat or chat, user stories sender_user
+    chat = getattr(origin, 'sender_chat', None) or getattr(origin, 'chat', None)
+    if chat:
+        return chat_entity(chat, 'Channel Story', origin.date, story_id)
+    user = getattr(origin, 'sender_user', None)
+    if user:
+        return user_entity(user, 'User Story', origin.date, story_id)
+    return None
+
+ORIGIN_EXTRACTORS: Dict[str, Callable[[object], Optional[EntityInfo]]] = {
+    'user': _from_user_origin,
+    'channel': _from_channel_origin,
+    'chat': _from_chat_origin,
+    'hidden_user': _from_hidden_user_origin,
+    'story': _from_story_origin,
+    'user_story': _from_story_origin,
+    'channel_story': _from_story_origin,
+}
+
+async def extract_forward_origin_info(forward_origin) -> Optional[EntityInfo]:
     """
     Extract information from forward_origin based on its type.
     Handles all types: user, channel, chat, hidden_user, and stories.
     """
     try:
         origin_type = forward_origin.type
-        logger.info(f"Processing forward origin type: {origin_type}")
-
-        if origin_type == "user":
-            # Forwarded from a user
-            if hasattr(forward_origin, 'sender_user') and forward_origin.sender_user:
-                user = forward_origin.sender_user
-                entity_type = 'Bot' if user.is_bot else 'User'
-                name = f"{user.first_name or ''} {user.last_name or ''}".strip()
-
-                return {
-                    'type': entity_type,
-                    'id': user.id,
-                    'username': user.username,
-                    'name': name,
-                    'verified': getattr(user, 'is_verified', None),
-                    'forward_date': forward_origin.date.strftime("%Y-%m-%d %H:%M:%S") if forward_origin.date else None
-                }
-
-        elif origin_type == "channel":
-            # Forwarded from a channel
-            if hasattr(forward_origin, 'chat') and forward_origin.chat:
-                chat = forward_origin.chat
-                return {
-                    'type': 'Channel',
-                    'id': chat.id,
-                    'username': chat.username,
-                    'name': chat.title,
-                    'verified': getattr(chat, 'is_verified', None),
-                    'forward_date': forward_origin.date.strftime("%Y-%m-%d %H:%M:%S") if forward_origin.date else None
-                }
-
-        elif origin_type == "chat":
-            # Forwarded from a group/supergroup
-            if hasattr(forward_origin, 'sender_chat') and forward_origin.sender_chat:
-                chat = forward_origin.sender_chat
-                if chat.type == ChatType.CHANNEL:
-                    entity_type = 'Channel'
-                elif chat.type in [ChatType.GROUP, ChatType.SUPERGROUP]:
-                    entity_type = 'Group'
-                else:
-                    entity_type = 'Chat'
-
-                return {
-                    'type': entity_type,
-                    'id': chat.id,
-                    'username': chat.username,
-                    'name': chat.title,
-                    'verified': getattr(chat, 'is_verified', None),
-                    'forward_date': forward_origin.date.strftime("%Y-%m-%d %H:%M:%S") if forward_origin.date else None
-                }
-
-        elif origin_type == "hidden_user":
-            # Forwarded from a user who hid their account
-            if hasattr(forward_origin, 'sender_user_name') and forward_origin.sender_user_name:
-                return {
-                    'type': 'Hidden User',
-                    'id': 'Hidden',
-                    'username': None,
-                    'name': forward_origin.sender_user_name,
-                    'verified': None,
-                    'forward_date': forward_origin.date.strftime("%Y-%m-%d %H:%M:%S") if forward_origin.date else None
-                }
-
-        # Handle stories - this is the key improvement
-        elif origin_type in ['story', 'user_story', 'channel_story'] or hasattr(forward_origin, 'story_id'):
-            logger.info(f"Processing story with origin type: {origin_type}")
-            story_id = getattr(forward_origin, 'story_id', None)
-
-            # Check for channel stories first (sender_chat or chat attribute)
-            if (hasattr(forward_origin, 'sender_chat') and forward_origin.sender_chat and
-                forward_origin.sender_chat is not None):
-                # Story from a channel
-                chat = forward_origin.sender_chat
-                entity_type = 'Channel Story'
-
-                return {
-                    'type': entity_type,
-                    'id': chat.id,
-                    'username': chat.username,
-                    'name': chat.title,
-                    'verified': getattr(chat, 'is_verified', None),
-                    'story_id': story_id,
-                    'forward_date': forward_origin.date.strftime("%Y-%m-%d %H:%M:%S") if forward_origin.date else None
-                }
-
-            elif (hasattr(forward_origin, 'chat') and forward_origin.chat and
-                  forward_origin.chat is not None):
-                # Alternative attribute for channel stories
-                chat = forward_origin.chat
-                entity_type = 'Channel Story'
-
-                return {
-                    'type': entity_type,
-                    'id': chat.id,
-                    'username': chat.username,
-                    'name': chat.title,
-                    'verified': getattr(chat, 'is_verified', None),
-                    'story_id': story_id,
-                    'forward_date': forward_origin.date.strftime("%Y-%m-%d %H:%M:%S") if forward_origin.date else None
-                }
-
-            elif (hasattr(forward_origin, 'sender_user') and forward_origin.sender_user and
-                  forward_origin.sender_user is not None):
-                # Story from a user
-                user = forward_origin.sender_user
-                entity_type = 'User Story'
-                name = f"{user.first_name or ''} {user.last_name or ''}".strip()
-
-                return {
-                    'type': entity_type,
-                    'id': user.id,
-                    'username': user.username,
-                    'name': name,
-                    'verified': getattr(user, 'is_verified', None),
-                    'story_id': story_id,
-                    'forward_date': forward_origin.date.strftime("%Y-%m-%d %H:%M:%S") if forward_origin.date else None
-                }
-
-        # If we get here, log what we found for debugging
-        logger.warning(f"Unhandled forward origin type: {origin_type}")
-        logger.warning(f"Available attributes: {dir(forward_origin)}")
-        return None
+        log_event(logger, logging.DEBUG, 'forward_origin', type=origin_type)
+
+        extractor = ORIGIN_EXTRACTORS.get(origin_type)
+        if extractor is None and hasattr(forward_origin, 'story_id'):
+            extractor = _from_story_origin
+        info = extractor(forward_origin) if extractor else None
+
+        if info is None:
+            logger.warning("Unhandled forward origin type: %s", origin_type)
+        return info
 
     except Exception as e:
-        logger.error(f"Error extracting forward origin info: {e}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error(f"Error extracting forward origin info: {e}", exc_info=True)
         return None
 
-async def extract_entity_info(message: Message):
+async def extract_entity_info(message: Message) -> Optional[EntityInfo]:
     """
-    Extracts entity info from a forwarded message or chat/user object.
-    Returns a dict with type, id, username, name/title, verified.
+    Extracts entity info from a forwarded message.
+    Returns an EntityInfo with type, id, username, name/title, verified.
     """
     try:
-        logger.info(f"Extracting entity info from message. Message attributes: {dir(message)}")
-
         # Handle the new forward_origin attribute (Bot API 7.0+)
-        if hasattr(message, 'forward_origin') and message.forward_origin:
-            logger.info(f"Found forward_origin: {message.forward_origin}")
-            logger.info(f"Forward origin type: {message.forward_origin.type}")
-            logger.info(f"Forward origin attributes: {dir(message.forward_origin)}")
+        forward_origin = getattr(message, 'forward_origin', None)
+        if forward_origin:
+            return await extract_forward_origin_info(forward_origin)
 
-            return await extract_forward_origin_info(message.forward_origin)
+        # Fallback for older versions (deprecated, but kept for compatibility)
+        log_event(logger, logging.DEBUG, 'extract_entity.legacy_fallback', message_id=message.message_id)
 
-        # If forward_origin extraction failed, try fallback methods
-        logger.info("Forward origin extraction failed, trying fallback methods...")
+        entity = getattr(message, 'forward_from', None)
+        if entity:
+            log_event(logger, logging.DEBUG, 'extract_entity.forward_from', id=entity.id)
+            return user_entity(entity, 'Bot' if entity.is_bot else 'User')
 
-        # Fallback for older versions (deprecated, but kept for compatibility)
-        logger.info("Checking for legacy forward attributes...")
-
-        if hasattr(message, 'forward_from') and message.forward_from:
-            logger.info(f"Found forward_from: {message.forward_from}")
-            entity = message.forward_from
-            entity_type = 'User' if not entity.is_bot else 'Bot'
-            name = f"{entity.first_name or ''} {entity.last_name or ''}".strip()
-            username = entity.username
-            verified = getattr(entity, 'is_verified', None)
-
-            result = {
-                'type': entity_type,
-                'id': entity.id,
-                'username': username,
-                'name': name,
-                'verified': verified
-            }
-            logger.info(f"Extracted from forward_from: {result}")
-            return result
-
-        elif hasattr(message, 'forward_from_chat') and message.forward_from_chat:
-            logger.info(f"Found forward_from_chat: {message.forward_from_chat}")
-            entity = message.forward_from_chat
-            if entity.type == ChatType.CHANNEL:
-                entity_type = 'Channel'
-            elif entity.type == ChatType.GROUP:
-                entity_type = 'Group'
-            elif entity.type == ChatType.SUPERGROUP:
-                entity_type = 'Group'
-            else:
-                entity_type = 'Unknown'
-            name = entity.title
-            username = entity.username
-            verified = getattr(entity, 'is_verified', None)
-
-            result = {
-                'type': entity_type,
-                'id': entity.id,
-                'username': username,
-                'name': name,
-                'verified': verified
-            }
-            logger.info(f"Extracted from forward_from_chat: {result}")
-            return result
+        entity = getattr(message, 'forward_from_chat', None)
+        if entity:
+            log_event(logger, logging.DEBUG, 'extract_entity.forward_from_chat', id=entity.id)
+            return chat_entity(entity, CHAT_TYPE_NAMES.get(entity.type, 'Unknown'))
 
         # Check for forward_sender_name (hidden user)
-        elif hasattr(message, 'forward_sender_name') and message.forward_sender_name:
-            logger.info(f"Found forward_sender_name: {message.forward_sender_name}")
-            result = {
-                'type': 'Hidden User',
-                'id': 'Hidden',
-                'username': None,
-                'name': message.forward_sender_name,
-                'verified': None
-            }
-            logger.info(f"Extracted from forward_sender_name: {result}")
-            return result
-            
+        sender_name = getattr(message, 'forward_sender_name', None)
+        if sender_name:
+            log_event(logger, logging.DEBUG, 'extract_entity.forward_sender_name')
+            return EntityInfo('Hidden User', 'Hidden', name=sender_name)
+
         # If we get here, we couldn't extract any entity info
-        logger.warning("Could not extract entity info from message")
-        if hasattr(message, 'forward_origin'):
-            logger.warning(f"Message has forward_origin: {message.forward_origin}")
-        if hasattr(message, 'forward_from'):
-            logger.warning(f"Message has forward_from: {message.forward_from}")
-        if hasattr(message, 'forward_from_chat'):
-            logger.warning(f"Message has forward_from_chat: {message.forward_from_chat}")
-            
+        log_event(logger, logging.DEBUG, 'extract_entity.not_forwarded', message_id=message.message_id)
         return None
-        
+
     except Exception as e:
         logger.error(f"Error extracting entity info: {e}")
         return None
 
-def format_entity_response(info: dict) -> str:
+def format_entity_response(info) -> str:
     if not info:
         return "❌ Could not extract entity info. Please forward a valid message or send a valid username/link."
 
     # Handle error responses from username resolution
     if info.get('error'):
-        lines = [
-            f"❌ <b>{info['message']}</b>",
-            f"",
-            f"🔍 <b>Reason:</b> {info['reason']}",
-            f"",
-            f"ℹ️ <b>Explanation:</b>",
-            info['explanation']
-        ]
-        return '\n'.join(lines)
-
-    lines = [
-        f"✅ <b>Entity Detected:</b> {info['type']}",
-        f"🔗 <b>Name/Title:</b> {info['name']}",
-    ]
-
-    # Only add ID if it's not hidden
-    if info['id'] != 'Hidden':
-        lines.append(f"🆔 <b>ID:</b> <code>{info['id']}</code>")
-
-    if info.get('username'):
-        lines.append(f"📎 <b>Username:</b> @{info['username']}")
-    if info.get('verified') is not None:
-        lines.append(f"✅ <b>Verified:</b> {'Yes' if info['verified'] else 'No'}")
-    if info.get('story_id') is not None:
-        lines.append(f"📱 <b>Story ID:</b> <code>{info['story_id']}</code>")
-    if info.get('forward_date'):
-        lines.append(f"📅 <b>Forward Date:</b> {info['forward_date']}")
+        return ENTITY_ERROR.render(message=info['message'], reason=info['reason'], explanation=info['explanation'])
+
+    verified = info.get('verified')
+    text = ENTITY.render(
+        type=info['type'],
+        name=info['name'],
+        id=None if info['id'] == 'Hidden' else info['id'],  # Only show the ID if it's not hidden
+        username=info.get('username'),
+        verified=None if verified is None else ('Yes' if verified else 'No'),
+        story_id=info.get('story_id'),
+        forward_date=info.get('forward_date')
+    )
 
     # Add special note for stories
     if 'Story' in info.get('type', ''):
-        lines.append(f"\n💡 <b>Note:</b> This information was extracted from a forwarded story.")
+        text += STORY_NOTE
 
-    return '\n'.join(lines)
+    return text
 
 async def resolve_username_or_link(app, text: str):
     """
     Resolves @username or t.me link to a Chat or User object using get_chat.
-    Returns entity info dict or None.
+    Returns an EntityInfo, an error dict for unresolvable names, or None.
     """
     import re
     username = None
@@ -300,7 +219,6 @@ async def resolve_username_or_link(app, text: str):
         return None
 
     try:
-        logger.info(f"Attempting to resolve username: {username}")
 
         # Try to get chat info using different methods
         chat = None
@@ -309,39 +227,27 @@ async def resolve_username_or_link(app, text: str):
         # Method 1: Try with @ prefix
         try:
             chat = await app.bot.get_chat(f"@{username}")
-            logger.info(f"Successfully resolved with @ prefix: @{username}")
-            logger.info(f"Chat object type: {type(chat)}, attributes: {dir(chat)}")
-            logger.info(f"Chat type: {getattr(chat, 'type', 'No type attribute')}")
-            logger.info(f"Chat is_bot: {getattr(chat, 'is_bot', 'No is_bot attribute')}")
         except Exception as e1:
-            logger.warning(f"Failed to resolve with @ prefix: {e1}")
+            log_event(logger, logging.DEBUG, 'resolve.failed', username=username, method='@', error=e1)
             last_error = e1
 
             # Method 2: Try without @ prefix
             try:
                 chat = await app.bot.get_chat(username)
-                logger.info(f"Successfully resolved without @ prefix: {username}")
-                logger.info(f"Chat object type: {type(chat)}, attributes: {dir(chat)}")
-                logger.info(f"Chat type: {getattr(chat, 'type', 'No type attribute')}")
-                logger.info(f"Chat is_bot: {getattr(chat, 'is_bot', 'No is_bot attribute')}")
             except Exception as e2:
-                logger.warning(f"Failed to resolve without @ prefix: {e2}")
+                log_event(logger, logging.DEBUG, 'resolve.failed', username=username, method='plain', error=e2)
                 last_error = e2
 
                 # Method 3: Try with numeric ID if it looks like one
                 if username.isdigit() or (username.startswith('-') and username[1:].isdigit()):
                     try:
                         chat = await app.bot.get_chat(int(username))
-                        logger.info(f"Successfully resolved as numeric ID: {username}")
-                        logger.info(f"Chat object type: {type(chat)}, attributes: {dir(chat)}")
-                        logger.info(f"Chat type: {getattr(chat, 'type', 'No type attribute')}")
-                        logger.info(f"Chat is_bot: {getattr(chat, 'is_bot', 'No is_bot attribute')}")
                     except Exception as e3:
-                        logger.error(f"Failed to resolve as numeric ID: {e3}")
+                        log_event(logger, logging.DEBUG, 'resolve.failed', username=username, method='id', error=e3)
                         last_error = e3
 
         if not chat:
-            logger.error(f"Could not resolve username: {username}. Last error: {last_error}")
+            log_event(logger, logging.INFO, 'resolve.unresolved', username=username, error=last_error)
             # Return error info instead of None to provide better user feedback
             return {
                 'error': True,
@@ -359,32 +265,15 @@ async def resolve_username_or_link(app, text: str):
                 'original_error': str(last_error)
             }
 
-        # Log the chat object for debugging
-        logger.info(f"Chat object details - ID: {chat.id}, Type: {getattr(chat, 'type', 'Unknown')}")
-
         # Determine entity type with enhanced logic
-        entity_type = "Unknown"
-        if hasattr(chat, 'type'):
-            chat_type = chat.type
-            logger.info(f"Chat type from API: {chat_type}")
-
-            if chat_type == "channel":
-                entity_type = "Channel"
-            elif chat_type in ["group", "supergroup"]:
-                entity_type = "Group"
-            elif chat_type == "private":
-                # For private chats, check if it's a bot
-                is_bot = getattr(chat, 'is_bot', False)
-                entity_type = "Bot" if is_bot else "User"
-                logger.info(f"Private chat detected, is_bot: {is_bot}, entity_type: {entity_type}")
-            else:
-                entity_type = chat_type.capitalize()
-                logger.info(f"Unknown chat type: {chat_type}, using capitalized version")
+        chat_type = getattr(chat, 'type', None)
+        if chat_type in CHAT_TYPE_NAMES:
+            entity_type = CHAT_TYPE_NAMES[chat_type]
+        elif chat_type is None or chat_type == ChatType.PRIVATE:
+            # For private chats, check if it's a bot
+            entity_type = "Bot" if getattr(chat, 'is_bot', False) else "User"
         else:
-            # Fallback if no type attribute
-            is_bot = getattr(chat, 'is_bot', False)
-            entity_type = "Bot" if is_bot else "User"
-            logger.warning(f"No type attribute found, using is_bot fallback: {is_bot}")
+            entity_type = chat_type.capitalize()
 
         # Get name based on entity type
         if entity_type in ["Channel", "Group"]:
@@ -394,15 +283,10 @@ async def resolve_username_or_link(app, text: str):
             last_name = getattr(chat, 'last_name', '') or ''
             name = f"{first_name} {last_name}".strip() or "Unknown"
 
-        info = {
-            'type': entity_type,
-            'id': chat.id,
-            'username': getattr(chat, 'username', None),
-            'name': name,
-            'verified': getattr(chat, 'is_verified', None)
-        }
+        info = EntityInfo(entity_type, chat.id, getattr(chat, 'username', None), name,
+                          getattr(chat, 'is_verified', None))
 
-        logger.info(f"Successfully resolved username {username} to: {info}")
+        log_event(logger, logging.DEBUG, 'resolve.ok', username=username, id=chat.id, type=entity_type)
         return info
 
     except Exception as e:
@@ -0,0 +1,189 @@
+"""
+Async HTTP Server for ID Finder Pro Bot
+A small asyncio HTTP/1.1 server that answers health checks and, in webhook
+mode, receives Telegram updates on the same port. Runs on the bot's event
+loop, so no extra thread is needed.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_SIZE = 10 * 1024 * 1024
+IDLE_TIMEOUT = 75  # Seconds a keep-alive connection may stay idle
+
+HTTP_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+class Request:
+    """A parsed HTTP request"""
+    __slots__ = ('method', 'path', 'query', 'headers', 'body')
+
+    def __init__(self, method: str, path: str, query: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+# A route handler returns (status, content_type, body)
+Response = Tuple[int, str, bytes]
+RouteHandler = Callable[[Request], Awaitable[Response]]
+
+class WebServer:
+    """Minimal asyncio HTTP server with exact-path routing"""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8000):
+        self.host = host
+        self.port = port
+        self._routes: Dict[Tuple[str, str], RouteHandler] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.ready_check: Optional[Callable[[], bool]] = None  # Reports whether the bot can serve requests
+
+        self.add_route('GET', '/', self._health)
+        self.add_route('GET', '/health', self._health)
+        self.add_route('GET', '/ready', self._ready)
+
+    def add_route(self, method: str, path: str, handler: RouteHandler):
+        """Register a handler for a method and exact path"""
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self):
+        """Start listening"""
+        if self._server:
+            return
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"✅ HTTP server running on port {self.port}")
+
+    async def stop(self):
+        """Stop listening and close the server"""
+        if not self._server:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    def is_ready(self) -> bool:
+        return self.ready_check is None or self.ready_check()
+
+    async def _health(self, request: Request) -> Response:
+        # Liveness: always 200 so the process is not restarted while loading
+        return 200, 'text/plain', b'OK' if self.is_ready() else b'OK (loading)'
+
+    async def _ready(self, request: Request) -> Response:
+        if self.is_ready():
+            return 200, 'text/plain', b'READY'
+        return 503, 'text/plain', b'LOADING'
+
+    def _find_route(self, request: Request) -> Optional[RouteHandler]:
+        return self._routes.get((request.method, request.path))
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        """Read one request from the connection, or None when the client is done"""
+        request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise ValueError("Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0) or 0)
+        if length > MAX_BODY_SIZE:
+            raise OverflowError("Request body too large")
+        body = await reader.readexactly(length) if length else b''
+
+        path, _, query = target.partition('?')
+        return Request(method.upper(), path, query, headers, body)
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, content_type: str, body: bytes, keep_alive: bool):
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except OverflowError:
+                    await self._write_response(writer, 413, 'text/plain', b'Payload Too Large', False)
+                    break
+                except ValueError:
+                    await self._write_response(writer, 400, 'text/plain', b'Bad Request', False)
+                    break
+                if request is None:
+                    break
+
+                handler = self._find_route(request)
+                if handler is None:
+                    allowed = any(path == request.path for _, path in self._routes)
+                    status, content_type, body = (405, 'text/plain', b'Method Not Allowed') if allowed else (404, 'text/plain', b'Not Found')
+                else:
+                    try:
+                        status, content_type, body = await handler(request)
+                    except Exception as e:
+                        logger.error(f"Error handling {request.method} {request.path}: {e}")
+                        status, content_type, body = 500, 'text/plain', b'Internal Server Error'
+
+                keep_alive = request.headers.get('connection', '').lower() != 'close'
+                await self._write_response(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+def webhook_route(application, secret_token: str) -> RouteHandler:
+    """Build the route that verifies the secret token and queues incoming updates"""
+    expected_token = secret_token.encode('utf-8')
+
+    async def handle_webhook(request: Request) -> Response:
+        received_token = request.headers.get('x-telegram-bot-api-secret-token', '').encode('utf-8')
+        if not hmac.compare_digest(received_token, expected_token):
+            return 403, 'text/plain', b'Forbidden'
+
+        try:
+            update = Update.de_json(json.loads(request.body), application.bot)
+        except Exception as e:
+            logger.error(f"Invalid webhook payload: {e}")
+            return 400, 'text/plain', b'Bad Request'
+
+        await application.update_queue.put(update)
+        return 200, 'text/plain', b'OK'
+
+    return handle_webhook